@@ -0,0 +1,119 @@
+"""
+对比各转换后端的吞吐量（页/秒）与内存峰值
+
+用法:
+    python benchmarks/bench_backends.py 文件.pdf [--repeat 3] [--backends pil direct]
+
+每个后端在独立的子进程中运行，保证内存峰值互不影响。
+内存峰值包含 Python 进程本身和 poppler 子进程（Windows 上只能统计 Python 进程本身）。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def peak_rss_bytes():
+    """
+    获取当前进程（及已结束的子进程）的内存峰值
+    返回:
+        (自身峰值字节数, 子进程峰值字节数)，无法获取时为 None
+    """
+    try:
+        import resource
+        # Linux 上 ru_maxrss 的单位是 KB，macOS 上是字节
+        unit = 1 if sys.platform == "darwin" else 1024
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+        return own, children
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize, None
+    except Exception:
+        return None, None
+
+
+def run_worker(backend, pdf_path):
+    # 子进程：用指定后端转换一次，并以 JSON 输出结果
+    from core.converter import convert_pdf_pages
+    from utils import get_poppler_path
+
+    poppler_path = get_poppler_path()
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        first_page_seconds = None
+        pages = 0
+        for _ in convert_pdf_pages(pdf_path, output_dir, poppler_path=poppler_path, backend=backend):
+            pages += 1
+            if first_page_seconds is None:
+                first_page_seconds = time.perf_counter() - start
+        seconds = time.perf_counter() - start
+        output_bytes = sum(entry.stat().st_size for entry in os.scandir(output_dir))
+    own_rss, children_rss = peak_rss_bytes()
+    print(json.dumps({
+        "backend": backend,
+        "pages": pages,
+        "seconds": seconds,
+        "first_page_seconds": first_page_seconds,
+        "output_bytes": output_bytes,
+        "peak_rss_bytes": own_rss,
+        "peak_children_rss_bytes": children_rss,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比转换后端的吞吐量与内存峰值")
+    parser.add_argument("pdf", help="用于测试的PDF文件")
+    parser.add_argument("--repeat", type=int, default=3, help="每个后端重复运行的次数")
+    parser.add_argument("--backends", nargs="+", default=["pil", "direct"], help="要测试的后端")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.pdf)
+        return
+
+    results = []
+    for backend in args.backends:
+        runs = []
+        for _ in range(args.repeat):
+            completed = subprocess.run([sys.executable, os.path.abspath(__file__), args.pdf, "--worker", backend],
+                                       capture_output=True, text=True, check=True)
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        best = min(runs, key=lambda run: run["seconds"])
+        best["pages_per_second"] = best["pages"] / best["seconds"] if best["seconds"] else 0.0
+        best["max_peak_rss_bytes"] = max(run["peak_rss_bytes"] or 0 for run in runs)
+        results.append(best)
+
+    for result in results:
+        children = result["peak_children_rss_bytes"]
+        print(f"{result['backend']:>8}: {result['pages']} 页, {result['seconds']:.2f} 秒, "
+              f"{result['pages_per_second']:.2f} 页/秒, 首页 {result['first_page_seconds'] or 0:.2f} 秒, "
+              f"内存峰值 {result['max_peak_rss_bytes'] / 1024 / 1024:.1f} MB"
+              + (f" (poppler {children / 1024 / 1024:.1f} MB)" if children else ""))
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+启动耗时基准测试：测量从启动进程到主窗口第一次显示的时间
+
+用法:
+    python benchmarks/bench_startup.py [--repeat 5] [--exe dist/PDFOrganizer/PDFOrganizer.exe]
+                                       [--imports-only] [--output 结果.json] [--budget 1.5]
+
+默认运行 main.py（或 --exe 指定的打包程序），设置 PDF_ORGANIZER_STARTUP_BENCH 后程序在主窗口显示后立即输出耗时并退出。
+结果包括进程自报的到窗口显示耗时、从创建进程算起的总耗时（含解释器启动），以及启动时被提前导入的转换模块。
+--imports-only 只测量导入 gui.app 的耗时，适合没有图形界面的环境（CI）。
+指定 --budget 时，中位数超过该秒数或有转换模块被提前导入则以非零状态退出。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只测导入时使用的子进程代码（与 main.py 中的 DEFERRED_MODULES 保持一致）
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import gui.app
+seconds = time.perf_counter() - start
+deferred = ("pdf2image", "core.converter", "core.batch", "core.adaptive", "core.rasterizer",
+            "gui.sort_rename_dialog")
+print(json.dumps({"first_window_seconds": seconds,
+                  "loaded_deferred_modules": [name for name in deferred if name in sys.modules]}))
+"""
+
+
+def run_once(command):
+    """
+    启动一次程序并读取其输出的结果
+    返回:
+        结果字典（含 process_seconds：从创建进程到输出结果的总耗时）
+    """
+    env = dict(os.environ, PDF_ORGANIZER_STARTUP_BENCH="1")
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=120)
+    process_seconds = time.perf_counter() - start
+    lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+    if not lines:
+        raise RuntimeError(f"程序没有输出启动耗时（退出码 {completed.returncode}）: {completed.stderr.strip()[-500:]}")
+    result = json.loads(lines[-1])
+    result["process_seconds"] = process_seconds
+    return result
+
+
+def summarize(values):
+    return {"median": statistics.median(values), "min": min(values), "max": max(values)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量从启动到主窗口显示的耗时")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数（取中位数）")
+    parser.add_argument("--exe", help="测量打包后的程序而不是 main.py")
+    parser.add_argument("--imports-only", action="store_true", help="只测量导入 gui.app 的耗时（无需图形界面）")
+    parser.add_argument("--output", help="把结果写入该 JSON 文件")
+    parser.add_argument("--budget", type=float, help="到窗口显示耗时中位数的上限（秒）")
+    args = parser.parse_args()
+
+    if args.imports_only:
+        command = [sys.executable, "-c", IMPORT_PROBE]
+    elif args.exe:
+        command = [os.path.abspath(args.exe)]
+    else:
+        command = [sys.executable, os.path.join(PROJECT_ROOT, "main.py")]
+
+    runs = []
+    for index in range(args.repeat):
+        result = run_once(command)
+        runs.append(result)
+        print(f"第 {index + 1} 次: 到窗口显示 {result['first_window_seconds'] * 1000:.0f} ms，"
+              f"含进程启动 {result['process_seconds'] * 1000:.0f} ms", file=sys.stderr)
+
+    deferred = sorted({name for run in runs for name in run["loaded_deferred_modules"]})
+    report = {
+        "mode": "imports" if args.imports_only else "window",
+        "command": command[0] if not args.imports_only else "import gui.app",
+        "platform": sys.platform,
+        "first_window_seconds": summarize([run["first_window_seconds"] for run in runs]),
+        "process_seconds": summarize([run["process_seconds"] for run in runs]),
+        "loaded_deferred_modules": deferred,
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    failed = False
+    if deferred:
+        print(f"启动时提前导入了转换模块: {', '.join(deferred)}", file=sys.stderr)
+        failed = True
+    if args.budget is not None and report["first_window_seconds"]["median"] > args.budget:
+        print(f"启动耗时超出预算: {report['first_window_seconds']['median']:.3f} 秒 > {args.budget} 秒", file=sys.stderr)
+        failed = True
+    return 1 if failed and args.budget is not None else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
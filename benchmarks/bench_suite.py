@@ -0,0 +1,190 @@
+"""
+转换基准测试套件：在确定性的PDF语料上，按不同 DPI/尺寸/质量/并行数组合运行完整的整理流程
+
+用法:
+    python benchmarks/bench_suite.py [--profile quick|full] [--dpi 150 300] [--size a4 none]
+                                     [--quality 80 95] [--workers 1 4] [--output 结果.json]
+                                     [--baseline 上次结果.json --tolerance 0.1]
+
+每个组合在独立的子进程中运行（与 bench_backends.py 相同，保证内存峰值互不影响），
+结果包括 页/秒、单页耗时 p50/p99 和内存峰值，以 JSON 输出。
+指定 --baseline 时与上次结果比较，任一组合的 页/秒 下降超过 tolerance 时以非零状态退出，便于发布前发现性能回退。
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from bench_backends import peak_rss_bytes
+from corpus import generate_corpus, PROFILES
+
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "pdf_organizer_bench_corpus")
+
+
+def percentile(values, fraction):
+    # 最近秩法；空列表返回 None
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class TimingSink:
+    def __init__(self):
+        """
+        记录每页完成时间的事件接收端：单页耗时 = 与同一文件上一页（或文件开始）之间的间隔
+        """
+        self.lock = threading.Lock()
+        self.last = {}
+        self.latencies = []
+        self.errors = []
+
+    def emit(self, kind, file=None, message=None, **data):
+        from core.events import FILE_STARTED, PAGE_DONE, ERROR
+        now = time.perf_counter()
+        file = data.get("source") or file
+        with self.lock:
+            if kind == FILE_STARTED:
+                self.last[file] = now
+            elif kind == PAGE_DONE:
+                self.latencies.append(now - self.last.get(file, now))
+                self.last[file] = now
+            elif kind == ERROR:
+                self.errors.append(message)
+
+
+def parse_size(value):
+    if value == "none":
+        return None
+    if value == "a4":
+        from config import A4_SIZE
+        return A4_SIZE
+    width, _, height = value.partition("x")
+    return (int(width), int(height)) if height else int(width)
+
+
+def run_worker(config, corpus_dir):
+    # 子进程：把语料复制到临时目录，用给定参数完整整理一遍，并以 JSON 输出结果
+    from core.batch import BatchEngine
+    from utils import get_poppler_path
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        pdf_files = []
+        for name in sorted(os.listdir(corpus_dir)):
+            if name.lower().endswith(".pdf"):
+                shutil.copy2(os.path.join(corpus_dir, name), work_dir)
+                pdf_files.append(os.path.join(work_dir, name))
+
+        sink = TimingSink()
+        engine = BatchEngine(poppler_path=get_poppler_path(), max_workers=config["workers"],
+                             backend=config["backend"], events=sink, dpi=config["dpi"],
+                             size=parse_size(config["size"]), quality=config["quality"])
+        start = time.perf_counter()
+        success_count, pages = engine.run(pdf_files, use_original_name=True, keep_source=False)
+        seconds = time.perf_counter() - start
+        output_bytes = sum(os.path.getsize(os.path.join(root, name))
+                           for root, _, names in os.walk(work_dir) for name in names)
+
+    own_rss, children_rss = peak_rss_bytes()
+    print(json.dumps(dict(config, **{
+        "files": len(pdf_files),
+        "succeeded": success_count,
+        "pages": pages,
+        "seconds": seconds,
+        "pages_per_second": pages / seconds if seconds else 0.0,
+        "page_latency_p50": percentile(sink.latencies, 0.50),
+        "page_latency_p99": percentile(sink.latencies, 0.99),
+        "output_bytes": output_bytes,
+        "peak_rss_bytes": own_rss,
+        "peak_children_rss_bytes": children_rss,
+        "errors": sink.errors,
+    })))
+
+
+def config_key(config):
+    return (config["backend"], config["dpi"], config["size"], config["quality"], config["workers"])
+
+
+def compare_baseline(results, baseline_path, tolerance):
+    """
+    与上次结果比较 页/秒
+    返回:
+        性能回退的描述列表
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {config_key(result): result for result in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get(config_key(result))
+        if previous and previous["pages_per_second"] and \
+                result["pages_per_second"] < previous["pages_per_second"] * (1 - tolerance):
+            regressions.append(f"{config_key(result)}: {previous['pages_per_second']:.2f} -> "
+                               f"{result['pages_per_second']:.2f} 页/秒")
+    return regressions
+
+
+def main():
+    from config import PDF_DPI, JPEG_QUALITY, RENDER_BACKEND
+
+    parser = argparse.ArgumentParser(description="在确定性PDF语料上测试整理流程的吞吐量、单页耗时与内存峰值")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick", help="语料规模")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="语料目录（不存在时自动生成）")
+    parser.add_argument("--backend", nargs="+", default=[RENDER_BACKEND], help="转换后端")
+    parser.add_argument("--dpi", nargs="+", type=int, default=[PDF_DPI], help="渲染DPI")
+    parser.add_argument("--size", nargs="+", default=["a4"], help="输出尺寸：a4、none（按DPI）、宽x高 或 长边像素")
+    parser.add_argument("--quality", nargs="+", type=int, default=[JPEG_QUALITY], help="JPEG质量")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, os.cpu_count() or 1], help="并行数")
+    parser.add_argument("--output", help="把结果写入该 JSON 文件")
+    parser.add_argument("--baseline", help="用于比较的上次结果 JSON 文件")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="允许的 页/秒 下降比例")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    corpus_dir = os.path.join(args.corpus, args.profile)
+    if args.worker:
+        run_worker(json.loads(args.worker), corpus_dir)
+        return 0
+
+    generate_corpus(corpus_dir, args.profile)
+    results = []
+    for backend, dpi, size, quality, workers in itertools.product(args.backend, args.dpi, args.size,
+                                                                  args.quality, sorted(set(args.workers))):
+        config = {"backend": backend, "dpi": dpi, "size": size, "quality": quality, "workers": workers}
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--profile", args.profile,
+                                    "--corpus", args.corpus, "--worker", json.dumps(config)],
+                                   capture_output=True, text=True, check=True)
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{backend:>6} dpi={dpi} size={size} quality={quality} workers={workers}: "
+              f"{result['pages']} 页, {result['pages_per_second']:.2f} 页/秒, "
+              f"p50 {(result['page_latency_p50'] or 0) * 1000:.0f} ms, p99 {(result['page_latency_p99'] or 0) * 1000:.0f} ms, "
+              f"内存峰值 {(result['peak_rss_bytes'] or 0) / 1024 / 1024:.1f} MB", file=sys.stderr)
+        for error in result["errors"]:
+            print(f"    {error}", file=sys.stderr)
+
+    report = {"profile": args.profile, "cpu_count": os.cpu_count(), "platform": sys.platform, "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        regressions = compare_baseline(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"性能回退: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+生成确定性的基准测试PDF语料（同样的参数每次生成的文件内容完全相同）
+
+用法:
+    python benchmarks/corpus.py 输出目录 [--profile quick|full]
+
+语料包括：
+    纯文本文档、图片密集文档（整页照片噪声图）、混合页面尺寸文档，页数从 1 到 1000 页不等
+不依赖 reportlab 等额外库：PDF 结构直接手写，图片页使用 Pillow 生成 JPEG 后以 DCTDecode 嵌入
+"""
+import argparse
+import io
+import os
+import random
+import sys
+
+from PIL import Image
+
+# 页面尺寸（单位：point，1/72 英寸）
+PAGE_SIZES = {
+    "a4": (595, 842),
+    "a4_landscape": (842, 595),
+    "letter": (612, 792),
+    "a3": (842, 1191),
+    "a5": (420, 595),
+}
+
+# 语料配置：(文件名, 类型, 页数, 随机种子)
+PROFILES = {
+    "quick": [
+        ("text_1.pdf", "text", 1, 1),
+        ("text_20.pdf", "text", 20, 2),
+        ("image_10.pdf", "image", 10, 3),
+        ("mixed_30.pdf", "mixed", 30, 4),
+    ],
+    "full": [
+        ("text_1.pdf", "text", 1, 1),
+        ("text_20.pdf", "text", 20, 2),
+        ("text_200.pdf", "text", 200, 5),
+        ("image_10.pdf", "image", 10, 3),
+        ("image_100.pdf", "image", 100, 6),
+        ("mixed_30.pdf", "mixed", 30, 4),
+        ("mixed_1000.pdf", "mixed", 1000, 7),
+    ],
+}
+
+_WORDS = ("pdf organizer benchmark page render poppler image quality folder sort rename preview "
+          "cache manifest shard worker convert jpeg size text layout column paragraph").split()
+
+
+class PdfWriter:
+    def __init__(self):
+        """
+        极简的PDF写入器：按顺序追加对象，最后写出交叉引用表
+        """
+        self.objects = []
+
+    def add(self, body):
+        self.objects.append(body if isinstance(body, bytes) else body.encode("latin-1"))
+        return len(self.objects)
+
+    def reserve(self):
+        self.objects.append(None)
+        return len(self.objects)
+
+    def set(self, number, body):
+        self.objects[number - 1] = body if isinstance(body, bytes) else body.encode("latin-1")
+
+    def add_stream(self, data, extra=""):
+        return self.add(f"<< /Length {len(data)} {extra}>>\nstream\n".encode("latin-1") + data + b"\nendstream")
+
+    def write(self, path, root):
+        output = io.BytesIO()
+        output.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(self.objects, 1):
+            offsets.append(output.tell())
+            output.write(f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n")
+        xref = output.tell()
+        output.write(f"xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+        for offset in offsets:
+            output.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+        output.write(f"trailer\n<< /Size {len(self.objects) + 1} /Root {root} 0 R >>\n"
+                     f"startxref\n{xref}\n%%EOF\n".encode("latin-1"))
+        with open(path, "wb") as f:
+            f.write(output.getvalue())
+
+
+def text_content(rng, page_number, width, height):
+    lines = ["BT", "/F1 18 Tf", f"50 {height - 60} Td", f"(Page {page_number}) Tj", "/F1 10 Tf", "0 -28 Td"]
+    for _ in range(int((height - 120) / 13)):
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, int(width / 45))))
+        lines.append(f"({words}) Tj")
+        lines.append("0 -13 Td")
+    lines.append("ET")
+    # 再画一些矢量图形，使页面不只有文字
+    for _ in range(8):
+        x, y = rng.randint(40, width - 140), rng.randint(40, height - 140)
+        lines.append(f"{rng.random():.3f} {rng.random():.3f} {rng.random():.3f} RG 2 w {x} {y} 100 80 re S")
+    return "\n".join(lines).encode("latin-1")
+
+
+def noise_jpeg(rng, width, height):
+    # 低分辨率噪声放大后类似照片纹理，JPEG 压缩率接近真实扫描件
+    small = Image.frombytes("RGB", (width // 8, height // 8), rng.randbytes(width // 8 * height // 8 * 3))
+    image = small.resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    return image.size, buffer.getvalue()
+
+
+def build_pdf(path, kind, pages, seed):
+    """
+    生成一个确定性的PDF
+    参数:
+        path: 输出路径
+        kind: "text"（纯文本）、"image"（每页一张整页图片）或 "mixed"（文本/图片交替，页面尺寸不一）
+        pages: 页数
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    writer = PdfWriter()
+    catalog = writer.reserve()
+    page_tree = writer.reserve()
+    font = writer.add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    size_names = list(PAGE_SIZES)
+    page_refs = []
+    for page_number in range(1, pages + 1):
+        if kind == "mixed":
+            width, height = PAGE_SIZES[size_names[page_number % len(size_names)]]
+            with_image = page_number % 3 == 0
+        else:
+            width, height = PAGE_SIZES["a4"]
+            with_image = kind == "image"
+
+        resources = f"/Font << /F1 {font} 0 R >>"
+        content = text_content(rng, page_number, width, height) if kind != "image" else b""
+        if with_image:
+            (image_width, image_height), data = noise_jpeg(rng, 800, int(800 * height / width))
+            image = writer.add_stream(data, f"/Type /XObject /Subtype /Image /Width {image_width} "
+                                            f"/Height {image_height} /ColorSpace /DeviceRGB "
+                                            f"/BitsPerComponent 8 /Filter /DCTDecode ")
+            resources += f" /XObject << /Im1 {image} 0 R >>"
+            if kind == "image":
+                content = f"q {width} 0 0 {height} 0 0 cm /Im1 Do Q".encode("latin-1")
+            else:
+                content += f"\nq {width // 2} 0 0 {height // 3} {width // 4} {height // 3} cm /Im1 Do Q".encode("latin-1")
+        contents = writer.add_stream(content)
+        page_refs.append(writer.add(f"<< /Type /Page /Parent {page_tree} 0 R /MediaBox [0 0 {width} {height}] "
+                                    f"/Resources << {resources} >> /Contents {contents} 0 R >>"))
+
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs)
+    writer.set(page_tree, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_refs)} >>")
+    writer.set(catalog, f"<< /Type /Catalog /Pages {page_tree} 0 R >>")
+    writer.write(path, catalog)
+
+
+def generate_corpus(directory, profile="quick"):
+    """
+    生成语料；已存在的文件直接复用（内容由种子决定，无需重新生成）
+    返回:
+        [(PDF路径, 类型, 页数), ...]
+    """
+    os.makedirs(directory, exist_ok=True)
+    corpus = []
+    for file_name, kind, pages, seed in PROFILES[profile]:
+        path = os.path.join(directory, file_name)
+        if not os.path.exists(path):
+            build_pdf(path, kind, pages, seed)
+        corpus.append((path, kind, pages))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成确定性的基准测试PDF语料")
+    parser.add_argument("directory", help="输出目录")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick", help="语料规模")
+    args = parser.parse_args()
+    for path, kind, pages in generate_corpus(args.directory, args.profile):
+        print(f"{os.path.basename(path)}: {kind}, {pages} 页, {os.path.getsize(path) / 1024:.0f} KB", file=sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+PDF 文件整理工具的命令行入口（无界面，不导入 tkinter/ttkbootstrap）
+
+用法:
+    python cli.py convert 文件或目录 [...] [--workers N] [--dpi 300] [--quality 95]
+    python cli.py watch 目录 [--interval 2] [--settle 5] [--workers N]
+    python cli.py calibrate 文件或目录 [...] [--sample-pages 6]
+    python cli.py coordinate 文件或目录 [...] --queue 共享目录 [--root 共享根目录] [--pages-per-job 50]
+    python cli.py worker --queue 共享目录 [--root 共享根目录] [--id 名称] [--idle-exit 秒数]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from core.batch import BatchEngine
+from core.events import ConsoleEventSink
+from core.settings import load_settings, SETTINGS_FILE
+from core.logs import setup_logging_from_settings, default_log_path, LOG_LEVELS
+from core.render_cache import create_render_cache
+from core.pdf_index import create_pdf_index
+from core.memory import create_memory_budget
+from core.dedup import create_deduplicator
+from core.metrics import create_metrics
+from core.adaptive import create_adaptive_policy
+from core.encoder import create_encode_options, OUTPUT_FORMATS
+from core.archive import resolve_archive_mode, ARCHIVE_MODES
+from core.watcher import collect_pdfs, next_folder_index, FolderWatcher
+from config import (CALIBRATION_SAMPLE_PAGES, QUEUE_PAGES_PER_JOB, QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS,
+                    ENCODER_WORKERS)
+from utils import get_poppler_path
+
+
+def build_engine(args, settings, engine_class=BatchEngine, **extra):
+    poppler_path = get_poppler_path()
+    if poppler_path is None:
+        logging.warning("未找到 Poppler 的 bin 目录，将尝试使用系统 PATH")
+    return engine_class(poppler_path=poppler_path,
+                        max_workers=args.workers if args.workers else settings.get("max_workers"),
+                        backend=settings.get("render_backend"),
+                        dpi=args.dpi or settings.get("pdf_dpi"),
+                        quality=args.quality or settings.get("jpeg_quality"),
+                        render_cache=create_render_cache(settings),
+                        pdf_index=create_pdf_index(settings),
+                        rasterizers=settings.get("rasterizers"),
+                        memory=create_memory_budget(settings),
+                        dedup=create_deduplicator(settings),
+                        metrics=create_metrics(settings),
+                        adaptive=create_adaptive_policy(settings),
+                        encode=create_encode_options(settings),
+                        encoder_workers=settings.get("encoder_workers") or ENCODER_WORKERS,
+                        archive_mode=resolve_archive_mode(settings),
+                        events=ConsoleEventSink(verbose=args.verbose),
+                        **extra)
+
+
+def run_batch(engine, settings, pdf_files, start_index=1):
+    success_count, total_images = engine.run(pdf_files,
+                                             use_original_name=settings.get("use_original_name"),
+                                             keep_source=settings.get("keep_source_pdf"),
+                                             start_index=start_index)
+    logging.info(f"处理完成！成功整理 {success_count}/{len(pdf_files)} 个 PDF 文件，生成 {total_images} 张图片")
+    if settings.get("metrics_dir"):
+        engine.metrics.export(settings["metrics_dir"])
+    return success_count == len(pdf_files)
+
+
+def command_convert(args, settings):
+    pdf_files = collect_pdfs(args.paths, recursive=args.recursive)
+    if not pdf_files:
+        print("警告: 未找到任何 PDF 文件！", file=sys.stderr)
+        return 1
+    engine = build_engine(args, settings)
+    return 0 if run_batch(engine, settings, pdf_files) else 1
+
+
+def command_watch(args, settings):
+    directory = os.path.abspath(args.directory)
+    if not os.path.isdir(directory):
+        print(f"目录不存在: {directory}", file=sys.stderr)
+        return 1
+    engine = build_engine(args, settings)
+    watcher = FolderWatcher(directory, settle_seconds=args.settle)
+    if args.ignore_existing:
+        watcher.prime()
+    print(f"正在监视: {directory}（Ctrl+C 退出）")
+    logging.info(f"开始监视目录: {directory}")
+    try:
+        while True:
+            ready = watcher.poll()
+            if ready:
+                run_batch(engine, settings, ready, start_index=next_folder_index(directory))
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        logging.info("停止监视目录")
+    return 0
+
+
+def command_calibrate(args, settings):
+    from core.calibration import calibrate, save_calibration
+    pdf_files = collect_pdfs(args.paths, recursive=args.recursive)
+    if not pdf_files:
+        print("警告: 未找到任何 PDF 文件！", file=sys.stderr)
+        return 1
+    poppler_path = get_poppler_path()
+    choices, results = calibrate(pdf_files, poppler_path,
+                                 dpi=args.dpi or settings.get("pdf_dpi"),
+                                 quality=args.quality or settings.get("jpeg_quality"),
+                                 encode=create_encode_options(settings), sample_pages=args.sample_pages,
+                                 progress=print)
+    if not choices:
+        print("没有可用的校准结果，设置未修改", file=sys.stderr)
+        return 1
+    for doc_class, timings in results.items():
+        ranking = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in sorted(timings.items(),
+                                                                                        key=lambda item: item[1]))
+        print(f"{doc_class}: {ranking}")
+    save_calibration(choices, results, args.settings)
+    print(f"已保存到 {args.settings}: " + ", ".join(f"{doc_class} -> {name}" for doc_class, name in choices.items()))
+    return 0
+
+
+def command_coordinate(args, settings):
+    from core.distributed import CoordinatorEngine
+    from core.job_queue import DirectoryQueue
+    pdf_files = collect_pdfs(args.paths, recursive=args.recursive)
+    if not pdf_files:
+        print("警告: 未找到任何 PDF 文件！", file=sys.stderr)
+        return 1
+    queue = DirectoryQueue(args.queue, max_attempts=args.max_attempts)
+    engine = build_engine(args, settings, engine_class=CoordinatorEngine, queue=queue, root=args.root,
+                          pages_per_job=args.pages_per_job)
+    print(f"任务队列: {os.path.abspath(args.queue)}（用 worker 子命令启动渲染进程）")
+    return 0 if run_batch(engine, settings, pdf_files) else 1
+
+
+def command_worker(args, settings):
+    from core.distributed import QueueWorker
+    from core.job_queue import DirectoryQueue
+    queue = DirectoryQueue(args.queue, lease_seconds=args.lease, max_attempts=args.max_attempts)
+    worker = QueueWorker(queue, poppler_path=get_poppler_path(), root=args.root, worker_id=args.id,
+                         encoder_workers=settings.get("encoder_workers") or ENCODER_WORKERS)
+    try:
+        worker.run(idle_exit=args.idle_exit)
+    except KeyboardInterrupt:
+        logging.info("worker 已停止")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PDF 文件整理工具（命令行模式）")
+    parser.add_argument("--settings", default=SETTINGS_FILE, help="设置文件路径")
+    parser.add_argument("--workers", type=int, help="并行处理的 PDF 数量（默认使用设置或CPU核心数）")
+    parser.add_argument("--dpi", type=int, help="渲染 DPI（默认使用设置）")
+    parser.add_argument("--quality", type=int, help="JPEG 质量（默认使用设置）")
+    parser.add_argument("--format", choices=sorted(OUTPUT_FORMATS), help="输出图片格式（默认使用设置）")
+    parser.add_argument("--archive", choices=sorted(ARCHIVE_MODES),
+                        help="输出方式：none 每页一个图片文件，zip/tiff 每个 PDF 一个归档文件（默认使用设置）")
+    parser.add_argument("--verbose", action="store_true", help="输出每一页的生成信息")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, help="日志级别（DEBUG 时日志中记录每一页，默认使用设置）")
+    parser.add_argument("--log-json", action="store_true", help="日志文件使用 JSON lines 格式")
+    parser.add_argument("--adaptive", action="store_true", help="自适应渲染：纯文字页降低分辨率，无彩色内容的页面使用灰度")
+    parser.add_argument("--metrics-dir", help="每个批次结束后把分阶段耗时统计导出到该目录（JSON 和 Prometheus 文本）")
+    parser.add_argument("--profile", action="store_true", help="用 cProfile 剖析转换过程，结果随统计数据一起导出")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="转换并整理指定的 PDF 文件或目录")
+    convert_parser.add_argument("paths", nargs="+", help="PDF 文件或包含 PDF 的目录")
+    convert_parser.add_argument("--recursive", action="store_true", help="递归查找子目录中的 PDF")
+
+    watch_parser = subparsers.add_parser("watch", help="监视目录，自动整理新出现的 PDF")
+    watch_parser.add_argument("directory", help="要监视的目录")
+    watch_parser.add_argument("--interval", type=float, default=2.0, help="扫描间隔（秒）")
+    watch_parser.add_argument("--settle", type=float, default=5.0, help="文件大小保持不变多久才视为写入完成（秒）")
+    watch_parser.add_argument("--ignore-existing", action="store_true", help="忽略启动时目录中已有的 PDF")
+
+    calibrate_parser = subparsers.add_parser("calibrate", help="在本机文档上测试各转换后端，保存最快的选择")
+    calibrate_parser.add_argument("paths", nargs="+", help="样本 PDF 文件或目录（最好同时包含文字文档和扫描件）")
+    calibrate_parser.add_argument("--recursive", action="store_true", help="递归查找子目录中的 PDF")
+    calibrate_parser.add_argument("--sample-pages", type=int, default=CALIBRATION_SAMPLE_PAGES,
+                                  help="每个文档测试的页数")
+
+    coordinate_parser = subparsers.add_parser("coordinate", help="协调节点：把转换拆成任务放入共享目录队列，由 worker 渲染")
+    coordinate_parser.add_argument("paths", nargs="+", help="PDF 文件或包含 PDF 的目录")
+    coordinate_parser.add_argument("--recursive", action="store_true", help="递归查找子目录中的 PDF")
+    coordinate_parser.add_argument("--queue", required=True, help="任务队列目录（所有节点都能访问的共享目录）")
+    coordinate_parser.add_argument("--root", help="共享根目录，其下的路径以相对路径写入任务")
+    coordinate_parser.add_argument("--pages-per-job", type=int, default=QUEUE_PAGES_PER_JOB, help="每个任务的最多页数")
+    coordinate_parser.add_argument("--max-attempts", type=int, default=QUEUE_MAX_ATTEMPTS, help="每个任务最多尝试的次数")
+
+    worker_parser = subparsers.add_parser("worker", help="worker：从共享目录队列领取任务并渲染")
+    worker_parser.add_argument("--queue", required=True, help="任务队列目录")
+    worker_parser.add_argument("--root", help="本机上共享根目录的挂载点")
+    worker_parser.add_argument("--id", help="worker 名称（默认 主机名-进程号）")
+    worker_parser.add_argument("--lease", type=float, default=QUEUE_LEASE_SECONDS, help="租约时长（秒）")
+    worker_parser.add_argument("--max-attempts", type=int, default=QUEUE_MAX_ATTEMPTS, help="每个任务最多尝试的次数")
+    worker_parser.add_argument("--idle-exit", type=float, help="队列持续为空超过该秒数后退出（默认一直运行）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    settings = load_settings(args.settings)
+    if args.log_level:
+        settings["log_level"] = args.log_level
+    if args.log_json:
+        settings["log_json"] = True
+    if args.command == "worker" and not settings.get("log_file"):
+        # 同一台机器上的多个 worker 各写各的日志文件，避免多进程同时轮换同一个文件
+        settings["log_file"] = default_log_path(f"worker-{args.id or os.getpid()}.log")
+    setup_logging_from_settings(settings, console=True)
+    if args.metrics_dir:
+        settings["metrics_dir"] = args.metrics_dir
+    if args.profile:
+        settings["profile_mode"] = True
+    if args.adaptive:
+        settings["adaptive_render"] = True
+    if args.format:
+        settings["output_format"] = args.format
+    if args.archive:
+        settings["archive_mode"] = args.archive
+    commands = {"convert": command_convert, "watch": command_watch, "calibrate": command_calibrate,
+                "coordinate": command_coordinate, "worker": command_worker}
+    return commands[args.command](args, settings)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,16 +6,56 @@ DPI_BASE = 96.0
 # 窗口大小
 WINDOW_SIZES = {
     "main": "1000x800",        # 主窗口大小
-    "settings": "1000x400",    # 设置对话框大小
+    "settings": "1000x520",    # 设置对话框大小
     "sort_rename": "2000x1000",# 排序和重命名对话框大小
     "rename": "600x200",       # 重命名对话框大小
+    "jobs": "700x400",         # 任务列表对话框大小
 }
 
 # PDF转换设置
 A4_SIZE = (2480, 3508)         # A4尺寸（像素）
 PDF_DPI = 300                  # PDF转图片的DPI
-PREVIEW_DPI = 72               # 预览时的DPI
+PREVIEW_BASE_SIZE = 1200       # 预览基准图长边像素，画布视图由基准图缩放得到
+PREVIEW_CACHE_MB = 128         # 预览基准图缓存的内存预算（MB）
+THUMBNAIL_SIZE = 160           # 缩略图网格中缩略图的长边像素
+THUMBNAIL_CACHE_MB = 64        # 缩略图缓存的内存预算（MB）
+GRID_CELL_PADDING = 8          # 缩略图网格单元格内边距（像素）
+PREVIEW_WORKERS = 2            # 预览渲染线程数
+PREVIEW_PREFETCH_RADIUS = 3    # 预取选中项前后各多少项的缩略图
 JPEG_QUALITY = 95              # JPEG图片质量
+OUTPUT_FORMAT = "jpeg"         # 输出图片格式："jpeg"、"png" 或 "webp"（webp 只能由 PIL 编码）
+JPEG_OPTIMIZE = False          # JPEG 是否优化哈夫曼表（文件更小，编码稍慢）
+JPEG_PROGRESSIVE = False       # 是否输出渐进式 JPEG
+ENCODER_WORKERS = 2            # pil 后端的并行编码线程数（1 表示渲染后在同一线程内编码）
+ARCHIVE_MODE = "none"          # 输出方式："none"(每页一个图片文件)、"zip"(不压缩的ZIP) 或 "tiff"(多页TIFF)
+ARCHIVE_BUFFER_MB = 8          # 写入归档文件的缓冲区大小（MB），合并为大块顺序写入
+TIFF_COMPRESSION = "jpeg"      # 多页TIFF的压缩方式（Pillow 名称："jpeg"、"tiff_deflate"、"tiff_lzw"）
+DEDUP_LINK_MODE = "reflink"    # 重复内容的链接方式："reflink"(写时复制克隆，不支持时复制)、"copy" 或 "hardlink"(共享数据)
+ENCODE_QUEUE_DEPTH = 8         # 等待编码的页面数上限，渲染快于编码时在此阻塞，限制内存占用
+PAGE_BATCH_SIZE = 4            # 流式转换时每次渲染的页数（决定内存峰值）
+RENDER_BACKEND = "direct"      # 转换后端：core.rasterizer.RASTERIZERS 中的名称，或 "auto"(按校准结果和文档类型选择)
+CALIBRATION_SAMPLE_PAGES = 6   # 校准转换后端时每个样本文档渲染的页数
+CLASSIFY_SAMPLE_PAGES = 3      # 判断文档类型时提取文字的页数
+TEXT_CHARS_PER_PAGE = 200      # 平均每页可提取的字符数不少于该值时视为矢量文字文档，否则视为扫描件
+MAX_WORKERS = None             # 并行处理的PDF数量，None 表示使用CPU核心数
+SHARD_MIN_PAGES = 25           # 大文档分片并行渲染时每个分片的最少页数
+MEMORY_LIMIT_MB = 0            # 同时转换的文档预估内存总量上限（MB），0 表示按可用内存自动计算
+MEMORY_AVAILABLE_FRACTION = 0.6  # 自动计算时使用批次开始时可用内存的比例
+MEMORY_MIN_FREE_MB = 512       # 系统可用内存低于该值时暂缓开始新的文档
+MEMORY_POLL_SECONDS = 0.5      # 等待内存时重新检查可用内存的间隔（秒）
+QUEUE_PAGES_PER_JOB = 50       # 分布式模式下每个任务的最多页数
+QUEUE_LEASE_SECONDS = 120      # worker 领取任务的租约时长（秒），超时未续期的任务由其他 worker 重新领取
+QUEUE_MAX_ATTEMPTS = 3         # 每个任务最多尝试的次数（失败或租约过期都计一次）
+QUEUE_POLL_SECONDS = 1.0       # 协调节点检查结果、worker 检查新任务的间隔（秒）
+RENDER_CACHE_MAX_MB = 2048     # 磁盘渲染缓存容量上限（MB），超出后按最近使用时间淘汰
+PDF_INDEX_MAX_ENTRIES = 20000  # PDF元数据索引最多保留的文件数，超出后淘汰最久未使用的条目
+HASH_CACHE_ENTRIES = 10000     # 文件哈希在内存中最多缓存的条目数，超出后淘汰最久未使用的条目
+ADAPTIVE_PROBE_SIZE = 200      # 自适应渲染时探测图的长边像素（用于判断页面类型）
+ADAPTIVE_TEXT_DPI = 200        # 自适应渲染时文字页的DPI（输出尺寸按比例缩小）
+ADAPTIVE_TEXT_QUALITY = 85     # 自适应渲染时文字页的JPEG质量
+ADAPTIVE_COLOR_RATIO = 0.005   # 饱和像素占比超过该值视为彩色页
+ADAPTIVE_PHOTO_RATIO = 0.35    # 非白色背景像素占比超过该值视为图片页
+ADAPTIVE_SAMPLE_EVERY = 50     # 每隔多少个降级页额外按完整参数渲染一页，用于估算节省量
 
 # 其他设置
 PREVIEW_TEXT = "选择文件以预览"   # 预览画布默认文本
@@ -24,4 +64,10 @@ PREVIEW_ERROR_COLOR = "red"    # 预览错误文本颜色
 LISTBOX_WIDTH = 80             # 列表框宽度
 LISTBOX_HEIGHT = 15            # 列表框高度
 LISTBOX_SELECT_BG = "green"    # 列表框选中背景色
-LISTBOX_SELECT_FG = "black"    # 列表框选中前景色
\ No newline at end of file
+LISTBOX_SELECT_FG = "black"    # 列表框选中前景色
+LOG_MAX_LINES = 1000           # 主窗口日志最多保留的行数（超出后丢弃最早的行）
+ERROR_DIALOG_MAX_LINES = 20    # 批次结束时错误汇总对话框最多列出的文件数
+LOG_FILE_NAME = "pdf_organizer.log"  # 日志文件名（位于程序数据目录的 logs 子目录下）
+LOG_MAX_MB = 10                # 单个日志文件的大小上限（MB），超出后轮换
+LOG_BACKUP_COUNT = 3           # 保留的旧日志文件数
+UI_TICK_MS = 100               # 界面合并处理进度事件的间隔（毫秒）
\ No newline at end of file
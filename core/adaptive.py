@@ -0,0 +1,236 @@
+import os
+import time
+import logging
+import tempfile
+import threading
+from collections import namedtuple
+from config import (ADAPTIVE_PROBE_SIZE, ADAPTIVE_TEXT_DPI, ADAPTIVE_TEXT_QUALITY, ADAPTIVE_COLOR_RATIO,
+                    ADAPTIVE_PHOTO_RATIO, ADAPTIVE_SAMPLE_EVERY)
+from core.metrics import timed
+from core.converter import render_images
+
+# color: 是否含有彩色内容；photo: 是否为图片/照片为主的页面
+PageProfile = namedtuple("PageProfile", ["color", "photo"])
+
+# 探测图中饱和度高于该值的像素视为彩色，灰度低于该值的像素视为非背景
+_SATURATION_LEVEL = 48
+_BACKGROUND_LEVEL = 230
+
+
+def classify_page(image, color_ratio=ADAPTIVE_COLOR_RATIO, photo_ratio=ADAPTIVE_PHOTO_RATIO):
+    """
+    根据低分辨率探测图判断页面类型
+    参数:
+        image: 探测图（PIL Image）
+        color_ratio: 饱和像素占比阈值
+        photo_ratio: 非白色背景像素占比阈值（文字页大部分是白色背景）
+    返回:
+        PageProfile
+    """
+    rgb = image.convert("RGB")
+    pixel_count = rgb.width * rgb.height or 1
+    saturated = sum(rgb.convert("HSV").getchannel("S").histogram()[_SATURATION_LEVEL:])
+    inked = sum(rgb.convert("L").histogram()[:_BACKGROUND_LEVEL])
+    return PageProfile(color=saturated / pixel_count > color_ratio, photo=inked / pixel_count > photo_ratio)
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class AdaptivePolicy:
+    def __init__(self, text_dpi=ADAPTIVE_TEXT_DPI, text_quality=ADAPTIVE_TEXT_QUALITY, probe_size=ADAPTIVE_PROBE_SIZE,
+                 color_ratio=ADAPTIVE_COLOR_RATIO, photo_ratio=ADAPTIVE_PHOTO_RATIO,
+                 sample_every=ADAPTIVE_SAMPLE_EVERY):
+        """
+        自适应渲染策略：每个渲染窗口先渲染低分辨率探测图，按页面类型逐页选择参数
+            文字页：DPI 和输出尺寸按 text_dpi 等比缩小，JPEG 质量不超过 text_quality
+            图片页：保持设置中的 DPI、尺寸和质量
+            无彩色内容的页面一律以灰度渲染
+        节省量的估算：每隔 sample_every 个降级页，额外把一页按完整参数和降级参数各渲染一次，
+        用两者的文件大小和耗时之比推算整个批次节省的字节数和时间
+        参数:
+            text_dpi: 文字页的DPI上限
+            text_quality: 文字页的JPEG质量上限
+            probe_size: 探测图长边像素
+            color_ratio: 彩色判断阈值
+            photo_ratio: 图片页判断阈值
+            sample_every: 采样间隔（页）
+        """
+        self.text_dpi = text_dpi
+        self.text_quality = text_quality
+        self.probe_size = probe_size
+        self.color_ratio = color_ratio
+        self.photo_ratio = photo_ratio
+        self.sample_every = sample_every
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def key(self):
+        # 影响输出的参数，写入转换清单和渲染缓存键
+        return {"text_dpi": self.text_dpi, "text_quality": self.text_quality, "probe_size": self.probe_size,
+                "color_ratio": self.color_ratio, "photo_ratio": self.photo_ratio}
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"pages": 0, "adapted_pages": 0, "grayscale_pages": 0, "reduced_pages": 0,
+                          "adapted_bytes": 0, "adapted_seconds": 0.0,
+                          "sample_full_bytes": 0, "sample_adapted_bytes": 0,
+                          "sample_full_seconds": 0.0, "sample_adapted_seconds": 0.0,
+                          "probe_seconds": 0.0, "sample_seconds": 0.0}
+            self._since_sample = None
+
+    def params_for(self, profile, dpi, size, quality):
+        """
+        按页面类型选择渲染参数
+        返回:
+            (dpi, size, quality, grayscale)
+        """
+        grayscale = not profile.color
+        if profile.photo or dpi <= self.text_dpi:
+            return dpi, size, quality, grayscale
+        scale = self.text_dpi / dpi
+        if isinstance(size, (tuple, list)):
+            size = tuple(int(value * scale) if value else value for value in size)
+        elif size:
+            size = int(size * scale)
+        return self.text_dpi, size, min(quality, self.text_quality), grayscale
+
+    def probe(self, pdf_path, first_page, last_page, poppler_path=None, control=None):
+        # 探测进程同样登记到 control 中，任务取消时立即结束
+        images = render_images(pdf_path, first_page, last_page, poppler_path, size=self.probe_size, control=control)
+        try:
+            return [classify_page(image, self.color_ratio, self.photo_ratio) for image in images]
+        finally:
+            for image in images:
+                image.close()
+
+    def wrap(self, render_window):
+        """
+        把普通的窗口渲染函数包装为自适应渲染：探测窗口内各页，按参数相同的连续页分段渲染
+        """
+        def render_adaptive(pdf_path, output_dir, first_page, last_page, naming, poppler_path, dpi, size, quality,
+                            control=None, metrics=None):
+            if control:
+                control.checkpoint()
+            start = time.perf_counter()
+            with timed(metrics, "probe", pdf_path):
+                profiles = self.probe(pdf_path, first_page, last_page, poppler_path, control)
+            with self.lock:
+                self.stats["probe_seconds"] += time.perf_counter() - start
+
+            runs = []
+            for page, profile in zip(range(first_page, last_page + 1), profiles):
+                params = self.params_for(profile, dpi, size, quality)
+                if runs and runs[-1][2] == params and runs[-1][1] == page - 1:
+                    runs[-1][1] = page
+                else:
+                    runs.append([page, page, params])
+
+            for run_first, run_last, params in runs:
+                start = time.perf_counter()
+                results = list(render_window(pdf_path, output_dir, run_first, run_last, naming, poppler_path,
+                                             *params[:3], control, metrics, grayscale=params[3]))
+                seconds = time.perf_counter() - start
+                adapted = params != (dpi, size, quality, False)
+                self.record(results, params, dpi, seconds, adapted)
+                if adapted and self.should_sample(len(results)):
+                    self.sample(render_window, pdf_path, run_first, naming, poppler_path, dpi, size, quality,
+                                params, metrics)
+                yield from results
+
+        return render_adaptive
+
+    def record(self, results, params, dpi, seconds, adapted):
+        with self.lock:
+            self.stats["pages"] += len(results)
+            if not adapted:
+                return
+            self.stats["adapted_pages"] += len(results)
+            self.stats["adapted_seconds"] += seconds
+            self.stats["adapted_bytes"] += sum(_file_size(image_path) for _, image_path, _ in results)
+            if params[3]:
+                self.stats["grayscale_pages"] += len(results)
+            if params[0] < dpi:
+                self.stats["reduced_pages"] += len(results)
+
+    def should_sample(self, page_count):
+        with self.lock:
+            if self._since_sample is None or self._since_sample >= self.sample_every:
+                self._since_sample = 0
+                return True
+            self._since_sample += page_count
+            return False
+
+    def sample(self, render_window, pdf_path, page, naming, poppler_path, dpi, size, quality, params, metrics):
+        # 在临时目录中把同一页按完整参数和降级参数各渲染一次，记录文件大小和耗时
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                measured = {}
+                for label, (sample_dpi, sample_size, sample_quality, grayscale) in (
+                        ("full", (dpi, size, quality, False)), ("adapted", params)):
+                    output_dir = os.path.join(temp_dir, label)
+                    os.makedirs(output_dir)
+                    start = time.perf_counter()
+                    results = list(render_window(pdf_path, output_dir, page, page, naming, poppler_path,
+                                                 sample_dpi, sample_size, sample_quality, None, None,
+                                                 grayscale=grayscale))
+                    measured[label] = (sum(_file_size(image_path) for _, image_path, _ in results),
+                                       time.perf_counter() - start)
+            with self.lock:
+                self.stats["sample_full_bytes"] += measured["full"][0]
+                self.stats["sample_full_seconds"] += measured["full"][1]
+                self.stats["sample_adapted_bytes"] += measured["adapted"][0]
+                self.stats["sample_adapted_seconds"] += measured["adapted"][1]
+                self.stats["sample_seconds"] += measured["full"][1] + measured["adapted"][1]
+            if metrics:
+                metrics.record("adaptive_sample", measured["full"][1] + measured["adapted"][1], pdf_path)
+        except Exception as e:
+            logging.warning(f"自适应渲染采样失败: {str(e)}")
+
+    def savings(self):
+        """
+        估算本批次节省的字节数和渲染时间；节省的时间扣除探测和采样本身的耗时，可能为负数
+        返回:
+            统计字典（含 saved_bytes、saved_seconds，未采样时为 None）
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        stats["saved_bytes"] = stats["saved_seconds"] = None
+        if stats["sample_adapted_bytes"] and stats["sample_adapted_seconds"]:
+            byte_ratio = stats["sample_full_bytes"] / stats["sample_adapted_bytes"]
+            time_ratio = stats["sample_full_seconds"] / stats["sample_adapted_seconds"]
+            stats["saved_bytes"] = int(stats["adapted_bytes"] * (byte_ratio - 1))
+            stats["saved_seconds"] = (stats["adapted_seconds"] * (time_ratio - 1)
+                                      - stats["probe_seconds"] - stats["sample_seconds"])
+        return stats
+
+    def format_savings(self):
+        stats = self.savings()
+        text = (f"自适应渲染: {stats['adapted_pages']}/{stats['pages']} 页降级"
+                f"（灰度 {stats['grayscale_pages']} 页，降低分辨率 {stats['reduced_pages']} 页）")
+        if stats["saved_bytes"] is not None:
+            text += f"，估计节省 {stats['saved_bytes'] / 1024 / 1024:.1f} MB"
+            overhead = f"探测 {stats['probe_seconds']:.1f} 秒、采样 {stats['sample_seconds']:.1f} 秒"
+            if stats["saved_seconds"] >= 0:
+                text += f"、{stats['saved_seconds']:.1f} 秒渲染时间（已扣除{overhead}）"
+            else:
+                text += f"，但渲染时间增加 {-stats['saved_seconds']:.1f} 秒（{overhead}的开销大于节省）"
+        return text
+
+
+def create_adaptive_policy(settings):
+    """
+    按设置创建自适应渲染策略
+    参数:
+        settings: 设置字典（adaptive_render 开关，adaptive_text_dpi 和 adaptive_text_quality 上限）
+    返回:
+        AdaptivePolicy，未开启时返回 None
+    """
+    if not settings.get("adaptive_render", False):
+        return None
+    return AdaptivePolicy(text_dpi=settings.get("adaptive_text_dpi", ADAPTIVE_TEXT_DPI),
+                          text_quality=settings.get("adaptive_text_quality", ADAPTIVE_TEXT_QUALITY))
@@ -0,0 +1,176 @@
+import os
+import zipfile
+import logging
+from abc import ABC, abstractmethod
+from PIL import Image, TiffImagePlugin
+from config import ARCHIVE_MODE, ARCHIVE_BUFFER_MB, TIFF_COMPRESSION
+
+# 输出方式 -> 归档文件扩展名（"none" 表示每页一个图片文件）
+ARCHIVE_MODES = {
+    "none": None,
+    "zip": ".zip",
+    "tiff": ".tif",
+}
+
+
+class ArchiveWriter(ABC):
+    def __init__(self, archive_path, page_count):
+        """
+        把一个文档的所有页按页码顺序追加写入单个归档文件
+        单页图片由调用方渲染到本机临时目录；页面可能乱序完成（分片并行、多线程编码），
+        未轮到的页先留在临时目录中等待，内存中只保存文件路径
+        先写入 .part 临时文件，全部写完后再原子替换为最终文件名
+        参数:
+            archive_path: 归档文件路径
+            page_count: 总页数
+        """
+        self.archive_path = archive_path
+        self.temp_path = archive_path + ".part"
+        self.page_count = page_count
+        self.next_page = 1
+        self.pending = {}        # 页码 -> 等待写入的图片路径
+        self.written = 0
+        # TIFF 写入器需要回读已写入的目录项，因此以读写方式打开
+        self.file = open(self.temp_path, "w+b", buffering=ARCHIVE_BUFFER_MB * 1024 * 1024)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+
+    def add(self, page, image_path):
+        """
+        加入一页；轮到该页时写入归档并删除图片文件
+        """
+        self.pending[page] = image_path
+        while self.next_page in self.pending:
+            path = self.pending[self.next_page]
+            self.write_page(self.next_page, path)
+            del self.pending[self.next_page]
+            os.remove(path)
+            self.written += 1
+            self.next_page += 1
+
+    @abstractmethod
+    def write_page(self, page, image_path):
+        """
+        把一页图片写入归档（由子类实现）
+        """
+
+    def finish(self):
+        """
+        写完所有页后关闭归档并替换为最终文件
+        返回:
+            归档文件路径
+        """
+        if self.pending or self.next_page <= self.page_count:
+            raise RuntimeError(f"归档缺少页面: 第 {self.next_page} 页尚未生成")
+        self.close_archive()
+        self.file.close()
+        os.replace(self.temp_path, self.archive_path)
+        return self.archive_path
+
+    def close_archive(self):
+        pass
+
+    def abort(self):
+        # 出错或取消时删除临时归档和尚未写入的图片
+        try:
+            self.file.close()
+        except OSError:
+            pass
+        for path in [self.temp_path] + list(self.pending.values()):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.pending.clear()
+
+
+class ZipArchiveWriter(ArchiveWriter):
+    def __init__(self, archive_path, page_count):
+        """
+        ZIP 归档：图片以存储方式写入（不再压缩），只是把多个文件顺序拼接到一个文件中
+        """
+        super().__init__(archive_path, page_count)
+        self.zip_file = zipfile.ZipFile(self.file, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+
+    def write_page(self, page, image_path):
+        self.zip_file.write(image_path, os.path.basename(image_path))
+
+    def close_archive(self):
+        self.zip_file.close()
+
+    def abort(self):
+        try:
+            self.zip_file.close()
+        except (OSError, ValueError):
+            pass
+        super().abort()
+
+
+class TiffArchiveWriter(ArchiveWriter):
+    def __init__(self, archive_path, page_count, quality=None, compression=TIFF_COMPRESSION):
+        """
+        多页 TIFF 归档：每页解码后作为新的一帧追加
+        参数:
+            quality: JPEG 压缩质量（compression 为 "jpeg" 时使用）
+            compression: TIFF 压缩方式（Pillow 名称，如 "jpeg"、"tiff_deflate"、"tiff_lzw"）
+        """
+        super().__init__(archive_path, page_count)
+        self.quality = quality
+        self.compression = compression
+        self.tiff = TiffImagePlugin.AppendingTiffWriter(self.file, new=True)
+
+    def write_page(self, page, image_path):
+        save_options = {"compression": self.compression}
+        if self.compression == "jpeg" and self.quality:
+            save_options["quality"] = self.quality
+        with Image.open(image_path) as image:
+            if image.mode not in ("1", "L", "RGB"):
+                image = image.convert("RGB")
+            image.save(self.tiff, format="TIFF", **save_options)
+        self.tiff.newFrame()
+
+    def close_archive(self):
+        self.tiff.finalize()
+
+
+def archive_path_for(folder_path, file_name, mode):
+    """
+    返回:
+        归档文件路径（{文件夹}/{文件名}.zip 或 .tif），mode 为 "none" 时返回 None
+    """
+    ext = ARCHIVE_MODES[mode]
+    return os.path.join(folder_path, file_name + ext) if ext else None
+
+
+def create_archive_writer(mode, archive_path, page_count, quality=None):
+    """
+    按输出方式创建归档写入器
+    参数:
+        mode: "zip" 或 "tiff"
+        archive_path: 归档文件路径
+        page_count: 总页数
+        quality: TIFF 的 JPEG 压缩质量
+    返回:
+        ArchiveWriter
+    """
+    if mode == "zip":
+        return ZipArchiveWriter(archive_path, page_count)
+    if mode == "tiff":
+        return TiffArchiveWriter(archive_path, page_count, quality=quality)
+    raise ValueError(f"未知的输出方式: {mode}")
+
+
+def resolve_archive_mode(settings):
+    """
+    从设置中读取输出方式，未知值按 "none" 处理
+    """
+    mode = settings.get("archive_mode", ARCHIVE_MODE) or "none"
+    if mode not in ARCHIVE_MODES:
+        logging.warning(f"未知的输出方式 {mode}，将输出单独的图片文件")
+        return "none"
+    return mode
@@ -0,0 +1,601 @@
+import os
+import shutil
+import logging
+import tempfile
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import (MAX_WORKERS, RENDER_BACKEND, PDF_DPI, A4_SIZE, JPEG_QUALITY, ENCODER_WORKERS, ARCHIVE_MODE,
+                    PAGE_BATCH_SIZE, ENCODE_QUEUE_DEPTH)
+from core.converter import convert_pdf_pages, get_page_count, build_image_path, effective_rasterizer, plan_shards
+from core.control import JobCancelled
+from core.metrics import Metrics, timed
+from core.encoder import DEFAULT_ENCODE
+from core.archive import archive_path_for, create_archive_writer
+from core.pdf_index import PdfIndex
+from core.dedup import RENDER_STAGES
+from core.memory import MemoryBudget, BYTES_PER_PIXEL, DEFAULT_PAGE_SIZE, MB, page_pixels, pages_in_flight
+from core.rasterizer import AUTO_BACKEND, resolve_backend
+from core.manifest import ConversionManifest, conversion_params
+from core.render_cache import RenderCache
+from core.events import (BATCH_STARTED, FILE_STARTED, PAGE_DONE, FILE_DONE, ERROR, LOG, BATCH_DONE,
+                         ConsoleEventSink)
+from utils import file_sha256
+
+
+def resolve_worker_count(max_workers=None):
+    """
+    解析并行工作线程数
+    参数:
+        max_workers: 配置的线程数（None 或小于1时使用CPU核心数）
+    返回:
+        实际使用的线程数
+    """
+    if not max_workers or int(max_workers) < 1:
+        return os.cpu_count() or 1
+    return int(max_workers)
+
+
+def split_pdf_info(pdf_info):
+    """
+    统一PDF条目格式
+    参数:
+        pdf_info: (文件名, 路径) 元组或文件路径
+    返回:
+        (文件名, 路径)
+    """
+    if isinstance(pdf_info, tuple):
+        return pdf_info
+    return os.path.basename(pdf_info), pdf_info
+
+
+def temp_folder_path(folder_path):
+    """
+    返回:
+        输出文件夹对应的临时文件夹（同一目录下的隐藏文件夹 .index.filename.part，保证可以原子重命名）
+    """
+    parent, name = os.path.split(folder_path)
+    return os.path.join(parent, f".{name}.part")
+
+
+def publish_folder(work_path, folder_path):
+    """
+    把转换完成的临时文件夹发布为输出文件夹
+    输出文件夹不存在时直接原子重命名；已存在时（例如参数变化后重新转换）逐个文件替换进去，保留其中的其他文件
+    """
+    try:
+        os.rename(work_path, folder_path)
+        return
+    except OSError:
+        if not os.path.isdir(folder_path):
+            raise
+    for entry in os.scandir(work_path):
+        os.replace(entry.path, os.path.join(folder_path, entry.name))
+    os.rmdir(work_path)
+
+
+class BatchEngine:
+    def __init__(self, poppler_path=None, max_workers=MAX_WORKERS, backend=RENDER_BACKEND, events=None,
+                 dpi=PDF_DPI, size=A4_SIZE, quality=JPEG_QUALITY, render_cache=None, control=None, metrics=None,
+                 adaptive=None, encode=DEFAULT_ENCODE, encoder_workers=ENCODER_WORKERS, archive_mode=ARCHIVE_MODE,
+                 pdf_index=None, rasterizers=None, memory=None, dedup=None):
+        """
+        批量整理引擎：多个PDF并行完成渲染、编码和输出文件夹的发布
+        渲染由 poppler 子进程完成、JPEG 编码时 PIL 会释放 GIL，因此使用线程池即可占满多核
+        参数:
+            poppler_path: Poppler的bin目录
+            max_workers: 并行处理的PDF数量（None 表示CPU核心数）
+            backend: 转换后端（"auto" 表示按 rasterizers 和文档类型选择）
+            events: 进度事件接收端（EventBus 或 ConsoleEventSink，见 core.events）
+            dpi: 渲染DPI
+            size: 输出尺寸（像素）
+            quality: JPEG/WebP 质量
+            render_cache: 渲染缓存（None 表示不使用）
+            control: 任务控制（JobControl），用于暂停/继续/取消（None 表示不可控制）
+            metrics: 分阶段耗时统计（None 时新建，多个引擎可共享同一个以累计）
+            adaptive: 自适应渲染策略（AdaptivePolicy，None 表示所有页使用相同参数）
+            encode: 编码选项（EncodeOptions：输出格式、JPEG 优化、渐进式）
+            encoder_workers: pil 后端每个文档的编码线程数
+            archive_mode: 输出方式（"none" 每页一个图片文件，"zip"/"tiff" 每个文档一个归档文件）
+            pdf_index: PDF元数据索引（PdfIndex，None 时新建只在内存中缓存的索引）
+            rasterizers: 本机校准结果（文档类型 -> 后端名称，见 core.calibration）
+            memory: 内存准入控制（MemoryBudget，None 时按可用内存自动计算上限）
+            dedup: 重复内容检测（Deduplicator，None 表示每个文件都单独渲染）
+        """
+        self.poppler_path = poppler_path
+        self.max_workers = resolve_worker_count(max_workers)
+        self.backend = backend
+        self.dpi = dpi
+        self.size = size
+        self.quality = quality
+        self.events = events or ConsoleEventSink()
+        self.render_cache = render_cache
+        self.control = control
+        self.metrics = metrics or Metrics()
+        self.adaptive = adaptive
+        self.encode = encode
+        self.encoder_workers = encoder_workers
+        self.archive_mode = archive_mode
+        self.pdf_index = pdf_index or PdfIndex(path="")
+        self.rasterizers = rasterizers or {}
+        self.memory = memory or MemoryBudget()
+        self.dedup = dedup
+        self.published = {}      # 本批次已完成的 路径 -> (输出文件夹, 文件名)，供内容相同的文件链接
+        self.link_sources = {}   # 重复文件的 路径 -> (已完成的输出文件夹, 文件名, 路径)
+        self.pdf_info = {}       # 本批次的 路径 -> PdfInfo
+
+    def page_count_of(self, pdf_info):
+        info = self.pdf_info.get(split_pdf_info(pdf_info)[1])
+        return info.page_count if info else 0
+
+    def backend_for(self, pdf_path):
+        """
+        返回:
+            该文档实际使用的后端名称（自动选择时按文档类型取校准结果）
+        """
+        info = self.pdf_info.get(pdf_path)
+        return resolve_backend(self.backend, self.rasterizers, info.doc_class if info else None)
+
+    def admit(self, pdf_path, original_name, backend, pages, shard_workers=1):
+        """
+        按最大页面的渲染尺寸预估本文档同时驻留内存的页面占用，等待内存准入；内存紧张时减少分片数
+        参数:
+            pdf_path: PDF文件路径
+            original_name: 原PDF文件名
+            backend: 实际使用的后端名称
+            pages: 待渲染的页数
+            shard_workers: 本批次分给单个文档的分片并行数
+        返回:
+            (分片并行数, 登记的字节数)
+        """
+        info = self.pdf_info.get(pdf_path)
+        page_sizes = info.page_sizes if info and info.page_sizes else [DEFAULT_PAGE_SIZE]
+        page_bytes = max(page_pixels(page_size, self.dpi, self.size) for page_size in page_sizes) * BYTES_PER_PIXEL
+        output = effective_rasterizer(backend, self.encode).output
+        in_flight = partial(pages_in_flight, output, batch_size=PAGE_BATCH_SIZE, encoder_workers=self.encoder_workers,
+                            queue_depth=ENCODE_QUEUE_DEPTH, adaptive=bool(self.adaptive))
+        shard_workers = max(1, min(shard_workers, len(plan_shards(pages, shard_workers))))
+        allowed = self.memory.shard_limit(page_bytes * in_flight(1), shard_workers)
+        if allowed < shard_workers:
+            logging.info(f"内存上限内只能并行 {allowed} 个分片: {original_name}")
+        with timed(self.metrics, "memory_wait", pdf_path):
+            reserved = self.memory.acquire(page_bytes * in_flight(allowed), self.control, original_name)
+        logging.debug(f"{original_name} 预估内存 {reserved // MB} MB（单页 {page_bytes // MB} MB）")
+        return allowed, reserved
+
+    def checkpoint(self):
+        if self.control:
+            self.control.checkpoint()
+
+    def page_cache_key(self, source_hash, page, backend=None):
+        # 默认参数不写入额外字段，保持与旧版本缓存键一致
+        extra = {}
+        if self.adaptive:
+            extra["adaptive"] = self.adaptive.key()
+        if not self.encode.is_default():
+            extra["encode"] = list(self.encode)
+        return RenderCache.make_key(source_hash, page, self.dpi, self.size, backend or self.backend,
+                                    quality=self.quality, **extra)
+
+    def restore_cached_pages(self, source_hash, output_dir, page_count, skip_pages, naming, manifest=None,
+                             backend=None):
+        """
+        从渲染缓存复制已有的页面到输出目录
+        返回:
+            从缓存复制的页码集合
+        """
+        restored = set()
+        for page in range(1, page_count + 1):
+            if page in skip_pages:
+                continue
+            self.checkpoint()
+            image_path = build_image_path(output_dir, page, *naming)
+            if self.render_cache.copy_to(self.page_cache_key(source_hash, page, backend), image_path, self.encode.ext):
+                restored.add(page)
+                if manifest:
+                    manifest.mark_page(page, image_path)
+        return restored
+
+    def pdf_to_jpg(self, pdf_path, output_dir, use_original_name=False, original_name=None, manifest=None,
+                   shard_workers=1):
+        """
+        把PDF转换为图片，跳过清单中已完成的页；归档模式下所有页按顺序写入一个归档文件
+        参数:
+            pdf_path: PDF文件路径
+            output_dir: 输出目录
+            use_original_name: 是否使用原文件名加页码后缀
+            original_name: 原PDF文件名
+            manifest: 转换清单（记录已写入的页，用于断点续转）
+            shard_workers: 单个文档的分片并行数（由 run() 按本批次的文件数计算）
+        返回:
+            本次生成的图片数
+        """
+        self.events.emit(LOG, original_name, f"正在转换: {os.path.basename(pdf_path)}")
+        logging.info(f"正在转换: {os.path.basename(pdf_path)}")
+        info = self.pdf_info.get(pdf_path)
+        if info:
+            page_count = info.page_count
+        else:
+            with timed(self.metrics, "pdfinfo", pdf_path):
+                page_count = get_page_count(pdf_path, self.poppler_path)
+        backend = self.backend_for(pdf_path)
+        skip_pages = manifest.completed_pages() if manifest else set()
+        link_source = self.link_sources.pop(pdf_path, None)
+        if link_source:
+            linked = self.link_duplicate(link_source, pdf_path, output_dir, page_count, skip_pages,
+                                         (use_original_name, original_name, self.encode.ext), manifest)
+            if linked is not None:
+                return linked
+        if self.archive_mode != "none":
+            # 未完成的归档无法断点续写，整个重新生成
+            skip_pages = set()
+        if skip_pages:
+            self.events.emit(LOG, original_name, f"从第 {min(set(range(1, page_count + 1)) - skip_pages, default=page_count)} 页继续转换"
+                        f"（已完成 {len(skip_pages)}/{page_count} 页）")
+
+        num_images = 0
+        source_hash = None
+        naming = (use_original_name, original_name, self.encode.ext)
+        # 先等待内存准入再创建归档文件，等待期间取消或出错时不会留下打开的 .part 文件
+        shard_workers, reserved = self.admit(pdf_path, original_name, backend, page_count - len(skip_pages),
+                                             shard_workers)
+        archive = None
+        render_dir = output_dir
+        try:
+            if self.archive_mode != "none":
+                archive_path = archive_path_for(output_dir, os.path.splitext(os.path.basename(pdf_path))[0],
+                                                self.archive_mode)
+                archive = create_archive_writer(self.archive_mode, archive_path, page_count, quality=self.quality)
+                # 单页图片渲染到本机临时目录，输出目录（网络共享、杀毒扫描的磁盘）中只写入归档文件
+                render_dir = tempfile.mkdtemp(prefix="pdf_organizer_pages_")
+            if self.render_cache:
+                source_hash = manifest.source_hash if manifest else file_sha256(pdf_path)
+                with timed(self.metrics, "cache_restore", pdf_path):
+                    restored = self.restore_cached_pages(source_hash, render_dir, page_count, skip_pages, naming,
+                                                         None if archive else manifest, backend)
+                if restored:
+                    self.events.emit(LOG, original_name, f"从渲染缓存复制 {len(restored)} 页: {os.path.basename(pdf_path)}")
+                    logging.info(f"从渲染缓存复制 {len(restored)} 页: {os.path.basename(pdf_path)}")
+                    skip_pages = skip_pages | restored
+                    num_images += len(restored)
+                    if archive:
+                        with timed(self.metrics, "archive", pdf_path):
+                            for page in sorted(restored):
+                                archive.add(page, build_image_path(render_dir, page, *naming))
+
+            for page, image_path, image_size in convert_pdf_pages(pdf_path, render_dir,
+                                                                  use_original_name=use_original_name,
+                                                                  original_name=original_name,
+                                                                  poppler_path=self.poppler_path, backend=backend,
+                                                                  dpi=self.dpi, size=self.size, quality=self.quality,
+                                                                  shard_workers=shard_workers,
+                                                                  page_count=page_count, skip_pages=skip_pages,
+                                                                  control=self.control, metrics=self.metrics,
+                                                                  adaptive=self.adaptive, encode=self.encode,
+                                                                  encoder_workers=self.encoder_workers):
+                num_images += 1
+                if manifest and not archive:
+                    manifest.mark_page(page, image_path)
+                if self.render_cache:
+                    with timed(self.metrics, "cache_store", pdf_path):
+                        self.render_cache.put_file(self.page_cache_key(source_hash, page, backend), image_path,
+                                                   self.encode.ext)
+                if self.dedup and self.dedup.pages and not archive:
+                    with timed(self.metrics, "dedup_page", pdf_path):
+                        self.dedup.link_page(image_path)
+                if archive:
+                    # 写入归档后图片文件即被删除，因此放在写入缓存之后
+                    with timed(self.metrics, "archive", pdf_path):
+                        archive.add(page, image_path)
+                self.events.emit(PAGE_DONE, original_name, f"已生成: {os.path.basename(image_path)}",
+                                 page=page, path=image_path, size=image_size, source=pdf_path)
+                logging.debug(f"已生成: {os.path.basename(image_path)}")
+            if archive:
+                with timed(self.metrics, "archive", pdf_path):
+                    archive.finish()
+                self.events.emit(LOG, original_name, f"已写入归档: {os.path.basename(archive.archive_path)}")
+                logging.info(f"已写入归档: {os.path.basename(archive.archive_path)}")
+        except Exception:
+            if archive:
+                archive.abort()
+            # 出错时也把已写入的页记入清单，重新运行时从断点继续
+            if manifest:
+                manifest.save()
+            raise
+        finally:
+            self.memory.release(reserved)
+            if render_dir != output_dir:
+                shutil.rmtree(render_dir, ignore_errors=True)
+
+        if manifest:
+            if archive:
+                for page in range(1, page_count + 1):
+                    manifest.pages[page] = os.path.basename(archive.archive_path)
+            manifest.mark_complete(page_count)
+        return num_images
+
+    def link_duplicate(self, source, pdf_path, output_dir, page_count, skip_pages, naming, manifest=None):
+        """
+        本批次中已有内容相同的文件完成转换时，把它的输出链接到本文件的输出目录，不再渲染
+        参数:
+            source: (已完成的输出文件夹, 文件名, 路径)
+            pdf_path: PDF文件路径
+            output_dir: 输出目录
+            page_count: 总页数
+            skip_pages: 已完成的页码集合
+            naming: (use_original_name, original_name, 扩展名)
+            manifest: 转换清单
+        返回:
+            链接的图片数；来源不完整或链接失败时返回 None（改为正常渲染）
+        """
+        source_folder, source_file, source_path = source
+        original_name = naming[1]
+        source_manifest = ConversionManifest.load(source_folder)
+        if not (source_manifest and source_manifest.is_complete() and source_manifest.page_count == page_count):
+            return None
+        linked = 0
+        saved_bytes = 0
+        try:
+            with timed(self.metrics, "link", pdf_path):
+                if self.archive_mode != "none":
+                    target = archive_path_for(output_dir, os.path.splitext(os.path.basename(pdf_path))[0],
+                                              self.archive_mode)
+                    saved_bytes += self.dedup.link(os.path.join(source_folder, source_manifest.pages[1]), target)
+                    if manifest:
+                        for page in range(1, page_count + 1):
+                            manifest.pages[page] = os.path.basename(target)
+                    linked = page_count
+                else:
+                    for page in range(1, page_count + 1):
+                        if page in skip_pages:
+                            continue
+                        self.checkpoint()
+                        target = build_image_path(output_dir, page, *naming)
+                        saved_bytes += self.dedup.link(os.path.join(source_folder, source_manifest.pages[page]),
+                                                       target)
+                        linked += 1
+                        if manifest:
+                            manifest.mark_page(page, target)
+                        self.events.emit(PAGE_DONE, original_name, f"已链接: {os.path.basename(target)}",
+                                         page=page, path=target, source=pdf_path)
+        except (OSError, KeyError) as e:
+            logging.warning(f"无法链接 {source_file} 的输出，改为重新渲染 {original_name}: {str(e)}")
+            return None
+
+        summary = self.metrics.file_summary(source_path)
+        self.dedup.record_document(linked, saved_bytes, sum(summary.get(stage, 0.0) for stage in RENDER_STAGES))
+        if manifest:
+            manifest.mark_complete(page_count)
+        self.events.emit(LOG, original_name, f"内容与 {source_file} 相同，已链接其输出（{linked} 页）")
+        logging.info(f"{original_name} 内容与 {source_file} 相同，已链接其输出（{linked} 页）")
+        return linked
+
+    def organize_one(self, index, pdf_info, use_original_name=False, keep_source=False, shard_workers=1):
+        """
+        整理单个PDF：直接从原位置渲染到同目录下的临时文件夹，完成后原子重命名为 index.filename
+        不复制或移动PDF；崩溃时只会留下隐藏的临时文件夹，不会出现写了一半的输出文件夹
+        临时文件夹或输出文件夹中的转换清单与源文件哈希和转换参数一致时，跳过已完成的PDF、从下一页继续未完成的PDF
+        参数:
+            index: 文件夹序号（来自用户排序）
+            pdf_info: (文件名, 路径) 元组或文件路径
+            use_original_name: 是否使用原文件名加页码后缀
+            keep_source: 是否保留源PDF
+            shard_workers: 单个文档的分片并行数
+        返回:
+            (是否成功, 生成的图片数)
+        """
+        pdf_file, pdf_path = split_pdf_info(pdf_info)
+        source_dir = os.path.dirname(pdf_path)
+        file_name = os.path.splitext(pdf_file)[0]
+        # 暂停时排队中的文件在这里等待，取消后不再开始
+        self.checkpoint()
+        info = self.pdf_info.get(pdf_path)
+        self.events.emit(FILE_STARTED, pdf_file, index=index, pages=info.page_count if info else None,
+                         source=pdf_path)
+
+        folder_name = f"{index}.{file_name}"
+        folder_path = os.path.join(source_dir, folder_name)
+        work_path = temp_folder_path(folder_path)
+        # 旧版本中断时PDF可能已被移动到目标文件夹中，先移回原位置（同一目录内重命名，不复制数据）
+        legacy_path = os.path.join(folder_path, pdf_file)
+        if not os.path.exists(pdf_path) and os.path.exists(legacy_path):
+            os.replace(legacy_path, pdf_path)
+
+        with timed(self.metrics, "hash", pdf_path):
+            source_hash = file_sha256(pdf_path)
+        params = conversion_params(self.dpi, self.size, self.quality, self.backend_for(pdf_path),
+                                   use_original_name, pdf_file,
+                                   adaptive=self.adaptive.key() if self.adaptive else None, encode=self.encode,
+                                   archive=self.archive_mode)
+        manifest = ConversionManifest.load(folder_path)
+        if manifest and manifest.matches(source_hash, params):
+            if manifest.is_complete():
+                self.events.emit(LOG, pdf_file, f"已跳过（内容和参数未变化）: {pdf_file} -> {folder_name}")
+                logging.info(f"已跳过（内容和参数未变化）: {pdf_file} -> {folder_name}")
+                self.published[pdf_path] = (folder_path, pdf_file)
+                if not keep_source:
+                    os.remove(pdf_path)
+                return True, 0
+            # 旧版本留下的未完成文件夹，在原处继续
+            work_path = folder_path
+        else:
+            manifest = ConversionManifest.load(work_path)
+            if not (manifest and manifest.matches(source_hash, params)):
+                manifest = ConversionManifest(work_path, source_hash, params)
+
+        work_created = not os.path.isdir(work_path)
+        os.makedirs(work_path, exist_ok=True)
+        if not work_created and work_path != folder_path:
+            self.events.emit(LOG, pdf_file, f"继续上次未完成的转换: {pdf_file} -> {folder_name}")
+
+        try:
+            num_images = self.pdf_to_jpg(pdf_path, work_path, use_original_name=use_original_name,
+                                         original_name=pdf_file, manifest=manifest, shard_workers=shard_workers)
+            if work_path != folder_path:
+                with timed(self.metrics, "publish", pdf_path):
+                    publish_folder(work_path, folder_path)
+                if self.dedup:
+                    self.dedup.relocate(work_path, folder_path)
+            self.published[pdf_path] = (folder_path, pdf_file)
+            self.events.emit(LOG, pdf_file, f"已整理: {pdf_file} -> {folder_name}")
+            logging.info(f"已整理: {pdf_file} -> {folder_name}")
+
+            if not keep_source:
+                with timed(self.metrics, "remove_pdf", pdf_path):
+                    os.remove(pdf_path)
+                self.events.emit(LOG, pdf_file, f"已删除源 PDF: {pdf_file}")
+                logging.info(f"已删除源 PDF: {pdf_file}")
+
+            return True, num_images
+        except JobCancelled:
+            self.discard_output(work_path, work_created)
+            self.events.emit(LOG, pdf_file, f"已取消: {pdf_file}")
+            logging.info(f"已取消: {pdf_file}")
+            raise
+        except Exception as e:
+            self.events.emit(ERROR, pdf_file, f"处理 {pdf_file} 失败: {str(e)}", error=e)
+            logging.error(f"处理 {pdf_file} 失败: {str(e)}")
+            return False, 0
+
+    def organize_duplicate(self, index, pdf_info, primary_future, primary_path, use_original_name=False,
+                           keep_source=False, shard_workers=1):
+        """
+        整理与本批次中另一个PDF内容相同的文件：等待那个文件完成后链接其输出
+        那个文件失败时按普通文件渲染
+        """
+        try:
+            primary_future.result()
+        except Exception:
+            pass
+        if primary_path in self.published:
+            self.link_sources[split_pdf_info(pdf_info)[1]] = self.published[primary_path] + (primary_path,)
+        return self.organize_profiled(index, pdf_info, use_original_name, keep_source, shard_workers)
+
+    def organize_profiled(self, index, pdf_info, use_original_name=False, keep_source=False, shard_workers=1):
+        # 剖析模式下由 cProfile 剖析单个文件的整理过程（分片线程不在剖析范围内）
+        with self.metrics.profiled():
+            return self.organize_one(index, pdf_info, use_original_name, keep_source, shard_workers)
+
+    def discard_output(self, work_path, work_created):
+        """
+        取消时清理写了一半的输出：本次新建的临时文件夹整个删除
+        之前已存在的临时文件夹保留清单和已完成的页，之后可以断点续转
+        """
+        if work_created:
+            shutil.rmtree(work_path, ignore_errors=True)
+            logging.info(f"已删除未完成的文件夹: {work_path}")
+
+    def run(self, pdf_files, use_original_name=False, keep_source=False, start_index=1):
+        """
+        并行整理一批PDF，文件夹序号保持传入顺序
+        先并行读取所有PDF的元数据（页数按内容哈希缓存），页数多的文件先开始，避免最后只剩一个大文件在单独运行
+        参数:
+            pdf_files: PDF条目列表（顺序即文件夹编号顺序）
+            use_original_name: 是否使用原文件名加页码后缀
+            keep_source: 是否保留源PDF
+            start_index: 第一个文件夹的序号
+        返回:
+            (成功整理的PDF数, 生成的图片总数)
+        """
+        total = len(pdf_files)
+        if total == 0:
+            self.events.emit(BATCH_STARTED, total=0, total_pages=0)
+            self.events.emit(BATCH_DONE, success=0, total=0, images=0)
+            return 0, 0
+
+        batch_token = self.metrics.begin_batch()
+        self.memory.reset()
+        with timed(self.metrics, "index"):
+            self.pdf_info = self.pdf_index.scan([split_pdf_info(pdf_info)[1] for pdf_info in pdf_files],
+                                                self.poppler_path, self.max_workers, self.control,
+                                                classify=self.backend == AUTO_BACKEND)
+        total_pages = sum(info.page_count for info in self.pdf_info.values())
+        self.events.emit(BATCH_STARTED, total=total, total_pages=total_pages)
+        encrypted = [os.path.basename(path) for path, info in self.pdf_info.items() if info.encrypted]
+        if encrypted:
+            self.events.emit(LOG, None, f"注意: {len(encrypted)} 个 PDF 已加密: {', '.join(encrypted)}")
+            logging.info(f"已加密的 PDF: {', '.join(encrypted)}")
+
+        success_count = 0
+        cancelled_count = 0
+        total_images = 0
+        workers = min(self.max_workers, total)
+        # 文件数少于核心数时，把剩余核心分给单个文档的页码分片（只属于本次运行，逐层传给 pdf_to_jpg）
+        shard_workers = max(1, self.max_workers // workers)
+        logging.info(f"批量整理 {total} 个 PDF 文件（共 {total_pages} 页），并行数: {workers}，"
+                     f"单文档分片并行数: {shard_workers}")
+        if self.adaptive:
+            self.adaptive.reset_stats()
+        if self.dedup:
+            self.dedup.reset_stats()
+        self.published.clear()
+        self.link_sources.clear()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-batch") as executor:
+            # 序号按传入顺序分配，提交顺序按页数从多到少（页数未知的文件排在最后）
+            jobs = sorted(enumerate(pdf_files, start_index), key=lambda job: -self.page_count_of(job[1]))
+            duplicates = self.dedup.plan(jobs, self.pdf_info) if self.dedup else {}
+            futures = {}
+            primary_futures = {}
+            for index, pdf_info in jobs:
+                if index not in duplicates:
+                    future = executor.submit(self.organize_profiled, index, pdf_info, use_original_name, keep_source,
+                                             shard_workers)
+                    futures[future] = pdf_info
+                    primary_futures[split_pdf_info(pdf_info)[1]] = future
+            # 重复文件排在所有需要渲染的文件之后提交，开始等待时它依赖的文件一定已经在运行
+            for index, pdf_info in jobs:
+                if index in duplicates:
+                    primary_path = duplicates[index]
+                    futures[executor.submit(self.organize_duplicate, index, pdf_info, primary_futures[primary_path],
+                                            primary_path, use_original_name, keep_source, shard_workers)] = pdf_info
+            if duplicates:
+                logging.info(f"发现 {len(duplicates)} 个内容重复的 PDF，将链接已渲染的输出")
+            for future in as_completed(futures):
+                pdf_file, pdf_path = split_pdf_info(futures[future])
+                try:
+                    success, num_images = future.result()
+                except JobCancelled:
+                    cancelled_count += 1
+                    continue
+                except Exception as e:
+                    self.events.emit(ERROR, pdf_file, f"处理 {pdf_file} 失败: {str(e)}", error=e)
+                    logging.error(f"处理 {pdf_file} 失败: {str(e)}")
+                    success, num_images = False, 0
+
+                if success:
+                    success_count += 1
+                total_images += num_images
+                self.metrics.count("files" if success else "files_failed")
+                self.metrics.count("pages", num_images)
+                file_stages = self.metrics.file_summary(pdf_path)
+                logging.info(f"{pdf_file} 耗时分布: {Metrics.format_stages(file_stages)}",
+                             extra={"data": {"event": "file_done", "file": pdf_file, "path": pdf_path,
+                                             "success": success, "images": num_images, "stages": file_stages}})
+                self.events.emit(FILE_DONE, pdf_file, success=success, images=num_images, source=pdf_path)
+
+        batch_summary = self.metrics.end_batch(batch_token)
+        stages_text = Metrics.format_stages(batch_summary["stages"])
+        self.events.emit(LOG, None, f"耗时 {batch_summary['wall_seconds']:.1f} 秒，各阶段: {stages_text}")
+        logging.info(f"批次耗时 {batch_summary['wall_seconds']:.1f} 秒，各阶段: {stages_text}")
+        if self.adaptive:
+            savings_text = self.adaptive.format_savings()
+            batch_summary["adaptive"] = self.adaptive.savings()
+            self.events.emit(LOG, None, savings_text)
+            logging.info(savings_text)
+        if self.dedup:
+            batch_summary["dedup"] = self.dedup.savings()
+            if batch_summary["dedup"]["documents"] or batch_summary["dedup"]["pages"]:
+                savings_text = self.dedup.format_savings()
+                self.events.emit(LOG, None, savings_text)
+                logging.info(savings_text)
+
+        if cancelled_count:
+            message = (f"已取消！成功整理 {success_count}/{total} 个 PDF 文件，生成 {total_images} 张图片，"
+                       f"{cancelled_count} 个文件未处理。")
+        else:
+            message = f"处理完成！成功整理 {success_count}/{total} 个 PDF 文件，生成 {total_images} 张图片。"
+        logging.info(message, extra={"data": dict(batch_summary, event="batch_done", success=success_count, total=total,
+                                                  images=total_images, cancelled=cancelled_count)})
+        self.events.emit(BATCH_DONE, None, message, success=success_count, total=total, images=total_images,
+                         cancelled=cancelled_count)
+        return success_count, total_images
@@ -0,0 +1,118 @@
+import time
+import shutil
+import logging
+import tempfile
+from config import PDF_DPI, A4_SIZE, JPEG_QUALITY, PREVIEW_BASE_SIZE, CALIBRATION_SAMPLE_PAGES
+from core.converter import convert_pdf_pages
+from core.encoder import DEFAULT_ENCODE
+from core.pdf_index import PdfIndex
+from core.rasterizer import AUTO_BACKEND, DOC_CLASSES, PREVIEW_CLASS, available_rasterizers, rasterize_image
+from core.settings import save_settings, SETTINGS_FILE
+
+
+def time_rasterizer(rasterizer, samples, poppler_path=None, dpi=PDF_DPI, size=A4_SIZE, quality=JPEG_QUALITY,
+                    encode=DEFAULT_ENCODE, sample_pages=CALIBRATION_SAMPLE_PAGES):
+    """
+    用一个后端把样本文档的前几页渲染到临时目录，测量平均每页耗时
+    参数:
+        rasterizer: Rasterizer
+        samples: (PDF路径, PdfInfo) 列表
+    返回:
+        平均每页秒数
+    """
+    output_dir = tempfile.mkdtemp(prefix="pdf_calibrate_")
+    pages = 0
+    try:
+        start = time.perf_counter()
+        for pdf_path, info in samples:
+            last_page = min(info.page_count, sample_pages)
+            for _ in convert_pdf_pages(pdf_path, output_dir, poppler_path=poppler_path, backend=rasterizer.name,
+                                       dpi=dpi, size=size, quality=quality, page_count=info.page_count,
+                                       skip_pages=set(range(last_page + 1, info.page_count + 1)), encode=encode):
+                pages += 1
+        seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    if pages == 0:
+        raise RuntimeError("样本文档没有可渲染的页面")
+    return seconds / pages
+
+
+def time_preview(rasterizer, samples, poppler_path=None):
+    """
+    测量预览（渲染第一页为 PIL 图像）的平均耗时
+    返回:
+        平均每页秒数
+    """
+    start = time.perf_counter()
+    for pdf_path, _ in samples:
+        rasterize_image(pdf_path, 1, PREVIEW_BASE_SIZE, poppler_path, backend=rasterizer.name).close()
+    return (time.perf_counter() - start) / len(samples)
+
+
+def calibrate(pdf_paths, poppler_path=None, dpi=PDF_DPI, size=A4_SIZE, quality=JPEG_QUALITY, encode=DEFAULT_ENCODE,
+              sample_pages=CALIBRATION_SAMPLE_PAGES, progress=None):
+    """
+    在本机的文档上逐个试用可用的转换后端，为每类文档（矢量文字/扫描件）和预览选出最快的后端
+    参数:
+        pdf_paths: 样本PDF路径列表（通常是本地实际要处理的文件）
+        poppler_path: Poppler的bin目录
+        dpi/size/quality/encode: 与实际转换相同的参数
+        sample_pages: 每个样本文档渲染的页数
+        progress: 进度回调 progress(文字)，可为 None
+    返回:
+        (选择结果: 文档类型 -> 后端名称, 测量结果: 文档类型 -> {后端名称: 平均每页秒数})
+    """
+    report = progress or (lambda text: None)
+    infos = PdfIndex(path="").scan(pdf_paths, poppler_path, classify=True)
+    samples = {doc_class: [(path, info) for path, info in infos.items()
+                           if info.doc_class == doc_class and not info.encrypted]
+               for doc_class in DOC_CLASSES}
+    candidates = available_rasterizers(poppler_path)
+    if not candidates:
+        raise RuntimeError("未找到 pdftoppm 或 pdftocairo，无法校准转换后端")
+
+    results = {}
+    for doc_class, class_samples in samples.items():
+        if not class_samples:
+            logging.info(f"没有 {doc_class} 类型的样本文档，跳过")
+            continue
+        results[doc_class] = {}
+        for rasterizer in candidates:
+            report(f"正在测试 {rasterizer.name}（{doc_class}，{len(class_samples)} 个文档）")
+            try:
+                results[doc_class][rasterizer.name] = time_rasterizer(rasterizer, class_samples, poppler_path, dpi,
+                                                                      size, quality, encode, sample_pages)
+            except Exception as e:
+                logging.warning(f"后端 {rasterizer.name} 测试失败: {str(e)}")
+
+    # 预览只用到渲染程序，每个渲染程序测一次即可
+    preview_samples = [sample for class_samples in samples.values() for sample in class_samples[:1]]
+    if preview_samples:
+        results[PREVIEW_CLASS] = {}
+        for rasterizer in candidates:
+            if rasterizer.output != "pil" or rasterizer.thread_count != 1:
+                continue
+            report(f"正在测试预览 {rasterizer.name}")
+            try:
+                results[PREVIEW_CLASS][rasterizer.name] = time_preview(rasterizer, preview_samples, poppler_path)
+            except Exception as e:
+                logging.warning(f"预览后端 {rasterizer.name} 测试失败: {str(e)}")
+
+    choices = {doc_class: min(timings, key=timings.get) for doc_class, timings in results.items() if timings}
+    for doc_class, name in choices.items():
+        logging.info(f"校准结果: {doc_class} -> {name}（{results[doc_class][name] * 1000:.0f} ms/页）")
+    return choices, results
+
+
+def save_calibration(choices, results, path=SETTINGS_FILE):
+    """
+    把校准结果写入设置文件，并把转换后端设为自动选择
+    返回:
+        合并后的完整设置字典
+    """
+    return save_settings({
+        "render_backend": AUTO_BACKEND,
+        "rasterizers": choices,
+        "rasterizer_calibration": {"calibrated_at": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results},
+    }, path)
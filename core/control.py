@@ -0,0 +1,69 @@
+import threading
+import logging
+
+
+class JobCancelled(Exception):
+    """任务被用户取消"""
+
+
+class JobControl:
+    def __init__(self):
+        """
+        单个批量任务的暂停/继续/取消控制
+        转换流程在每一页（或每个渲染窗口）之前调用 checkpoint()：暂停时在此阻塞，取消时抛出 JobCancelled
+        正在运行的 poppler 子进程通过 register_process 登记，取消时立即结束，不再占用CPU
+        """
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set() and not self._cancelled.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()  # 唤醒暂停中的线程，使其看到取消标志
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            self._kill(process)
+
+    def checkpoint(self):
+        """
+        页间检查点：暂停时阻塞直到继续或取消；已取消时抛出 JobCancelled
+        """
+        self._running.wait()
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def register_process(self, process):
+        with self._lock:
+            self._processes.add(process)
+        # 登记前已经取消时，刚启动的进程也要立即结束
+        if self._cancelled.is_set():
+            self._kill(process)
+
+    def unregister_process(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    @staticmethod
+    def _kill(process):
+        try:
+            if process.poll() is None:
+                process.kill()
+        except OSError as e:
+            logging.warning(f"结束 poppler 进程失败: {str(e)}")
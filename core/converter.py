@@ -0,0 +1,437 @@
+import os
+import re
+import math
+import uuid
+import queue
+import logging
+import shutil
+import platform
+import tempfile
+import threading
+import subprocess
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from pdf2image import pdfinfo_from_path
+from pdf2image.parsers import parse_buffer_to_pgm, parse_buffer_to_ppm
+from config import (A4_SIZE, PDF_DPI, JPEG_QUALITY, PAGE_BATCH_SIZE, RENDER_BACKEND, SHARD_MIN_PAGES,
+                    ENCODER_WORKERS, ENCODE_QUEUE_DEPTH)
+from core.control import JobCancelled
+from core.metrics import timed
+from core.encoder import DEFAULT_ENCODE, encode_image, encode_pipeline
+from core.rasterizer import RASTERIZERS, get_rasterizer
+
+# 可用的转换后端见 core.rasterizer.RASTERIZERS，按输出方式分为两类：
+#   pil    - pdftoppm/pdftocairo 输出 PPM/PNG，经 PIL 解码后由编码线程池编码（支持 JPEG/PNG/WebP）
+#   direct - pdftoppm/pdftocairo 直接把 JPEG/PNG 写到输出目录，跳过 PIL 解码/再编码
+BACKENDS = tuple(RASTERIZERS)
+
+# direct 输出方式能直接输出的格式
+_DIRECT_FORMATS = ("jpeg", "png")
+
+# pdftoppm/pdftocairo 输出文件名中的页码部分，例如 "_tmp_xxx_-007.jpg"
+_PAGE_NUMBER_PATTERN = re.compile(r"-(\d+)\.(?:jpg|png)$")
+
+
+def get_page_count(pdf_path, poppler_path=None):
+    """
+    获取PDF的页数
+    参数:
+        pdf_path: PDF文件路径
+        poppler_path: Poppler的bin目录（None表示使用系统PATH）
+    返回:
+        页数
+    """
+    return pdfinfo_from_path(pdf_path, poppler_path=poppler_path)["Pages"]
+
+
+def build_image_path(output_dir, page, use_original_name=False, original_name=None, ext=".jpg"):
+    """
+    根据命名规则生成某一页图片的最终路径
+    参数:
+        output_dir: 输出目录
+        page: 页码（从1开始）
+        use_original_name: 是否使用原文件名加页码后缀
+        original_name: 原PDF文件名
+        ext: 图片扩展名
+    返回:
+        图片路径（{原文件名}_{页码}.jpg 或 {页码}.jpg）
+    """
+    if use_original_name and original_name:
+        image_name = os.path.splitext(original_name)[0]
+        return os.path.join(output_dir, f"{image_name}_{page}{ext}")
+    return os.path.join(output_dir, f"{page}{ext}")
+
+
+def split_windows(pages, batch_size=PAGE_BATCH_SIZE):
+    """
+    把（可能不连续的）页码列表切分为连续的渲染窗口，每个窗口不超过 batch_size 页
+    参数:
+        pages: 升序页码列表
+        batch_size: 每个窗口的页数
+    返回:
+        [(first_page, last_page), ...]
+    """
+    windows = []
+    for page in pages:
+        if windows and page == windows[-1][1] + 1 and page - windows[-1][0] < batch_size:
+            windows[-1] = (windows[-1][0], page)
+        else:
+            windows.append((page, page))
+    return windows
+
+
+def plan_shards(page_count, workers, min_pages=SHARD_MIN_PAGES):
+    """
+    按页数和可用核心数把文档切分为若干页码分片
+    分片数取核心数的两倍，使复杂页面集中的分片不至于拖慢整体；每个分片至少 min_pages 页
+    参数:
+        page_count: 总页数
+        workers: 可用于该文档的并行数
+        min_pages: 每个分片的最少页数
+    返回:
+        [(first_page, last_page), ...]，页数不足以分片时只有一个分片
+    """
+    if page_count <= 0:
+        return []
+    if workers <= 1 or page_count < min_pages * 2:
+        return [(1, page_count)]
+    shard_size = max(min_pages, math.ceil(page_count / (workers * 2)))
+    return [(first_page, min(first_page + shard_size - 1, page_count))
+            for first_page in range(1, page_count + 1, shard_size)]
+
+
+def poppler_command(name, poppler_path=None):
+    if platform.system() == "Windows":
+        name += ".exe"
+    return os.path.join(poppler_path, name) if poppler_path else name
+
+
+def scale_args(size):
+    """
+    把输出尺寸转换为 pdftoppm 的缩放参数（与 pdf2image 的 size 参数含义一致）
+    """
+    if size is None:
+        return []
+    if isinstance(size, (int, float)):
+        return ["-scale-to", str(int(size))]
+    if len(size) == 1:
+        return ["-scale-to", str(int(size[0]))]
+    width, height = size
+    return ["-scale-to-x", str(int(width) if width is not None else -1),
+            "-scale-to-y", str(int(height) if height is not None else -1)]
+
+
+def _start_poppler(args, poppler_path=None, control=None):
+    env = os.environ.copy()
+    if poppler_path is not None:
+        env["LD_LIBRARY_PATH"] = poppler_path + ":" + env.get("LD_LIBRARY_PATH", "")
+    startupinfo = None
+    if platform.system() == "Windows":
+        # 避免在 Windows 上弹出控制台窗口
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+
+    process = subprocess.Popen(args, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo)
+    if control:
+        control.register_process(process)
+    return process
+
+
+def _wait_poppler(process, args, control=None):
+    try:
+        out, err = process.communicate()
+    finally:
+        if control:
+            control.unregister_process(process)
+
+    if control and control.cancelled:
+        raise JobCancelled()
+    if process.returncode != 0:
+        raise RuntimeError(f"{os.path.basename(args[0])} 运行失败: {err.decode('utf8', 'ignore').strip()}")
+    return out
+
+
+def run_poppler(args, poppler_path=None, control=None):
+    """
+    运行 poppler 命令行工具并等待结束
+    进程登记到 control 中，任务取消时立即结束该进程
+    参数:
+        args: 命令及参数
+        poppler_path: Poppler的bin目录
+        control: 任务控制（JobControl，可为 None）
+    返回:
+        标准输出内容
+    """
+    return _wait_poppler(_start_poppler(args, poppler_path, control), args, control)
+
+
+def render_images(pdf_path, first_page, last_page, poppler_path=None, dpi=PDF_DPI, size=None, grayscale=False,
+                  rasterizer=RASTERIZERS["pil"], control=None):
+    """
+    把页码范围渲染为 PIL 图像（与 pdf2image 的 convert_from_path 结果相同）
+    直接启动渲染程序而不经过 pdf2image，进程登记到 control 中，任务取消时立即结束；
+    rasterizer.thread_count 大于 1 时把页码范围平均分给多个进程同时渲染
+    参数:
+        pdf_path: PDF文件路径
+        first_page, last_page: 页码范围（含两端）
+        rasterizer: 光栅化后端（pdftoppm 经标准输出返回 PPM/PGM，pdftocairo 写 PNG 到临时目录）
+        control: 任务控制（JobControl，可为 None）
+    返回:
+        按页码排列的 PIL 图像列表，由调用方关闭
+    """
+    page_count = last_page - first_page + 1
+    thread_count = max(1, min(rasterizer.thread_count, page_count))
+    temp_dir = tempfile.mkdtemp(prefix="pdf_organizer_render_") if rasterizer.tool == "pdftocairo" else None
+    processes = []
+    images = []
+    try:
+        start = first_page
+        for index in range(thread_count):
+            end = start + page_count // thread_count + int(index < page_count % thread_count) - 1
+            args = [poppler_command(rasterizer.tool, poppler_path), "-r", str(dpi), "-f", str(start), "-l", str(end)]
+            args += scale_args(size)
+            if grayscale:
+                args.append("-gray")
+            if temp_dir:
+                args += ["-png", pdf_path, os.path.join(temp_dir, str(index))]
+            else:
+                args.append(pdf_path)
+            processes.append((index, args, _start_poppler(args, poppler_path, control)))
+            start = end + 1
+
+        for index, args, process in processes:
+            out = _wait_poppler(process, args, control)
+            if temp_dir is None:
+                images += parse_buffer_to_pgm(out) if grayscale else parse_buffer_to_ppm(out)
+                continue
+            rendered = []
+            for entry in os.scandir(temp_dir):
+                match = _PAGE_NUMBER_PATTERN.search(entry.name)
+                if entry.name.startswith(f"{index}-") and match:
+                    rendered.append((int(match.group(1)), entry.path))
+            for _, path in sorted(rendered):
+                image = Image.open(path)
+                image.load()
+                images.append(image)
+        return images
+    except BaseException:
+        for image in images:
+            image.close()
+        raise
+    finally:
+        # 出错或取消时结束其余仍在运行的进程
+        for _, _, process in processes:
+            if process.poll() is None:
+                process.kill()
+                process.communicate()
+            if control:
+                control.unregister_process(process)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _render_window_pil(pdf_path, output_dir, first_page, last_page, naming, poppler_path, dpi, size, quality,
+                       control=None, metrics=None, grayscale=False, encode=DEFAULT_ENCODE,
+                       rasterizer=RASTERIZERS["pil"]):
+    if control:
+        control.checkpoint()
+    with timed(metrics, "render", pdf_path):
+        images = render_images(pdf_path, first_page, last_page, poppler_path, dpi, size, grayscale, rasterizer,
+                               control)
+    try:
+        for page, image in enumerate(images, first_page):
+            if control:
+                control.checkpoint()
+            image_path = build_image_path(output_dir, page, *naming)
+            image_size = image.size
+            with timed(metrics, "encode", pdf_path):
+                encode_image(image, image_path, quality, encode)
+            image.close()
+            yield page, image_path, image_size
+    finally:
+        for image in images:
+            image.close()
+
+
+def _render_window_direct(pdf_path, output_dir, first_page, last_page, naming, poppler_path, dpi, size, quality,
+                          control=None, metrics=None, grayscale=False, encode=DEFAULT_ENCODE,
+                          rasterizer=RASTERIZERS["direct"]):
+    # pdftoppm/pdftocairo 以临时前缀把图片直接写进输出目录，再在同一目录内重命名为最终文件名（仅改元数据，不复制数据）
+    # 直接启动渲染程序而不经过 pdf2image，任务取消时可以立即结束该子进程
+    if control:
+        control.checkpoint()
+    prefix = f"_tmp_{uuid.uuid4().hex}_"
+    args = [poppler_command(rasterizer.tool, poppler_path), "-r", str(dpi), "-f", str(first_page), "-l", str(last_page)]
+    if encode.fmt == "png":
+        args.append("-png")
+    else:
+        jpegopt = f"quality={quality}"
+        if encode.optimize:
+            jpegopt += ",optimize=y"
+        if encode.progressive:
+            jpegopt += ",progressive=y"
+        args += ["-jpeg", "-jpegopt", jpegopt]
+    args += scale_args(size)
+    if grayscale:
+        args.append("-gray")
+    args += [pdf_path, os.path.join(output_dir, prefix)]
+    try:
+        with timed(metrics, "render", pdf_path):
+            run_poppler(args, poppler_path, control)
+        rendered = []
+        for entry in os.scandir(output_dir):
+            match = _PAGE_NUMBER_PATTERN.search(entry.name)
+            if entry.name.startswith(prefix) and match:
+                rendered.append((int(match.group(1)), entry.path))
+        for page, temp_path in sorted(rendered):
+            if control:
+                control.checkpoint()
+            image_path = build_image_path(output_dir, page, *naming)
+            with timed(metrics, "rename", pdf_path):
+                os.replace(temp_path, image_path)
+            # 只读取文件头得到实际尺寸（按比例缩放时与输出尺寸设置不同）
+            with Image.open(image_path) as image:
+                image_size = image.size
+            yield page, image_path, image_size
+    finally:
+        # 取消或出错时删除尚未重命名（可能只写了一半）的临时文件
+        for entry in os.scandir(output_dir):
+            if entry.name.startswith(prefix):
+                os.remove(entry.path)
+
+
+_WINDOW_RENDERERS = {
+    "pil": _render_window_pil,
+    "direct": _render_window_direct,
+}
+
+
+def _render_pipelined(pdf_path, output_dir, windows, naming, poppler_path, dpi, size, quality, encode,
+                      encoder_workers, queue_depth, control=None, metrics=None, rasterizer=RASTERIZERS["pil"]):
+    # pil 后端的流水线：生产者线程逐窗口渲染（pdftoppm + PIL 解码），编码线程池并行编码，
+    # 渲染下一个窗口与编码上一个窗口同时进行
+    def produce():
+        for first_page, last_page in windows:
+            if control:
+                control.checkpoint()
+            with timed(metrics, "render", pdf_path):
+                images = render_images(pdf_path, first_page, last_page, poppler_path, dpi, size,
+                                       rasterizer=rasterizer, control=control)
+            page = first_page
+            try:
+                while images:
+                    image = images.pop(0)
+                    yield page, image, build_image_path(output_dir, page, *naming)
+                    page += 1
+            finally:
+                # 取消或出错时关闭本窗口中尚未交给编码线程的页面（已产出的页面由编码流水线负责关闭）
+                for image in images:
+                    image.close()
+
+    def encode_page(image, image_path):
+        if control:
+            control.checkpoint()
+        encode_image(image, image_path, quality, encode)
+
+    return encode_pipeline(produce, encode_page, encoder_workers, queue_depth, metrics, pdf_path)
+
+
+def _render_shards(render_window, pdf_path, output_dir, shard_windows, shard_workers, naming, poppler_path,
+                   dpi, size, quality, control=None, metrics=None):
+    # 多个 poppler 进程并行渲染不同页码分片，结果按完成顺序交回调用方；文件名由页码决定，无需重新拼接
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def render_shard(windows):
+        for first_page, last_page in windows:
+            if stop.is_set():
+                return
+            for result in render_window(pdf_path, output_dir, first_page, last_page, naming,
+                                        poppler_path, dpi, size, quality, control, metrics):
+                results.put(result)
+
+    with ThreadPoolExecutor(max_workers=shard_workers, thread_name_prefix="pdf-shard") as executor:
+        remaining = {executor.submit(render_shard, windows) for windows in shard_windows}
+        try:
+            while remaining or not results.empty():
+                try:
+                    yield results.get(timeout=0.1)
+                except queue.Empty:
+                    finished = {future for future in remaining if future.done()}
+                    for future in finished:
+                        future.result()  # 分片中的异常在这里抛给调用方
+                    remaining -= finished
+        finally:
+            stop.set()
+
+
+def effective_rasterizer(backend, encode=DEFAULT_ENCODE):
+    """
+    返回:
+        实际使用的 Rasterizer（direct 输出不支持该格式时改为经 PIL 编码）
+    """
+    rasterizer = get_rasterizer(backend)
+    if rasterizer.output == "direct" and encode.fmt not in _DIRECT_FORMATS:
+        logging.debug(f"{rasterizer.tool} 不能直接输出 {encode.fmt}，改为经 PIL 编码")
+        rasterizer = rasterizer._replace(output="pil")
+    return rasterizer
+
+
+def convert_pdf_pages(pdf_path, output_dir, use_original_name=False, original_name=None, poppler_path=None,
+                      backend=RENDER_BACKEND, dpi=PDF_DPI, size=A4_SIZE, quality=JPEG_QUALITY,
+                      batch_size=PAGE_BATCH_SIZE, shard_workers=1, page_count=None, skip_pages=None, control=None,
+                      metrics=None, adaptive=None, encode=DEFAULT_ENCODE, encoder_workers=ENCODER_WORKERS,
+                      queue_depth=ENCODE_QUEUE_DEPTH):
+    """
+    流式地把PDF逐页转换为图片，每渲染完一个窗口就写盘并释放
+    参数:
+        pdf_path: PDF文件路径
+        output_dir: 输出目录
+        use_original_name: 是否使用原文件名加页码后缀
+        original_name: 原PDF文件名
+        poppler_path: Poppler的bin目录
+        backend: 转换后端（见 BACKENDS）
+        dpi: 渲染DPI
+        size: 输出尺寸（像素）
+        quality: JPEG/WebP 质量
+        batch_size: 每次渲染的页数
+        shard_workers: 大文档按页码分片并行渲染时的并行数（1 表示不分片）
+        page_count: 已知的总页数（None 时调用 pdfinfo 获取）
+        skip_pages: 无需渲染的页码集合（例如断点续转时已完成的页）
+        control: 任务控制（JobControl），每页之前检查暂停/取消
+        metrics: 分阶段耗时统计（Metrics，可为 None）
+        adaptive: 自适应渲染策略（AdaptivePolicy，None 表示所有页使用相同参数）
+        encode: 编码选项（EncodeOptions：格式、JPEG 优化、渐进式）
+        encoder_workers: pil 后端的编码线程数（大于1时渲染与编码以流水线方式并行）
+        queue_depth: 流水线中等待编码的页面数上限
+    返回:
+        (页码, 图片路径, 图片尺寸) 的生成器；分片渲染时按完成顺序产出
+    """
+    rasterizer = effective_rasterizer(backend, encode)
+    render_window = partial(_WINDOW_RENDERERS[rasterizer.output], encode=encode, rasterizer=rasterizer)
+    if adaptive:
+        render_window = adaptive.wrap(render_window)
+    naming = (use_original_name, original_name, encode.ext)
+
+    if page_count is None:
+        page_count = get_page_count(pdf_path, poppler_path)
+    skip_pages = skip_pages or set()
+    pages = [page for page in range(1, page_count + 1) if page not in skip_pages]
+
+    shards = plan_shards(len(pages), shard_workers)
+    if len(shards) > 1:
+        shard_windows = [split_windows(pages[first - 1:last], batch_size) for first, last in shards]
+        yield from _render_shards(render_window, pdf_path, output_dir, shard_windows, shard_workers, naming,
+                                  poppler_path, dpi, size, quality, control, metrics)
+        return
+
+    windows = split_windows(pages, batch_size)
+    if rasterizer.output == "pil" and encoder_workers > 1 and not adaptive:
+        yield from _render_pipelined(pdf_path, output_dir, windows, naming, poppler_path, dpi, size, quality, encode,
+                                     encoder_workers, queue_depth, control, metrics, rasterizer)
+        return
+
+    for first_page, last_page in windows:
+        yield from render_window(pdf_path, output_dir, first_page, last_page, naming,
+                                 poppler_path, dpi, size, quality, control, metrics)
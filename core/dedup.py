@@ -0,0 +1,193 @@
+import os
+import shutil
+import logging
+import platform
+import threading
+from config import DEDUP_LINK_MODE
+from utils import file_sha256
+
+# 重复文件的链接方式：
+#   hardlink - 硬链接（不占额外空间，但多个文件夹共享同一份数据，修改其中一个文件会同时改变其他文件，需要显式开启）
+#   reflink  - 写时复制克隆（默认；Btrfs/XFS 等支持的文件系统上不占额外空间，修改副本不影响原文件，不支持时复制）
+#   copy     - 普通复制（只节省渲染时间）
+LINK_MODES = ("hardlink", "reflink", "copy")
+
+# 计入“节省的渲染时间”的阶段（重复文档省去的就是这些阶段）
+RENDER_STAGES = ("render", "encode", "rename", "probe", "adaptive_sample", "archive")
+
+# Linux 的 FICLONE ioctl
+_FICLONE = 0x40049409
+
+
+def _reflink(source, target):
+    if platform.system() != "Linux":
+        return False
+    import fcntl
+    try:
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+        return False
+
+
+def link_file(source, target, mode=DEDUP_LINK_MODE):
+    """
+    让 target 与 source 内容相同而不重新生成，无法链接时（跨文件系统、不支持链接等）退回复制
+    参数:
+        source: 已有文件
+        target: 目标路径（已存在时被替换）
+        mode: 链接方式（见 LINK_MODES）
+    返回:
+        实际使用的方式
+    """
+    if os.path.lexists(target):
+        os.remove(target)
+    if mode == "reflink" and _reflink(source, target):
+        return "reflink"
+    if mode == "hardlink":
+        try:
+            os.link(source, target)
+            return "hardlink"
+        except OSError as e:
+            logging.debug(f"无法创建硬链接 {target}: {str(e)}")
+    shutil.copyfile(source, target)
+    return "copy"
+
+
+class Deduplicator:
+    def __init__(self, pages=False, link_mode=DEDUP_LINK_MODE):
+        """
+        重复内容检测：同一批次中内容哈希相同的PDF只渲染一次，其余文件直接链接其输出；
+        可选地按图片内容检测重复页面（例如空白页、相同的封面），重复的页面文件改为链接
+        参数:
+            pages: 是否检测重复页面（需要对每页图片计算哈希）
+            link_mode: 链接方式（见 LINK_MODES）
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"未知的链接方式: {link_mode}")
+        self.pages = pages
+        self.link_mode = link_mode
+        self.lock = threading.Lock()
+        self.page_digests = {}   # (哈希, 扩展名) -> 第一次出现的图片路径
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"documents": 0, "document_pages": 0, "pages": 0,
+                          "saved_bytes": 0, "saved_seconds": 0.0}
+            self.page_digests.clear()
+
+    def plan(self, jobs, pdf_info):
+        """
+        在一批任务中找出重复的PDF
+        参数:
+            jobs: (序号, PDF条目) 列表，靠前的文件作为渲染的那一份
+            pdf_info: 路径 -> PdfInfo（含 content_hash）
+        返回:
+            重复文件的序号 -> 内容相同且需要渲染的PDF路径
+        """
+        first_seen = {}
+        duplicates = {}
+        for index, item in jobs:
+            pdf_path = item[1] if isinstance(item, tuple) else item
+            info = pdf_info.get(pdf_path)
+            if info is None or info.content_hash is None:
+                continue
+            if info.content_hash in first_seen:
+                duplicates[index] = first_seen[info.content_hash]
+            else:
+                first_seen[info.content_hash] = pdf_path
+        return duplicates
+
+    def link(self, source, target):
+        """
+        链接一个文件
+        返回:
+            节省的磁盘字节数（退回复制时为 0）
+        """
+        method = link_file(source, target, self.link_mode)
+        return 0 if method == "copy" else os.path.getsize(target)
+
+    def record_document(self, pages, saved_bytes, saved_seconds):
+        with self.lock:
+            self.stats["documents"] += 1
+            self.stats["document_pages"] += pages
+            self.stats["saved_bytes"] += saved_bytes
+            self.stats["saved_seconds"] += saved_seconds
+
+    def link_page(self, image_path):
+        """
+        检查刚生成的页面是否与本批次中已有的页面完全相同，相同时替换为链接
+        返回:
+            是否替换为链接
+        """
+        key = (file_sha256(image_path, cache=False), os.path.splitext(image_path)[1])
+        with self.lock:
+            existing = self.page_digests.get(key)
+            if existing is None or existing == image_path or not os.path.exists(existing):
+                self.page_digests[key] = image_path
+                return False
+        # 先链接到临时文件再替换，任何时刻目标路径都是完整的图片
+        temp_path = image_path + ".link"
+        try:
+            saved = self.link(existing, temp_path)
+            os.replace(temp_path, image_path)
+        except OSError as e:
+            # 已有的页面被删除或移动、磁盘已满等：保留刚生成的页面，之后相同的页面链接到它
+            logging.warning(f"无法链接重复页面 {existing} -> {image_path}: {str(e)}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            with self.lock:
+                self.page_digests[key] = image_path
+            return False
+        with self.lock:
+            self.stats["pages"] += 1
+            self.stats["saved_bytes"] += saved
+        return True
+
+    def relocate(self, old_folder, new_folder):
+        """
+        临时文件夹发布为输出文件夹后，更新记录的页面路径
+        """
+        if not self.pages:
+            return
+        with self.lock:
+            for key, path in self.page_digests.items():
+                if os.path.dirname(path) == old_folder:
+                    self.page_digests[key] = os.path.join(new_folder, os.path.basename(path))
+
+    def savings(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def format_savings(self):
+        stats = self.savings()
+        text = f"去重: {stats['documents']} 个重复 PDF 直接链接（共 {stats['document_pages']} 页）"
+        if self.pages:
+            text += f"，{stats['pages']} 个重复页面"
+        return (text + f"，估计节省 {stats['saved_seconds']:.1f} 秒渲染时间、"
+                       f"{stats['saved_bytes'] / 1024 / 1024:.1f} MB 磁盘")
+
+
+def create_deduplicator(settings):
+    """
+    按设置创建重复内容检测
+    参数:
+        settings: 设置字典（dedup 开关、dedup_pages、dedup_link）
+    返回:
+        Deduplicator，关闭时返回 None
+    """
+    if not settings.get("dedup", True):
+        return None
+    link_mode = settings.get("dedup_link", DEDUP_LINK_MODE)
+    if link_mode not in LINK_MODES:
+        logging.warning(f"未知的链接方式 {link_mode}，将使用 {DEDUP_LINK_MODE}")
+        link_mode = DEDUP_LINK_MODE
+    return Deduplicator(pages=settings.get("dedup_pages", False), link_mode=link_mode)
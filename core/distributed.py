@@ -0,0 +1,263 @@
+import os
+import time
+import logging
+import threading
+from config import QUEUE_PAGES_PER_JOB, QUEUE_POLL_SECONDS, ENCODER_WORKERS
+from core.batch import BatchEngine
+from core.converter import convert_pdf_pages, get_page_count, split_windows
+from core.encoder import EncodeOptions
+from core.events import PAGE_DONE, LOG
+from core.control import JobControl, JobCancelled
+from core.job_queue import FAILED, PENDING, default_worker_id
+from core.metrics import timed
+
+
+def to_shared_path(path, root=None):
+    # 位于共享根目录下的路径以相对路径写入任务，各节点按自己的挂载点解析
+    if root:
+        try:
+            relative = os.path.relpath(os.path.abspath(path), os.path.abspath(root))
+        except ValueError:
+            # Windows 上与共享根目录不在同一个驱动器或 UNC 共享中
+            relative = None
+        if relative and not relative.startswith(os.pardir):
+            return relative.replace(os.sep, "/")
+    return os.path.abspath(path)
+
+
+def from_shared_path(path, root=None):
+    if root and not os.path.isabs(path):
+        return os.path.join(root, *path.split("/"))
+    return path
+
+
+class CoordinatorEngine(BatchEngine):
+    def __init__(self, queue, root=None, pages_per_job=QUEUE_PAGES_PER_JOB, poll_seconds=QUEUE_POLL_SECONDS,
+                 **kwargs):
+        """
+        协调节点：文件夹编号、转换清单、发布文件夹和删除源文件仍按 BatchEngine 的流程在本机完成，
+        渲染则按页码范围拆成任务放入共享队列，由任意台机器上的 worker 进程领取，直接写入输出目录
+        参数:
+            queue: 共享任务队列（DirectoryQueue）
+            root: 共享根目录（PDF 和输出目录在其下时，任务中使用相对路径，worker 按自己的挂载点解析）
+            pages_per_job: 每个任务的最多页数
+            poll_seconds: 检查任务结果的间隔（秒）
+            kwargs: 传给 BatchEngine 的参数
+        """
+        super().__init__(**kwargs)
+        self.queue = queue
+        self.root = root
+        self.pages_per_job = pages_per_job
+        self.poll_seconds = poll_seconds
+        # 归档写入、自适应渲染和渲染缓存都在渲染进程内完成，分布式模式下不使用
+        if self.archive_mode != "none":
+            logging.warning("分布式模式不支持归档输出，将输出单独的图片文件")
+            self.archive_mode = "none"
+        if self.adaptive:
+            logging.warning("分布式模式不支持自适应渲染，所有页使用相同参数")
+            self.adaptive = None
+        self.render_cache = None
+
+    def pdf_to_jpg(self, pdf_path, output_dir, use_original_name=False, original_name=None, manifest=None,
+                   shard_workers=1):
+        """
+        把未完成的页按页码范围提交到队列，等待所有任务完成，并把 worker 生成的页记入清单
+        （shard_workers 不使用，并行度由 worker 的数量决定）
+        返回:
+            本次生成的图片数
+        """
+        self.events.emit(LOG, original_name, f"正在分发: {os.path.basename(pdf_path)}")
+        logging.info(f"正在分发: {os.path.basename(pdf_path)}")
+        info = self.pdf_info.get(pdf_path)
+        if info:
+            page_count = info.page_count
+        else:
+            with timed(self.metrics, "pdfinfo", pdf_path):
+                page_count = get_page_count(pdf_path, self.poppler_path)
+        skip_pages = manifest.completed_pages() if manifest else set()
+        link_source = self.link_sources.pop(pdf_path, None)
+        if link_source:
+            linked = self.link_duplicate(link_source, pdf_path, output_dir, page_count, skip_pages,
+                                         (use_original_name, original_name, self.encode.ext), manifest)
+            if linked is not None:
+                return linked
+
+        base_job = {
+            "pdf_path": to_shared_path(pdf_path, self.root),
+            "output_dir": to_shared_path(output_dir, self.root),
+            "page_count": page_count,
+            "use_original_name": use_original_name,
+            "original_name": original_name,
+            "backend": self.backend_for(pdf_path),
+            "dpi": self.dpi,
+            "size": list(self.size) if self.size else None,
+            "quality": self.quality,
+            "encode": list(self.encode),
+        }
+        pages = [page for page in range(1, page_count + 1) if page not in skip_pages]
+        jobs = {}
+        for first_page, last_page in split_windows(pages, self.pages_per_job):
+            job_id = self.queue.submit(dict(base_job, first_page=first_page, last_page=last_page))
+            jobs[job_id] = (first_page, last_page)
+        logging.info(f"{original_name}: {len(pages)} 页拆分为 {len(jobs)} 个任务")
+
+        num_images = 0
+        try:
+            with timed(self.metrics, "remote", pdf_path):
+                while jobs:
+                    self.checkpoint()
+                    for job_id in list(jobs):
+                        state, result = self.queue.status(job_id)
+                        if state == PENDING:
+                            continue
+                        first_page, last_page = jobs.pop(job_id)
+                        self.queue.remove(job_id)
+                        if state == FAILED:
+                            raise RuntimeError(f"第 {first_page}-{last_page} 页尝试 {self.queue.max_attempts} 次后"
+                                               f"仍失败: {result}")
+                        # 各节点的 --root 不一致时 worker 会写到别处，只有本机能看到的文件才记入清单
+                        missing = [name for _, name in result["pages"]
+                                   if not os.path.exists(os.path.join(output_dir, name))]
+                        if missing:
+                            raise RuntimeError(f"第 {first_page}-{last_page} 页由 {result.get('worker')} 报告完成，"
+                                               f"但输出目录中缺少 {len(missing)} 个文件（如 {missing[0]}），"
+                                               f"请检查各节点的 --root 设置")
+                        for page, name in result["pages"]:
+                            image_path = os.path.join(output_dir, name)
+                            num_images += 1
+                            if manifest:
+                                manifest.mark_page(page, image_path)
+                            self.events.emit(PAGE_DONE, original_name, f"已生成: {name}", page=page, path=image_path,
+                                             source=pdf_path)
+                        logging.info(f"{original_name} 第 {first_page}-{last_page} 页由 {result.get('worker')} 完成"
+                                     f"（{result.get('seconds', 0):.1f} 秒）")
+                    if jobs:
+                        time.sleep(self.poll_seconds)
+        except BaseException:
+            # 撤销尚未完成的任务；出错时把已完成的页记入清单，重新运行时从断点继续
+            for job_id in jobs:
+                self.queue.remove(job_id)
+            if manifest:
+                manifest.save()
+            raise
+
+        if manifest:
+            manifest.mark_complete(page_count)
+        return num_images
+
+
+class QueueWorker:
+    def __init__(self, queue, poppler_path=None, root=None, worker_id=None, encoder_workers=ENCODER_WORKERS,
+                 poll_seconds=QUEUE_POLL_SECONDS):
+        """
+        worker 进程：从共享队列领取任务，渲染指定页码范围并直接写入任务的输出目录
+        渲染期间定时续期租约；进程崩溃或断网时租约过期，任务由其他 worker 重新领取
+        参数:
+            queue: 共享任务队列（DirectoryQueue）
+            poppler_path: Poppler的bin目录
+            root: 本机上共享根目录的挂载点（解析任务中的相对路径）
+            worker_id: worker 名称（默认 主机名-进程号）
+            encoder_workers: pil 后端的编码线程数
+            poll_seconds: 队列为空时的等待间隔（秒）
+        """
+        self.queue = queue
+        self.poppler_path = poppler_path
+        self.root = root
+        self.worker_id = worker_id or default_worker_id()
+        self.encoder_workers = encoder_workers
+        self.poll_seconds = poll_seconds
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self, idle_exit=None):
+        """
+        持续领取并执行任务
+        参数:
+            idle_exit: 队列持续为空超过该秒数后退出（None 表示一直运行）
+        返回:
+            完成的任务数
+        """
+        completed = 0
+        idle_since = time.monotonic()
+        logging.info(f"worker {self.worker_id} 开始领取任务: {self.queue.root}")
+        while not self.stopped.is_set():
+            lease = self.queue.claim(self.worker_id)
+            if lease is None:
+                if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                    break
+                self.stopped.wait(self.poll_seconds)
+                continue
+            if self.process(lease):
+                completed += 1
+            idle_since = time.monotonic()
+        logging.info(f"worker {self.worker_id} 退出，共完成 {completed} 个任务")
+        return completed
+
+    def process(self, lease):
+        """
+        执行一个任务并提交结果或失败记录
+        返回:
+            是否成功
+        """
+        job = lease.job
+        name = job.get("original_name") or os.path.basename(job["pdf_path"])
+        logging.info(f"领取任务 {lease.job_id}: {name} 第 {job['first_page']}-{job['last_page']} 页"
+                     f"（第 {lease.attempt} 次尝试）")
+        stop_heartbeat = threading.Event()
+        # 租约失效（已过期被他人领取或被协调节点撤销）时立即停止渲染，不再写入输出目录
+        control = JobControl()
+
+        def heartbeat():
+            while not stop_heartbeat.wait(self.queue.lease_seconds / 3):
+                if not self.queue.renew(lease):
+                    logging.warning(f"任务 {lease.job_id} 的租约已失效（已过期或被撤销），停止渲染")
+                    control.cancel()
+                    return
+
+        thread = threading.Thread(target=heartbeat, name="queue-lease", daemon=True)
+        thread.start()
+        start = time.perf_counter()
+        try:
+            pages = self.render(job, control)
+            self.queue.complete(lease, {"worker": self.worker_id, "pages": pages,
+                                        "seconds": time.perf_counter() - start})
+            logging.info(f"完成任务 {lease.job_id}: {len(pages)} 页，耗时 {time.perf_counter() - start:.1f} 秒")
+            return True
+        except JobCancelled:
+            logging.info(f"已放弃任务 {lease.job_id}")
+            return False
+        except Exception as e:
+            logging.error(f"任务 {lease.job_id} 失败: {str(e)}")
+            self.queue.fail(lease, e, self.worker_id)
+            return False
+        finally:
+            stop_heartbeat.set()
+            thread.join()
+
+    def render(self, job, control=None):
+        """
+        渲染任务中的页码范围
+        参数:
+            job: 任务内容
+            control: 任务控制（租约失效时取消，结束正在运行的 poppler 进程）
+        返回:
+            [[页码, 图片文件名], ...]
+        """
+        pdf_path = from_shared_path(job["pdf_path"], self.root)
+        output_dir = from_shared_path(job["output_dir"], self.root)
+        page_count = job["page_count"]
+        pages = set(range(job["first_page"], job["last_page"] + 1))
+        results = []
+        for page, image_path, _ in convert_pdf_pages(pdf_path, output_dir,
+                                                     use_original_name=job["use_original_name"],
+                                                     original_name=job["original_name"],
+                                                     poppler_path=self.poppler_path, backend=job["backend"],
+                                                     dpi=job["dpi"], size=tuple(job["size"]) if job["size"] else None,
+                                                     quality=job["quality"], page_count=page_count,
+                                                     skip_pages=set(range(1, page_count + 1)) - pages,
+                                                     encode=EncodeOptions(*job["encode"]),
+                                                     encoder_workers=self.encoder_workers, control=control):
+            results.append([page, os.path.basename(image_path)])
+        return results
@@ -0,0 +1,171 @@
+import os
+import uuid
+import queue
+import threading
+from collections import namedtuple
+from config import OUTPUT_FORMAT, JPEG_OPTIMIZE, JPEG_PROGRESSIVE, ENCODER_WORKERS, ENCODE_QUEUE_DEPTH
+from core.metrics import timed
+
+# 输出格式 -> 文件扩展名
+OUTPUT_FORMATS = {
+    "jpeg": ".jpg",
+    "png": ".png",
+    "webp": ".webp",
+}
+
+
+class EncodeOptions(namedtuple("EncodeOptions", ["fmt", "optimize", "progressive"])):
+    """
+    图片编码选项（质量单独传递，自适应渲染会逐页调整质量）
+        fmt: 输出格式（见 OUTPUT_FORMATS）
+        optimize: JPEG 优化哈夫曼表 / PNG 最大压缩
+        progressive: 渐进式 JPEG
+    """
+
+    @property
+    def ext(self):
+        return OUTPUT_FORMATS[self.fmt]
+
+    def is_default(self):
+        return self == DEFAULT_ENCODE
+
+
+DEFAULT_ENCODE = EncodeOptions("jpeg", False, False)
+
+
+def create_encode_options(settings):
+    """
+    按设置创建编码选项
+    参数:
+        settings: 设置字典（output_format、jpeg_optimize、jpeg_progressive）
+    返回:
+        EncodeOptions
+    """
+    fmt = settings.get("output_format", OUTPUT_FORMAT)
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"未知的输出格式: {fmt}")
+    return EncodeOptions(fmt, bool(settings.get("jpeg_optimize", JPEG_OPTIMIZE)),
+                         bool(settings.get("jpeg_progressive", JPEG_PROGRESSIVE)))
+
+
+def encode_image(image, image_path, quality, options=DEFAULT_ENCODE):
+    """
+    按编码选项保存图片：先写入同一目录下的临时文件再替换为最终文件名，
+    任何时刻 image_path 都是完整的图片（多个进程写同一页时后完成的覆盖先完成的）
+    参数:
+        image: PIL Image
+        image_path: 输出路径
+        quality: 质量（JPEG/WebP）
+        options: EncodeOptions
+    """
+    output_dir, name = os.path.split(image_path)
+    temp_path = os.path.join(output_dir, f"_tmp_{uuid.uuid4().hex}_{name}")
+    try:
+        if options.fmt == "jpeg":
+            image.save(temp_path, "JPEG", quality=quality, optimize=options.optimize, progressive=options.progressive)
+        elif options.fmt == "webp":
+            image.save(temp_path, "WEBP", quality=quality, method=6 if options.optimize else 4)
+        else:
+            image.save(temp_path, "PNG", optimize=options.optimize)
+        os.replace(temp_path, image_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def encode_pipeline(produce, encode, workers=ENCODER_WORKERS, depth=ENCODE_QUEUE_DEPTH, metrics=None, file=None):
+    """
+    生产者/消费者编码流水线：生产者线程渲染页面放入有界队列，多个编码线程并行取出编码
+    队列满时生产者阻塞，等待编码的页面数不超过 depth，内存占用有上限
+    参数:
+        produce: 无参函数，返回 (页码, PIL Image, 输出路径) 的迭代器（在生产者线程中运行）；
+                 提前结束时会关闭该迭代器，尚未产出的页面由 produce 在 finally 中关闭
+        encode: encode(image, image_path)，在编码线程中调用
+        workers: 编码线程数
+        depth: 队列深度
+        metrics: 分阶段耗时统计
+        file: 统计用的文件名
+    返回:
+        (页码, 图片路径, 图片尺寸) 的生成器，按编码完成顺序产出
+    """
+    tasks = queue.Queue(maxsize=max(1, depth))
+    results = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def put_task(item):
+        # 带超时地放入，消费方提前结束时不会永远阻塞
+        while not stop.is_set():
+            try:
+                tasks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        pages = produce()
+        try:
+            for page, image, image_path in pages:
+                if not put_task((page, image, image_path)):
+                    image.close()
+                    return
+        except BaseException as e:
+            results.put(e)
+        finally:
+            # 提前结束（取消、出错或消费方不再读取）时关闭生成器，由 produce 关闭尚未产出的页面
+            close = getattr(pages, "close", None)
+            if close:
+                close()
+            for _ in range(workers):
+                put_task(None)
+
+    def encoder():
+        while True:
+            try:
+                item = tasks.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return
+                continue
+            if item is None:
+                results.put(done)
+                return
+            page, image, image_path = item
+            try:
+                if not stop.is_set():
+                    image_size = image.size
+                    with timed(metrics, "encode", file):
+                        encode(image, image_path)
+                    results.put((page, image_path, image_size))
+            except Exception as e:
+                results.put(e)
+            finally:
+                image.close()
+
+    threads = [threading.Thread(target=producer, name="pdf-render", daemon=True)]
+    threads += [threading.Thread(target=encoder, name=f"pdf-encode-{index}", daemon=True) for index in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    finished = 0
+    try:
+        while finished < workers:
+            item = results.get()
+            if item is done:
+                finished += 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+        # 丢弃尚未编码的页面，释放内存
+        while True:
+            try:
+                item = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].close()
@@ -0,0 +1,150 @@
+import time
+import queue
+import threading
+from collections import namedtuple
+
+# 事件类型
+BATCH_STARTED = "batch_started"   # data: total（PDF数量）, total_pages（总页数，无法读取页数的文件不计入）
+FILE_STARTED = "file_started"     # data: index（文件夹序号）, pages（该文件页数，未知时为 None）, source
+PAGE_DONE = "page_done"           # data: page, path, source
+FILE_DONE = "file_done"           # data: success, images, source
+ERROR = "error"                   # data: error（异常对象）
+LOG = "log"                       # 普通的进度文本
+# file 为显示用的文件名；source 为 PDF 的完整路径，不同文件夹中的同名文件按它区分
+BATCH_DONE = "batch_done"         # data: success, total, images, cancelled（被取消而未处理的PDF数）
+JOB_QUEUED = "job_queued"         # data: job_id, priority
+JOB_STARTED = "job_started"       # data: job_id
+JOB_FINISHED = "job_finished"     # data: job_id, status
+
+# kind: 事件类型；file: 相关的PDF文件名；message: 可显示的文本（可为 None）；data: 其他字段
+ProgressEvent = namedtuple("ProgressEvent", ["kind", "file", "message", "data"])
+
+
+class EventBus:
+    def __init__(self):
+        """
+        线程安全的进度事件总线：工作线程 emit，界面线程按节拍 drain 并合并更新
+        """
+        self.queue = queue.Queue()
+
+    def emit(self, kind, file=None, message=None, **data):
+        self.queue.put(ProgressEvent(kind, file, message, data))
+
+    def drain(self, limit=None):
+        """
+        取出当前排队的事件
+        参数:
+            limit: 最多取出的事件数（None 表示全部）
+        返回:
+            事件列表
+        """
+        events = []
+        try:
+            while limit is None or len(events) < limit:
+                events.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def clear(self):
+        self.drain()
+
+
+class ProgressTracker:
+    def __init__(self):
+        """
+        按页统计批次进度并估算剩余时间
+        跳过或从缓存复制的页在文件完成时一次性计入，但不参与速度估算
+        各文件按事件中的 source（PDF 路径）区分，没有 source 时按文件名
+        """
+        self.reset()
+
+    def reset(self, total_files=0, total_pages=0):
+        self.total_files = total_files
+        self.total_pages = total_pages
+        self.files_done = 0
+        self.pages_done = 0         # 已完成的页（含跳过的页）
+        self.rendered = 0           # 本批次实际渲染的页
+        self.file_pages = {}        # PDF 路径 -> [页数, 已渲染页数]
+        self.started_at = None      # 第一页完成的时间
+
+    def update(self, kind, file=None, **data):
+        file = data.get("source") or file
+        if kind == BATCH_STARTED:
+            self.reset(data.get("total", 0), data.get("total_pages") or 0)
+        elif kind == FILE_STARTED:
+            self.file_pages[file] = [data.get("pages"), 0]
+        elif kind == PAGE_DONE:
+            now = time.monotonic()
+            if self.started_at is None:
+                self.started_at = now
+            self.rendered += 1
+            self.pages_done += 1
+            entry = self.file_pages.setdefault(file, [None, 0])
+            entry[1] += 1
+        elif kind == FILE_DONE:
+            self.files_done += 1
+            pages, rendered = self.file_pages.pop(file, [None, 0])
+            if pages:
+                self.pages_done += max(0, pages - rendered)
+
+    def fraction(self):
+        if self.total_pages:
+            return min(1.0, self.pages_done / self.total_pages)
+        return self.files_done / self.total_files if self.total_files else 0.0
+
+    def eta_seconds(self):
+        """
+        返回:
+            按已渲染页的平均速度估算的剩余秒数，尚无法估算时返回 None
+        """
+        if not self.total_pages or self.rendered < 2 or self.started_at is None:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        if elapsed <= 0:
+            return None
+        # 第一页完成时才开始计时，因此用 rendered - 1 页的耗时计算速度
+        rate = (self.rendered - 1) / elapsed
+        return max(0, self.total_pages - self.pages_done) / rate if rate > 0 else None
+
+    def format(self):
+        if self.total_pages:
+            text = (f"{self.fraction():.0%}（{self.pages_done}/{self.total_pages} 页，"
+                    f"{self.files_done}/{self.total_files} 个文件")
+        else:
+            text = f"{self.fraction():.0%}（{self.files_done}/{self.total_files} 个文件，已生成 {self.pages_done} 页"
+        eta = self.eta_seconds()
+        if eta is not None and self.pages_done < self.total_pages:
+            text += f"，剩余约 {format_duration(eta)}"
+        return text + "）"
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600} 小时 {seconds % 3600 // 60} 分"
+    if seconds >= 60:
+        return f"{seconds // 60} 分 {seconds % 60} 秒"
+    return f"{seconds} 秒"
+
+
+class ConsoleEventSink:
+    def __init__(self, verbose=False, stream=None):
+        """
+        命令行模式的事件接收端：直接打印事件文本，每个文件完成时打印按页统计的进度
+        参数:
+            verbose: 是否打印每一页的完成事件
+            stream: 输出流（默认标准输出）
+        """
+        self.verbose = verbose
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.progress = ProgressTracker()
+
+    def emit(self, kind, file=None, message=None, **data):
+        with self.lock:
+            self.progress.update(kind, file, **data)
+            if message and (kind != PAGE_DONE or self.verbose):
+                print(message, file=self.stream, flush=True)
+            if kind == FILE_DONE:
+                print(f"进度: {self.progress.format()}", file=self.stream, flush=True)
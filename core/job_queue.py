@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import platform
+from collections import namedtuple
+from config import QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS
+
+# 一次领取：job 为任务内容，token 区分同一任务的不同次领取
+Lease = namedtuple("Lease", ["job_id", "job", "token", "attempt", "worker"])
+
+# 租约剩余时间不足租约时长的该比例时不再续期（持有者每隔三分之一租约时长续期一次）
+RENEW_MARGIN = 0.1
+
+# 任务状态
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _write_json(path, data):
+    # 先写临时文件再替换，其他节点不会读到写了一半的文件
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logging.warning(f"无法解析队列文件 {path}: {str(e)}")
+        return None
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _move_exclusive(source, target):
+    """
+    把 source 改名为 target，target 已存在时抛出 FileExistsError 而不覆盖
+    （Windows 上的改名本身不覆盖已有文件；其他平台先建硬链接再删除原文件）
+    """
+    if platform.system() == "Windows":
+        os.rename(source, target)
+    else:
+        os.link(source, target)
+        os.remove(source)
+
+
+def _restore(held_path, path):
+    # 把暂时改名的文件放回原处；其间已有新的领取时保留新的领取
+    try:
+        _move_exclusive(held_path, path)
+    except OSError:
+        _remove(held_path)
+
+
+class DirectoryQueue:
+    def __init__(self, root, lease_seconds=QUEUE_LEASE_SECONDS, max_attempts=QUEUE_MAX_ATTEMPTS):
+        """
+        基于共享目录的任务队列，协调节点和任意台机器上的 worker 进程只通过文件交换任务
+        目录结构:
+            jobs/{id}.json       任务内容（提交后不再修改）
+            leases/{id}.json     当前领取（以独占方式创建，只有一个 worker 能领取成功；持有者定期续期）
+            attempts/{id}.{n}    失败或租约过期的记录，次数达到 max_attempts 后任务失败
+            results/{id}.json    完成结果
+        领取时发现租约已过期（worker 崩溃、断网）会先把它记为一次失败再重新领取，任务因此自动重试
+        参数:
+            root: 队列目录（所有节点都能访问的共享目录）
+            lease_seconds: 租约时长（秒），持有者每隔三分之一租约时长续期一次
+            max_attempts: 每个任务最多尝试的次数
+        注意:
+            租约按各节点的系统时间判断是否过期，各节点的时钟需要同步
+        """
+        self.root = root
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for name in ("jobs", "leases", "attempts", "results"):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    def _path(self, kind, job_id):
+        return os.path.join(self.root, kind, f"{job_id}.json")
+
+    def submit(self, job):
+        """
+        提交一个任务
+        返回:
+            任务 ID（按提交时间排序，worker 按此顺序领取）
+        """
+        job_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        _write_json(self._path("jobs", job_id), job)
+        return job_id
+
+    def attempts(self, job_id):
+        """
+        返回:
+            [(尝试序号, 记录)]，按序号排序
+        """
+        prefix = f"{job_id}."
+        records = []
+        for name in os.listdir(os.path.join(self.root, "attempts")):
+            if name.startswith(prefix) and not name.endswith(".tmp"):
+                record = _read_json(os.path.join(self.root, "attempts", name)) or {}
+                records.append((int(name[len(prefix):].split(".")[0]), record))
+        return sorted(records, key=lambda item: item[0])
+
+    def _record_attempt(self, job_id, attempt, record):
+        _write_json(os.path.join(self.root, "attempts", f"{job_id}.{attempt}"), record)
+
+    def _expire(self, job_id, lease_path):
+        # 先把租约改名为唯一的临时文件（改名是原子的，多个节点同时发现时只有一个成功），
+        # 再确认拿到的仍是刚才读到的那次过期领取；读取之后租约被续期或重新领取时放回原处
+        lease = _read_json(lease_path)
+        if lease is None or lease.get("expires", 0) > time.time():
+            return False
+        held_path = f"{lease_path}.{uuid.uuid4().hex}.expired"
+        try:
+            os.rename(lease_path, held_path)
+        except OSError:
+            return False
+        current = _read_json(held_path)
+        if (current is None or current.get("token") != lease.get("token")
+                or current.get("expires", 0) > time.time()):
+            _restore(held_path, lease_path)
+            return False
+        # 以独占方式创建失败记录，不覆盖同一序号已有的记录
+        target = os.path.join(self.root, "attempts", f"{job_id}.{current.get('attempt', 0)}")
+        try:
+            _move_exclusive(held_path, target)
+        except FileExistsError:
+            _remove(held_path)
+            return True
+        except OSError:
+            _restore(held_path, lease_path)
+            return False
+        current["error"] = f"租约过期（worker {current.get('worker')} 未能完成）"
+        _write_json(target, current)
+        logging.info(f"任务 {job_id} 的租约已过期，重新排队")
+        return True
+
+    def claim(self, worker_id=None):
+        """
+        领取最早提交的一个可执行任务
+        返回:
+            Lease，没有可领取的任务时返回 None
+        """
+        worker_id = worker_id or default_worker_id()
+        for name in sorted(os.listdir(os.path.join(self.root, "jobs"))):
+            if not name.endswith(".json"):
+                continue
+            job_id = name[:-len(".json")]
+            if os.path.exists(self._path("results", job_id)):
+                continue
+            lease_path = self._path("leases", job_id)
+            if os.path.exists(lease_path) and not self._expire(job_id, lease_path):
+                continue
+            attempt = len(self.attempts(job_id)) + 1
+            if attempt > self.max_attempts:
+                continue
+            token = uuid.uuid4().hex
+            try:
+                fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"worker": worker_id, "token": token, "attempt": attempt,
+                           "expires": time.time() + self.lease_seconds}, f)
+            job = _read_json(self._path("jobs", job_id))
+            if job is None:
+                # 领取的同时任务被协调节点撤销
+                _remove(lease_path)
+                continue
+            return Lease(job_id, job, token, attempt, worker_id)
+        return None
+
+    def _take(self, lease):
+        # 与 _expire 相同，先改名再确认 token，不会拿走他人在此期间重新领取的租约
+        # 返回改名后的文件路径，租约已不属于自己时返回 None
+        lease_path = self._path("leases", lease.job_id)
+        held_path = f"{lease_path}.{uuid.uuid4().hex}.released"
+        try:
+            os.rename(lease_path, held_path)
+        except OSError:
+            return None
+        current = _read_json(held_path)
+        if current is None or current.get("token") != lease.token:
+            _restore(held_path, lease_path)
+            return None
+        return held_path
+
+    def renew(self, lease):
+        """
+        续期租约：新内容先写入临时文件，确认存放的租约仍属于自己且尚未过期后再替换，
+        不会把已被判定过期（可能已被他人领取）的租约恢复回来
+        返回:
+            是否仍持有该租约（已过期、已被他人领取或任务已撤销时返回 False）
+        """
+        lease_path = self._path("leases", lease.job_id)
+        temp_path = f"{lease_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"worker": lease.worker, "token": lease.token, "attempt": lease.attempt,
+                       "expires": time.time() + self.lease_seconds}, f)
+        current = _read_json(lease_path)
+        # 剩余时间过短时不再续期，避免与其他节点的过期处理交错
+        if (current is None or current.get("token") != lease.token
+                or current.get("expires", 0) - time.time() < self.lease_seconds * RENEW_MARGIN):
+            _remove(temp_path)
+            return False
+        os.replace(temp_path, lease_path)
+        return True
+
+    def complete(self, lease, result):
+        """
+        提交完成结果并释放租约（租约已过期被他人重新领取时结果同样有效，后写入的覆盖先写入的）
+        """
+        if not os.path.exists(self._path("jobs", lease.job_id)):
+            return
+        _write_json(self._path("results", lease.job_id), result)
+        held_path = self._take(lease)
+        if held_path:
+            _remove(held_path)
+
+    def fail(self, lease, error, worker_id=None):
+        """
+        记录一次失败并释放租约，未达到最多尝试次数时任务可被再次领取
+        """
+        held_path = self._take(lease)
+        if not held_path:
+            return
+        # 租约直接改名为失败记录，释放与记录之间不会有其他 worker 领取到相同的尝试序号
+        target = os.path.join(self.root, "attempts", f"{lease.job_id}.{lease.attempt}")
+        try:
+            _move_exclusive(held_path, target)
+        except FileExistsError:
+            _remove(held_path)
+            return
+        self._record_attempt(lease.job_id, lease.attempt, {"worker": worker_id or default_worker_id(),
+                                                           "error": str(error)})
+
+    def status(self, job_id):
+        """
+        返回:
+            (状态, 结果或最后一次错误)；状态为 PENDING、DONE 或 FAILED
+        """
+        result = _read_json(self._path("results", job_id))
+        if result is not None:
+            return DONE, result
+        lease_path = self._path("leases", job_id)
+        if os.path.exists(lease_path):
+            self._expire(job_id, lease_path)
+        attempts = self.attempts(job_id)
+        if len(attempts) >= self.max_attempts and not os.path.exists(lease_path):
+            return FAILED, attempts[-1][1].get("error")
+        return PENDING, None
+
+    def remove(self, job_id):
+        """
+        删除任务及其所有记录（任务完成、失败或撤销后由协调节点调用）
+        """
+        _remove(self._path("jobs", job_id))
+        _remove(self._path("results", job_id))
+        _remove(self._path("leases", job_id))
+        for attempt, _ in self.attempts(job_id):
+            _remove(os.path.join(self.root, "attempts", f"{job_id}.{attempt}"))
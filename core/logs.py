@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from config import LOG_FILE_NAME, LOG_MAX_MB, LOG_BACKUP_COUNT
+from utils import get_app_data_dir
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+_listener = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    每条日志输出为一行 JSON：time、level、thread、message，
+    以及调用方通过 extra={"data": {...}} 附带的结构化字段（如批次统计）
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        data = getattr(record, "data", None)
+        if data:
+            entry["data"] = data
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def default_log_path(name=LOG_FILE_NAME):
+    """
+    返回:
+        程序数据目录下的日志文件路径（不随当前工作目录变化）
+    """
+    return os.path.join(get_app_data_dir("logs"), name)
+
+
+def setup_logging(log_path=None, level="INFO", json_lines=False, max_mb=LOG_MAX_MB, backup_count=LOG_BACKUP_COUNT,
+                  console=False):
+    """
+    配置异步日志：各线程只把日志记录放入队列，由单独的线程写文件，转换线程不等待磁盘写入
+    日志文件按大小轮换，只保留 backup_count 个旧文件
+    参数:
+        log_path: 日志文件路径（None 或空字符串表示 default_log_path()）
+        level: 日志级别（DEBUG 时输出每一页的生成信息）
+        json_lines: 是否以 JSON lines 格式写文件
+        max_mb: 单个日志文件的大小上限（MB）
+        backup_count: 保留的旧日志文件数
+        console: 是否同时输出到标准错误（命令行模式）
+    返回:
+        日志文件路径
+    """
+    global _listener
+    stop_logging()
+    log_path = log_path or default_log_path()
+    handlers = []
+    try:
+        file_handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=int(max_mb * 1024 * 1024),
+                                                            backupCount=backup_count, encoding="utf-8")
+        file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(TEXT_FORMAT))
+        handlers.append(file_handler)
+    except OSError as e:
+        print(f"无法打开日志文件 {log_path}: {str(e)}", file=sys.stderr)
+    if console and sys.stderr:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level.upper() if str(level).upper() in LOG_LEVELS else logging.INFO)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return log_path
+
+
+def stop_logging():
+    """
+    写完队列中剩余的日志并停止写日志线程（程序退出时自动调用）
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def setup_logging_from_settings(settings, console=False):
+    """
+    按设置配置日志（log_file、log_level、log_json、log_max_mb、log_backups）
+    返回:
+        日志文件路径
+    """
+    return setup_logging(settings.get("log_file"), level=settings.get("log_level", "INFO"),
+                         json_lines=settings.get("log_json", False), max_mb=settings.get("log_max_mb", LOG_MAX_MB),
+                         backup_count=settings.get("log_backups", LOG_BACKUP_COUNT), console=console)
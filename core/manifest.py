@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import logging
+
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+def conversion_params(dpi, size, quality, backend, use_original_name, original_name, adaptive=None, encode=None, archive=None):
+    """
+    生成写入清单的转换参数，任一参数变化都意味着已有图片不能复用
+    返回:
+        参数字典（可直接JSON序列化和比较）
+    """
+    params = {
+        "dpi": dpi,
+        "size": list(size) if size else None,
+        "quality": quality,
+        "backend": backend,
+        "use_original_name": bool(use_original_name),
+        "original_name": original_name if use_original_name else None,
+    }
+    # 只在开启自适应渲染、使用非默认编码或归档输出时写入，否则与旧版本的清单保持一致
+    if adaptive:
+        params["adaptive"] = adaptive
+    if encode and not encode.is_default():
+        params["encode"] = list(encode)
+    if archive and archive != "none":
+        params["archive"] = archive
+    return params
+
+
+class ConversionManifest:
+    def __init__(self, folder_path, source_hash, params):
+        """
+        输出文件夹的转换清单：记录源文件内容哈希、转换参数和已写入的页
+        参数:
+            folder_path: 输出文件夹
+            source_hash: 源PDF的内容哈希
+            params: conversion_params() 生成的参数
+        """
+        self.path = os.path.join(folder_path, MANIFEST_NAME)
+        self.folder_path = folder_path
+        self.source_hash = source_hash
+        self.params = params
+        self.page_count = None
+        self.pages = {}          # 页码 -> 图片文件名
+        self.complete = False
+        self.last_saved = 0.0
+
+    @classmethod
+    def load(cls, folder_path):
+        """
+        读取文件夹中已有的清单
+        返回:
+            ConversionManifest，不存在或无法解析时返回 None
+        """
+        path = os.path.join(folder_path, MANIFEST_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"无法读取转换清单 {path}: {str(e)}")
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        manifest = cls(folder_path, data.get("source_hash"), data.get("params"))
+        manifest.page_count = data.get("page_count")
+        manifest.pages = {int(page): name for page, name in data.get("pages", {}).items()}
+        manifest.complete = data.get("complete", False)
+        return manifest
+
+    def matches(self, source_hash, params):
+        return self.source_hash == source_hash and self.params == params
+
+    def completed_pages(self):
+        """
+        返回:
+            清单中记录且图片文件仍存在的页码集合
+        """
+        return {page for page, name in self.pages.items()
+                if os.path.exists(os.path.join(self.folder_path, name))}
+
+    def is_complete(self):
+        return (self.complete and self.page_count is not None
+                and len(self.completed_pages()) == self.page_count)
+
+    def mark_page(self, page, image_path, flush_interval=1.0):
+        """
+        记录一页已写入；清单按时间间隔落盘，崩溃时最多重渲染最后几页
+        参数:
+            page: 页码
+            image_path: 图片路径
+            flush_interval: 两次落盘的最小间隔（秒）
+        """
+        self.pages[page] = os.path.basename(image_path)
+        if time.monotonic() - self.last_saved >= flush_interval:
+            self.save()
+
+    def mark_complete(self, page_count):
+        self.page_count = page_count
+        self.complete = len(self.completed_pages()) == page_count
+        self.save()
+
+    def save(self):
+        # 先写临时文件再替换，避免崩溃时留下半个清单
+        data = {
+            "version": MANIFEST_VERSION,
+            "source_hash": self.source_hash,
+            "params": self.params,
+            "page_count": self.page_count,
+            "pages": {str(page): name for page, name in sorted(self.pages.items())},
+            "complete": self.complete,
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        self.last_saved = time.monotonic()
@@ -0,0 +1,167 @@
+import os
+import ctypes
+import logging
+import platform
+import threading
+from config import MEMORY_LIMIT_MB, MEMORY_AVAILABLE_FRACTION, MEMORY_MIN_FREE_MB, MEMORY_POLL_SECONDS
+from core.control import JobCancelled
+
+MB = 1024 * 1024
+# 每像素字节数（RGB），PIL 图像和 pdftoppm 的位图都按此估算
+BYTES_PER_PIXEL = 3
+# 页面尺寸未知时按 A4 估算（单位为点）
+DEFAULT_PAGE_SIZE = (595.276, 841.89)
+
+
+def available_memory():
+    """
+    读取系统当前可用内存
+    返回:
+        字节数，无法获取时返回 None
+    """
+    try:
+        if platform.system() == "Windows":
+            class MemoryStatus(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            status = MemoryStatus()
+            status.dwLength = ctypes.sizeof(MemoryStatus)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return int(status.ullAvailPhys)
+            return None
+        if os.path.exists("/proc/meminfo"):
+            with open("/proc/meminfo", "r") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def page_pixels(page_size, dpi, size):
+    """
+    估算一页渲染后的像素数（与 pdftoppm 的 -r/-scale-to 参数含义一致）
+    参数:
+        page_size: 页面 (宽, 高)，单位为点
+        dpi: 渲染DPI
+        size: 输出尺寸（与 pdf2image 的 size 参数含义一致，可为 None）
+    返回:
+        像素数
+    """
+    width, height = (value * (dpi or 72) / 72 for value in page_size)
+    if isinstance(size, (int, float)):
+        size = (size,)
+    if size and len(size) == 1:
+        scale = size[0] / max(width, height, 1)
+        return int(width * scale * height * scale)
+    if size:
+        target_width, target_height = size
+        if target_width and target_height:
+            return int(target_width * target_height)
+        if target_width:
+            return int(target_width * target_width * height / max(width, 1))
+        if target_height:
+            return int(target_height * target_height * width / max(height, 1))
+    return int(width * height)
+
+
+def pages_in_flight(output, shard_workers, batch_size, encoder_workers, queue_depth, adaptive=False):
+    """
+    估算一个文档转换时同时驻留在内存中的页数
+    direct 输出时 poppler 每次只持有一页位图；pil 输出时渲染窗口的 PPM 数据和解码后的图像同时存在，
+    流水线中还有排队等待编码和正在编码的页面
+    """
+    if output == "direct" and not adaptive:
+        return shard_workers
+    pages = 2 * batch_size * shard_workers
+    if output == "pil" and shard_workers == 1 and encoder_workers > 1 and not adaptive:
+        pages += queue_depth + encoder_workers
+    return pages
+
+
+class MemoryBudget:
+    def __init__(self, limit_mb=MEMORY_LIMIT_MB, min_free_mb=MEMORY_MIN_FREE_MB):
+        """
+        内存准入控制：每个文档开始转换前按页面尺寸预估内存占用并登记，
+        已登记的总量超过上限或系统可用内存不足时等待其他文档结束，批次变慢而不是内存耗尽或大量换页
+        参数:
+            limit_mb: 同时转换的文档预估内存总量上限（MB），0 表示按批次开始时可用内存的 MEMORY_AVAILABLE_FRACTION
+            min_free_mb: 系统可用内存低于该值时不再开始新的文档（至少保留一个文档在运行）
+        """
+        self.limit_mb = limit_mb
+        self.min_free = min_free_mb * MB
+        self.condition = threading.Condition()
+        self.in_use = 0
+        self.limit = None        # 字节数，由 reset() 在批次开始时计算；None 表示只检查系统可用内存
+
+    def reset(self):
+        """
+        批次开始时重新计算上限（自动模式下取当时的可用内存）
+        """
+        with self.condition:
+            if self.limit_mb:
+                self.limit = self.limit_mb * MB
+            else:
+                available = available_memory()
+                self.limit = int(available * MEMORY_AVAILABLE_FRACTION) if available else None
+        if self.limit:
+            logging.info(f"内存准入上限: {self.limit // MB} MB")
+
+    def fits(self, nbytes):
+        if self.limit and self.in_use + nbytes > self.limit:
+            return False
+        available = available_memory()
+        return available is None or available - nbytes >= self.min_free
+
+    def shard_limit(self, shard_bytes, shard_workers):
+        """
+        返回:
+            在上限内能同时运行的分片数（至少为1）
+        """
+        if not self.limit or shard_bytes <= 0:
+            return shard_workers
+        return max(1, min(shard_workers, self.limit // shard_bytes))
+
+    def acquire(self, nbytes, control=None, file=None):
+        """
+        登记预估的内存占用，超出上限时阻塞直到其他文档释放；没有其他文档在运行时总是立即通过
+        参数:
+            nbytes: 预估字节数
+            control: 任务控制（JobControl），等待期间取消时抛出 JobCancelled
+            file: 日志中显示的文件名
+        返回:
+            登记的字节数（传给 release）
+        """
+        with self.condition:
+            waited = False
+            while self.in_use and not self.fits(nbytes):
+                if control and control.cancelled:
+                    raise JobCancelled()
+                if not waited:
+                    logging.info(f"内存不足，{file or '文档'} 等待其他文件完成（预估 {nbytes // MB} MB，"
+                                 f"已占用 {self.in_use // MB} MB）")
+                    waited = True
+                # 定时醒来重新检查系统可用内存
+                self.condition.wait(MEMORY_POLL_SECONDS)
+            self.in_use += nbytes
+            return nbytes
+
+    def release(self, nbytes):
+        with self.condition:
+            self.in_use = max(0, self.in_use - nbytes)
+            self.condition.notify_all()
+
+
+def create_memory_budget(settings):
+    """
+    按设置创建内存准入控制
+    参数:
+        settings: 设置字典（memory_limit_mb，0 表示按可用内存自动计算）
+    返回:
+        MemoryBudget
+    """
+    return MemoryBudget(limit_mb=settings.get("memory_limit_mb", MEMORY_LIMIT_MB))
@@ -0,0 +1,254 @@
+import io
+import os
+import json
+import time
+import socket
+import pstats
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+
+# 转换流程的各个阶段（名称用于 JSON/Prometheus 标签，中文用于日志摘要）
+STAGE_NAMES = {
+    "index": "索引元数据",   # 包含批次开始时计算所有文件的哈希
+    "hash": "计算哈希",
+    "pdfinfo": "读取页数",
+    "memory_wait": "等待内存",   # 内存准入控制下等待其他文档释放内存
+    "probe": "自适应探测",
+    "adaptive_sample": "自适应采样",
+    "render": "渲染",         # direct：pdftoppm 渲染并编码；pil：pdftoppm 渲染并由 PIL 解码
+    "encode": "图片编码",     # 仅 pil 后端
+    "rename": "重命名图片",   # 仅 direct 后端
+    "archive": "写入归档",    # 仅归档输出方式
+    "link": "链接重复输出",   # 内容相同的 PDF 直接链接已渲染的输出
+    "dedup_page": "检测重复页面",
+    "remote": "等待worker",   # 仅分布式模式：从提交任务到所有页完成
+    "cache_restore": "读取渲染缓存",
+    "cache_store": "写入渲染缓存",
+    "publish": "发布文件夹",
+    "remove_pdf": "删除源PDF",
+}
+
+PROFILE_TOP_FUNCTIONS = 30
+MAX_FILE_SUMMARIES = 1000   # 长时间运行（监视模式）时只保留最近的文件摘要
+MAX_BATCH_SUMMARIES = 100
+
+
+def timed(metrics, stage, file=None):
+    """
+    统计一个阶段的耗时；metrics 为 None 时不做任何事
+    file 使用 PDF 的完整路径，不同文件夹中的同名文件分别统计（显示时只取文件名）
+    用法:
+        with timed(self.metrics, "render", pdf_path):
+            ...
+    """
+    return metrics.stage(stage, file) if metrics else nullcontext()
+
+
+class Metrics:
+    def __init__(self, profile=False):
+        """
+        转换流程的分阶段耗时统计（线程安全，多个批次累计）
+        参数:
+            profile: 是否启用性能剖析（cProfile，按文件剖析后合并）
+        """
+        self.lock = threading.Lock()
+        self.profile = profile
+        self.stages = {}         # 阶段 -> [次数, 总秒数, 最大秒数]
+        self.files = {}          # PDF 路径 -> {阶段: 秒数}
+        self.counters = {"batches": 0, "files": 0, "files_failed": 0, "pages": 0}
+        self.batches = []        # 每个批次的摘要
+        self._profile_stats = None
+        self._profile_warned = False
+
+    @contextmanager
+    def stage(self, name, file=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, file)
+
+    def record(self, name, seconds, file=None):
+        with self.lock:
+            entry = self.stages.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            if file:
+                per_file = self.files.get(file)
+                if per_file is None:
+                    per_file = self.files[file] = {}
+                    if len(self.files) > MAX_FILE_SUMMARIES:
+                        del self.files[next(iter(self.files))]
+                per_file[name] = per_file.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def stage_totals(self):
+        with self.lock:
+            return {name: entry[1] for name, entry in self.stages.items()}
+
+    def file_summary(self, file):
+        with self.lock:
+            return dict(self.files.get(file, {}))
+
+    def begin_batch(self):
+        return time.perf_counter(), self.stage_totals(), dict(self.counters)
+
+    def end_batch(self, token):
+        """
+        结束一个批次，记录本批次的耗时分布
+        参数:
+            token: begin_batch 的返回值
+        返回:
+            批次摘要字典
+        """
+        start, stage_totals, counters = token
+        wall = time.perf_counter() - start
+        self.count("batches")
+        current = self.stage_totals()
+        with self.lock:
+            summary = {
+                "finished_at": time.time(),
+                "wall_seconds": wall,
+                "files": self.counters["files"] - counters["files"],
+                "files_failed": self.counters["files_failed"] - counters["files_failed"],
+                "pages": self.counters["pages"] - counters["pages"],
+                "stages": {name: seconds - stage_totals.get(name, 0.0) for name, seconds in current.items()
+                           if seconds - stage_totals.get(name, 0.0) > 0},
+            }
+            self.batches.append(summary)
+            del self.batches[:-MAX_BATCH_SUMMARIES]
+        return summary
+
+    @staticmethod
+    def format_stages(stages):
+        # 按耗时从高到低列出各阶段（省略不足 0.01 秒的阶段）；并行时各阶段耗时之和可能大于墙钟时间
+        total = sum(stages.values()) or 1.0
+        return "，".join(f"{STAGE_NAMES.get(name, name)} {seconds:.2f}s ({seconds / total:.0%})"
+                        for name, seconds in sorted(stages.items(), key=lambda item: -item[1])
+                        if seconds >= 0.01) or "无"
+
+    @contextmanager
+    def profiled(self):
+        """
+        在剖析模式下用 cProfile 剖析一段代码（每个线程各自剖析，结束后合并）
+        """
+        if not self.profile:
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12 起同一时间只能有一个剖析器，并行时其余线程跳过
+            if not self._profile_warned:
+                self._profile_warned = True
+                logging.warning("已有剖析器在运行，部分线程未被剖析")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self.lock:
+                if self._profile_stats is None:
+                    self._profile_stats = pstats.Stats(profiler, stream=io.StringIO())
+                else:
+                    self._profile_stats.add(profiler)
+
+    def profile_top(self, limit=PROFILE_TOP_FUNCTIONS):
+        with self.lock:
+            if self._profile_stats is None:
+                return []
+            rows = sorted(self._profile_stats.stats.items(), key=lambda item: -item[1][3])[:limit]
+        return [{"function": f"{os.path.basename(file)}:{line}({func})", "calls": calls,
+                 "total_seconds": total, "cumulative_seconds": cumulative}
+                for (file, line, func), (_, calls, total, cumulative, _) in rows]
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "host": socket.gethostname(),
+                "pid": os.getpid(),
+                "updated_at": time.time(),
+                "counters": dict(self.counters),
+                "stages": {name: {"count": count, "seconds": seconds, "max_seconds": max_seconds}
+                           for name, (count, seconds, max_seconds) in self.stages.items()},
+                "files": {file: dict(stages) for file, stages in self.files.items()},
+                "batches": list(self.batches),
+            }
+
+    def to_prometheus(self):
+        """
+        生成 Prometheus 文本格式（可由 node_exporter 的 textfile collector 从共享目录采集）
+        """
+        snapshot = self.snapshot()
+        host = snapshot["host"].replace("\\", "\\\\").replace('"', '\\"')
+        lines = [
+            "# HELP pdf_organizer_stage_seconds_total Total seconds spent in each conversion stage.",
+            "# TYPE pdf_organizer_stage_seconds_total counter",
+        ]
+        for name, stage in sorted(snapshot["stages"].items()):
+            lines.append(f'pdf_organizer_stage_seconds_total{{host="{host}",stage="{name}"}} {stage["seconds"]:.6f}')
+        lines += ["# HELP pdf_organizer_stage_calls_total Number of times each conversion stage ran.",
+                  "# TYPE pdf_organizer_stage_calls_total counter"]
+        for name, stage in sorted(snapshot["stages"].items()):
+            lines.append(f'pdf_organizer_stage_calls_total{{host="{host}",stage="{name}"}} {stage["count"]}')
+        lines += ["# HELP pdf_organizer_stage_max_seconds Longest single run of each conversion stage.",
+                  "# TYPE pdf_organizer_stage_max_seconds gauge"]
+        for name, stage in sorted(snapshot["stages"].items()):
+            lines.append(f'pdf_organizer_stage_max_seconds{{host="{host}",stage="{name}"}} {stage["max_seconds"]:.6f}')
+        for name, value in sorted(snapshot["counters"].items()):
+            lines += [f"# TYPE pdf_organizer_{name}_total counter",
+                      f'pdf_organizer_{name}_total{{host="{host}"}} {value}']
+        if snapshot["batches"]:
+            last = snapshot["batches"][-1]
+            lines += ["# TYPE pdf_organizer_last_batch_seconds gauge",
+                      f'pdf_organizer_last_batch_seconds{{host="{host}"}} {last["wall_seconds"]:.6f}',
+                      "# TYPE pdf_organizer_last_batch_timestamp_seconds gauge",
+                      f'pdf_organizer_last_batch_timestamp_seconds{{host="{host}"}} {last["finished_at"]:.0f}']
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory):
+        """
+        导出统计数据到目录（原子替换，采集方不会读到写了一半的文件）
+            pdf_organizer_{主机名}.json   - 完整统计（含每个文件、每个批次的摘要和剖析结果）
+            pdf_organizer_{主机名}.prom   - Prometheus 文本格式
+            pdf_organizer_{主机名}.prof   - 剖析模式下的 cProfile 数据（可用 pstats/snakeviz 查看）
+        参数:
+            directory: 导出目录（可以是多台机器共享的目录）
+        """
+        os.makedirs(directory, exist_ok=True)
+        host = socket.gethostname()
+        snapshot = self.snapshot()
+        if self.profile:
+            snapshot["profile"] = self.profile_top()
+        _write_atomic(os.path.join(directory, f"pdf_organizer_{host}.json"), json.dumps(snapshot, ensure_ascii=False, indent=2))
+        _write_atomic(os.path.join(directory, f"pdf_organizer_{host}.prom"), self.to_prometheus())
+        with self.lock:
+            if self._profile_stats is not None:
+                self._profile_stats.dump_stats(os.path.join(directory, f"pdf_organizer_{host}.prof"))
+        logging.info(f"已导出统计数据到: {directory}")
+
+
+def _write_atomic(path, text):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def create_metrics(settings):
+    """
+    按设置创建统计对象
+    参数:
+        settings: 设置字典（profile_mode 开关）
+    返回:
+        Metrics
+    """
+    return Metrics(profile=settings.get("profile_mode", False))
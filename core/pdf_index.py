@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pdf2image import pdfinfo_from_path
+from config import PDF_INDEX_MAX_ENTRIES, CLASSIFY_SAMPLE_PAGES, TEXT_CHARS_PER_PAGE
+from utils import get_app_data_dir, file_sha256
+
+INDEX_FILE = "pdf_index.json"
+INDEX_VERSION = 1
+
+# pdfinfo 会把超出范围的末页截到实际页数，用一个足够大的值一次取得所有页的尺寸
+_LAST_PAGE = 2 ** 31 - 1
+_PAGE_SIZE_KEY = re.compile(r"^Page\s+(\d+) size$")
+_PAGE_SIZE_VALUE = re.compile(r"^([\d.]+) x ([\d.]+)")
+
+# page_count: 页数；page_sizes: 每页 (宽, 高)，单位为点；encrypted: 是否加密
+# doc_class: 文档类型（"text"/"scanned"，见 core.rasterizer.DOC_CLASSES；未分类时为 None）
+# content_hash: 文件内容哈希（经 PdfIndex 读取时才有）
+PdfInfo = namedtuple("PdfInfo", ["page_count", "page_sizes", "encrypted", "doc_class", "content_hash"],
+                     defaults=(None, None))
+
+
+def read_pdf_info(pdf_path, poppler_path=None):
+    """
+    用一次 pdfinfo 调用读取页数、每页尺寸和加密状态
+    参数:
+        pdf_path: PDF文件路径
+        poppler_path: Poppler的bin目录（None表示使用系统PATH）
+    返回:
+        PdfInfo
+    """
+    info = pdfinfo_from_path(pdf_path, poppler_path=poppler_path, first_page=1, last_page=_LAST_PAGE)
+    sizes = {}
+    for key, value in info.items():
+        key_match = _PAGE_SIZE_KEY.match(key)
+        value_match = _PAGE_SIZE_VALUE.match(str(value))
+        if key_match and value_match:
+            sizes[int(key_match.group(1))] = (float(value_match.group(1)), float(value_match.group(2)))
+    page_count = int(info["Pages"])
+    encrypted = str(info.get("Encrypted", "no")).lower().startswith("yes")
+    return PdfInfo(page_count, [sizes[page] for page in sorted(sizes)], encrypted)
+
+
+def classify_document(pdf_path, page_count, poppler_path=None):
+    """
+    按前几页可提取的文字量判断文档类型：文字多的是矢量文字文档，几乎没有文字的是扫描件
+    参数:
+        pdf_path: PDF文件路径
+        page_count: 页数
+        poppler_path: Poppler的bin目录
+    返回:
+        "text"、"scanned"，无法判断（如缺少 pdftotext）时返回 None
+    """
+    from core.converter import poppler_command, run_poppler
+    last_page = max(1, min(page_count, CLASSIFY_SAMPLE_PAGES))
+    try:
+        text = run_poppler([poppler_command("pdftotext", poppler_path), "-f", "1", "-l", str(last_page), "-q",
+                            pdf_path, "-"], poppler_path)
+    except (OSError, RuntimeError) as e:
+        logging.debug(f"无法判断 {os.path.basename(pdf_path)} 的文档类型: {str(e)}")
+        return None
+    chars = len("".join(text.decode("utf8", "ignore").split()))
+    return "text" if chars / last_page >= TEXT_CHARS_PER_PAGE else "scanned"
+
+
+def _pack_sizes(page_sizes):
+    # 游程编码：连续相同尺寸的页合并为 [宽, 高, 页数]
+    packed = []
+    for width, height in page_sizes:
+        if packed and packed[-1][0] == width and packed[-1][1] == height:
+            packed[-1][2] += 1
+        else:
+            packed.append([width, height, 1])
+    return packed
+
+
+def _unpack_sizes(packed):
+    return [(width, height) for width, height, count in packed for _ in range(count)]
+
+
+class PdfIndex:
+    def __init__(self, path=None, max_entries=PDF_INDEX_MAX_ENTRIES):
+        """
+        PDF 元数据索引：按内容哈希缓存页数、页面尺寸和加密状态，同一文件只需运行一次 pdfinfo
+        参数:
+            path: 索引文件路径（None 表示程序数据目录下的 pdf_index.json；空字符串表示只在内存中缓存）
+            max_entries: 最多保留的条目数，超出时淘汰最久未使用的条目
+        """
+        self.path = os.path.join(get_app_data_dir(), INDEX_FILE) if path is None else path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {}        # 内容哈希 -> {"page_count", "page_sizes", "encrypted", "doc_class", "used"}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"无法读取PDF元数据索引 {self.path}: {str(e)}")
+            return
+        if data.get("version") == INDEX_VERSION:
+            self.entries = data.get("entries", {})
+
+    def save(self):
+        # 先写临时文件再替换，避免崩溃时留下半个索引
+        with self.lock:
+            if not self.path or not self.dirty:
+                return
+            if len(self.entries) > self.max_entries:
+                recent = sorted(self.entries.items(), key=lambda item: item[1].get("used", 0))[-self.max_entries:]
+                self.entries = dict(recent)
+            data = json.dumps({"version": INDEX_VERSION, "entries": self.entries})
+            self.dirty = False
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning(f"无法保存PDF元数据索引: {str(e)}")
+
+    def get(self, pdf_path, poppler_path=None, classify=False):
+        """
+        读取一个PDF的元数据，索引中没有时运行 pdfinfo 并记入索引
+        参数:
+            classify: 是否同时判断文档类型（索引中尚未分类时运行一次 pdftotext）
+        返回:
+            PdfInfo
+        """
+        content_hash = file_sha256(pdf_path)
+        with self.lock:
+            entry = self.entries.get(content_hash)
+            if entry is not None:
+                entry["used"] = time.time()
+                self.dirty = True
+                info = PdfInfo(entry["page_count"], _unpack_sizes(entry["page_sizes"]), entry["encrypted"],
+                               entry.get("doc_class"), content_hash)
+                if not classify or info.doc_class is not None or info.encrypted:
+                    return info
+        if entry is None:
+            info = read_pdf_info(pdf_path, poppler_path)._replace(content_hash=content_hash)
+        if classify and not info.encrypted:
+            info = info._replace(doc_class=classify_document(pdf_path, info.page_count, poppler_path))
+        with self.lock:
+            self.entries[content_hash] = {"page_count": info.page_count, "page_sizes": _pack_sizes(info.page_sizes),
+                                          "encrypted": info.encrypted, "doc_class": info.doc_class,
+                                          "used": time.time()}
+            self.dirty = True
+        return info
+
+    def scan(self, pdf_paths, poppler_path=None, max_workers=1, control=None, classify=False):
+        """
+        并行读取一批PDF的元数据（哈希计算和 pdfinfo 都在线程池中进行），结束后保存索引
+        参数:
+            pdf_paths: PDF路径列表
+            poppler_path: Poppler的bin目录
+            max_workers: 并行数
+            control: 任务控制（JobControl），取消后不再开始新的文件
+            classify: 是否同时判断文档类型（自动选择转换后端时需要）
+        返回:
+            路径 -> PdfInfo 的字典；无法读取的文件不在其中（之后转换时再报告错误）
+        """
+        def read(pdf_path):
+            if control:
+                control.checkpoint()
+            try:
+                return pdf_path, self.get(pdf_path, poppler_path, classify)
+            except Exception as e:
+                logging.warning(f"无法读取 {os.path.basename(pdf_path)} 的元数据: {str(e)}")
+                return pdf_path, None
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="pdf-index") as executor:
+            results = dict(executor.map(read, pdf_paths))
+        self.save()
+        return {path: info for path, info in results.items() if info is not None}
+
+
+def create_pdf_index(settings):
+    """
+    按设置创建PDF元数据索引
+    参数:
+        settings: 设置字典（pdf_index 开关，关闭时只在内存中缓存）
+    返回:
+        PdfIndex
+    """
+    if not settings.get("pdf_index", True):
+        return PdfIndex(path="")
+    try:
+        return PdfIndex()
+    except OSError as e:
+        logging.warning(f"无法创建PDF元数据索引: {str(e)}")
+        return PdfIndex(path="")
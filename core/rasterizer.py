@@ -0,0 +1,94 @@
+import os
+import shutil
+import platform
+from collections import namedtuple
+from pdf2image import convert_from_path
+
+# 光栅化后端：
+#   tool         - 渲染程序："pdftoppm" 或 "pdftocairo"
+#   output       - "direct"：渲染程序直接写出 JPEG/PNG；"pil"：输出 PPM/PNG 后由 PIL 解码，编码线程池再编码
+#   thread_count - pil 输出时每个渲染窗口拆给几个渲染进程（pdf2image 的 thread_count）
+Rasterizer = namedtuple("Rasterizer", ["name", "tool", "output", "thread_count"])
+
+RASTERIZERS = {rasterizer.name: rasterizer for rasterizer in (
+    Rasterizer("direct", "pdftoppm", "direct", 1),
+    Rasterizer("pil", "pdftoppm", "pil", 1),
+    Rasterizer("pil-t2", "pdftoppm", "pil", 2),
+    Rasterizer("cairo-direct", "pdftocairo", "direct", 1),
+    Rasterizer("cairo-pil", "pdftocairo", "pil", 1),
+    Rasterizer("cairo-pil-t2", "pdftocairo", "pil", 2),
+)}
+
+# render_backend 设为 "auto" 时按文档类型使用校准结果（settings.json 的 rasterizers）
+AUTO_BACKEND = "auto"
+# 文档类型：text - 矢量文字为主；scanned - 扫描件/图片为主
+DOC_CLASSES = ("text", "scanned")
+# 预览只需要 PIL 图像，校准结果中单独记录预览使用的后端
+PREVIEW_CLASS = "preview"
+
+
+def get_rasterizer(name):
+    """
+    返回:
+        名称对应的 Rasterizer
+    """
+    if name not in RASTERIZERS:
+        raise ValueError(f"未知的转换后端: {name}")
+    return RASTERIZERS[name]
+
+
+def tool_available(tool, poppler_path=None):
+    if platform.system() == "Windows":
+        tool += ".exe"
+    if poppler_path:
+        return os.path.exists(os.path.join(poppler_path, tool))
+    return shutil.which(tool) is not None
+
+
+def available_rasterizers(poppler_path=None):
+    """
+    返回:
+        本机可用的光栅化后端列表（渲染程序存在）
+    """
+    tools = {tool: tool_available(tool, poppler_path) for tool in {r.tool for r in RASTERIZERS.values()}}
+    return [rasterizer for rasterizer in RASTERIZERS.values() if tools[rasterizer.tool]]
+
+
+def resolve_backend(backend, choices=None, doc_class=None, fallback="direct"):
+    """
+    解析实际使用的后端名称
+    参数:
+        backend: 设置中的 render_backend（后端名称或 "auto"）
+        choices: 校准结果（文档类型 -> 后端名称）
+        doc_class: 文档类型（见 DOC_CLASSES，未知时为 None）
+        fallback: 未校准或没有该类型的结果时使用的后端
+    返回:
+        后端名称
+    """
+    if backend != AUTO_BACKEND:
+        return backend
+    choice = (choices or {}).get(doc_class) if doc_class else None
+    if choice is None and choices:
+        # 文档类型未知时使用任一已校准的结果（优先文字类）
+        choice = next((choices[name] for name in DOC_CLASSES if name in choices), None)
+    return choice if choice in RASTERIZERS else fallback
+
+
+def rasterize_image(pdf_path, page, size, poppler_path=None, backend="pil", dpi=None):
+    """
+    把一页渲染为 PIL 图像（预览、缩略图使用），只采用后端的渲染程序
+    参数:
+        pdf_path: PDF文件路径
+        page: 页码
+        size: 输出尺寸（与 pdf2image 的 size 参数含义一致）
+        poppler_path: Poppler的bin目录
+        backend: 后端名称
+        dpi: 渲染DPI（None 时使用 pdf2image 的默认值）
+    返回:
+        PIL Image
+    """
+    rasterizer = RASTERIZERS.get(backend, RASTERIZERS["pil"])
+    options = {"dpi": dpi} if dpi else {}
+    images = convert_from_path(pdf_path, first_page=page, last_page=page, size=size, poppler_path=poppler_path,
+                               use_pdftocairo=rasterizer.tool == "pdftocairo", **options)
+    return images[0]
@@ -0,0 +1,207 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from config import RENDER_CACHE_MAX_MB
+from utils import get_app_data_dir
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class RenderCache:
+    def __init__(self, directory=None, max_mb=RENDER_CACHE_MAX_MB):
+        """
+        持久化的磁盘渲染缓存，按（文件内容哈希, 页码, DPI, 尺寸, 后端…）寻址
+        预览和正式转换共用；超过容量上限时按最近使用时间（文件修改时间）淘汰
+        参数:
+            directory: 缓存目录（None 表示程序数据目录下的 render_cache）
+            max_mb: 容量上限（MB）
+        """
+        self.directory = directory or get_app_data_dir("render_cache")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        self.total_bytes = None  # 首次写入时扫描一次，之后增量维护
+        self.evicting = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(content_hash, page, dpi, size, backend, **extra):
+        """
+        生成缓存键
+        参数:
+            content_hash: PDF内容哈希
+            page: 页码
+            dpi: 渲染DPI
+            size: 输出尺寸（None 表示按DPI）
+            backend: 渲染后端或用途（如 "preview"）
+            extra: 其他影响输出的参数（如 quality）
+        返回:
+            十六进制键
+        """
+        fields = {"hash": content_hash, "page": page, "dpi": dpi, "size": list(size) if size else None,
+                  "backend": backend}
+        fields.update(extra)
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, key[:2], key + ext)
+
+    def get(self, key, ext=".jpg"):
+        """
+        查找缓存项，命中时刷新其最近使用时间
+        返回:
+            缓存文件路径，未命中时返回 None
+        """
+        path = self._path(key, ext)
+        try:
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return path
+
+    def copy_to(self, key, dest_path, ext=".jpg"):
+        """
+        命中时把缓存文件复制到目标路径
+        返回:
+            是否命中
+        """
+        path = self.get(key, ext)
+        if path is None:
+            return False
+        try:
+            shutil.copyfile(path, dest_path)
+            return True
+        except OSError as e:
+            logging.warning(f"读取渲染缓存失败: {str(e)}")
+            return False
+
+    def put_file(self, key, source_path, ext=".jpg"):
+        """
+        把已生成的文件放入缓存（先写临时文件再替换，并发写入同一键是安全的）
+        """
+        path = self._path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.copyfile(source_path, temp_path)
+            replaced_bytes = _file_size(path)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"写入渲染缓存失败: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self._account(os.path.getsize(path) - replaced_bytes)
+
+    def put_image(self, key, image, ext=".png", **save_options):
+        """
+        把PIL图像编码后放入缓存
+        """
+        path = self._path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            image.save(temp_path, format=ext.lstrip(".").upper().replace("JPG", "JPEG"), **save_options)
+            replaced_bytes = _file_size(path)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"写入渲染缓存失败: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self._account(os.path.getsize(path) - replaced_bytes)
+
+    def _scan(self):
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                # 跳过其他线程或进程正在写入的临时文件
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _account(self, added_bytes):
+        # 扫描目录和淘汰都不持有锁，其他线程的读写不必等待磁盘遍历
+        with self.lock:
+            scan = self.total_bytes is None
+        if scan:
+            total = sum(size for _, size, _ in self._scan())
+            with self.lock:
+                self.total_bytes = total
+        else:
+            with self.lock:
+                self.total_bytes += added_bytes
+        with self.lock:
+            evict = self.total_bytes > self.max_bytes and not self.evicting
+            if evict:
+                self.evicting = True
+        if evict:
+            try:
+                self._evict()
+            finally:
+                with self.lock:
+                    self.evicting = False
+
+    def _evict(self):
+        # 淘汰到容量上限的 90%，避免每次写入都触发扫描
+        with self.lock:
+            accounted = self.total_bytes
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        removed = 0
+        freed = 0
+        for _, size, path in entries:
+            if total - freed <= target:
+                break
+            try:
+                os.remove(path)
+                freed += size
+                removed += 1
+            except OSError:
+                continue
+        with self.lock:
+            # 以扫描结果为准，再加上扫描之后其他线程写入的增量
+            self.total_bytes = max(0, total - freed + self.total_bytes - accounted)
+        logging.info(f"渲染缓存淘汰 {removed} 项，当前占用 {(total - freed) / 1024 / 1024:.1f} MB")
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def create_render_cache(settings):
+    """
+    按设置创建渲染缓存
+    参数:
+        settings: 设置字典（render_cache 开关，默认关闭；render_cache_mb 容量）
+    返回:
+        RenderCache，设置中关闭缓存或缓存目录不可用时返回 None
+    """
+    if not settings.get("render_cache", False):
+        return None
+    try:
+        return RenderCache(max_mb=settings.get("render_cache_mb", RENDER_CACHE_MAX_MB))
+    except OSError as e:
+        logging.warning(f"无法创建渲染缓存: {str(e)}")
+        return None
@@ -0,0 +1,163 @@
+import heapq
+import itertools
+import logging
+import threading
+from core.control import JobControl, JobCancelled
+from core.events import JOB_QUEUED, JOB_STARTED, JOB_FINISHED, ConsoleEventSink
+
+# 任务优先级：数值越小越先执行，同一优先级按提交顺序执行
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 10
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, job_id, pdf_files, priority=PRIORITY_NORMAL, **options):
+        """
+        一个排队的批量整理任务
+        参数:
+            job_id: 任务编号
+            pdf_files: PDF条目列表
+            priority: 优先级（PRIORITY_URGENT 可插队到普通任务之前）
+            options: 传给 BatchEngine.run 的其他参数（use_original_name, keep_source 等）
+        """
+        self.id = job_id
+        self.pdf_files = list(pdf_files)
+        self.priority = priority
+        self.options = options
+        self.control = JobControl()
+        self.status = QUEUED
+        self.result = None
+
+    @property
+    def paused(self):
+        return self.control.paused
+
+
+class JobScheduler:
+    def __init__(self, engine_factory, events=None):
+        """
+        批量任务调度器：任务按优先级排队，由一个后台线程依次执行
+        同一时间只运行一个批量任务，任务内部仍由 BatchEngine 并行处理多个PDF
+        参数:
+            engine_factory: engine_factory(control) -> BatchEngine，为每个任务创建引擎
+            events: 进度事件接收端
+        """
+        self.engine_factory = engine_factory
+        self.events = events or ConsoleEventSink()
+        self._heap = []
+        self._counter = itertools.count(1)
+        self._condition = threading.Condition()
+        self._jobs = {}
+        self._current = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="job-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, pdf_files, priority=PRIORITY_NORMAL, **options):
+        with self._condition:
+            job_id = next(self._counter)
+            job = Job(job_id, pdf_files, priority, **options)
+            self._jobs[job_id] = job
+            heapq.heappush(self._heap, (priority, job_id))
+            self._condition.notify()
+        self.events.emit(JOB_QUEUED, None, f"任务 #{job_id} 已加入队列（{len(job.pdf_files)} 个 PDF 文件）",
+                         job_id=job_id, priority=priority)
+        logging.info(f"任务 #{job_id} 已加入队列，优先级: {priority}")
+        return job
+
+    def get(self, job_id):
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    @property
+    def current(self):
+        return self._current
+
+    def pending(self):
+        with self._condition:
+            return [self._jobs[job_id] for _, job_id in sorted(self._heap)]
+
+    def busy(self):
+        with self._condition:
+            return self._current is not None or bool(self._heap)
+
+    def pause(self, job_id):
+        # 只能暂停运行中的任务，暂停的任务不会阻塞在队列里挡住后面的任务
+        job = self.get(job_id)
+        if job and job.status == RUNNING:
+            job.control.pause()
+            logging.info(f"任务 #{job_id} 已暂停")
+
+    def resume(self, job_id):
+        job = self.get(job_id)
+        if job:
+            job.control.resume()
+            logging.info(f"任务 #{job_id} 已继续")
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job and job.status in (QUEUED, RUNNING):
+            # 排队中的任务在出队时直接跳过；运行中的任务在下一页之前停止，poppler 子进程立即结束
+            job.control.cancel()
+            logging.info(f"任务 #{job_id} 已取消")
+
+    def cancel_all(self):
+        with self._condition:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            self.cancel(job.id)
+
+    def shutdown(self, wait=True, timeout=None):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self.cancel_all()
+        if wait:
+            self._thread.join(timeout)
+
+    def _next_job(self):
+        with self._condition:
+            while not self._heap and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return None
+            _, job_id = heapq.heappop(self._heap)
+            job = self._jobs[job_id]
+            self._current = job
+            return job
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self._run_job(job)
+            finally:
+                with self._condition:
+                    self._current = None
+
+    def _run_job(self, job):
+        if job.control.cancelled:
+            job.status = CANCELLED
+        else:
+            job.status = RUNNING
+            self.events.emit(JOB_STARTED, None, f"开始执行任务 #{job.id}", job_id=job.id)
+            try:
+                engine = self.engine_factory(job.control)
+                job.result = engine.run(job.pdf_files, **job.options)
+                job.status = CANCELLED if job.control.cancelled else DONE
+            except JobCancelled:
+                job.status = CANCELLED
+            except Exception as e:
+                job.status = FAILED
+                logging.error(f"任务 #{job.id} 失败: {str(e)}")
+        self.events.emit(JOB_FINISHED, None, None, job_id=job.id, status=job.status)
+        logging.info(f"任务 #{job.id} 结束，状态: {job.status}")
@@ -0,0 +1,77 @@
+import json
+import logging
+from config import (PDF_DPI, JPEG_QUALITY, RENDER_BACKEND, MAX_WORKERS, RENDER_CACHE_MAX_MB, PREVIEW_CACHE_MB,
+                    ADAPTIVE_TEXT_DPI, ADAPTIVE_TEXT_QUALITY, OUTPUT_FORMAT, JPEG_OPTIMIZE, JPEG_PROGRESSIVE,
+                    ENCODER_WORKERS, ARCHIVE_MODE, MEMORY_LIMIT_MB, DEDUP_LINK_MODE,
+                    LOG_MAX_MB, LOG_BACKUP_COUNT)
+
+SETTINGS_FILE = "settings.json"
+
+# settings.json 中缺失的键使用这里的默认值
+DEFAULT_SETTINGS = {
+    "use_original_name": True,
+    "skip_sorting": False,
+    "keep_source_pdf": False,
+    "pdf_dpi": PDF_DPI,
+    "jpeg_quality": JPEG_QUALITY,
+    "output_format": OUTPUT_FORMAT,
+    "jpeg_optimize": JPEG_OPTIMIZE,
+    "jpeg_progressive": JPEG_PROGRESSIVE,
+    "encoder_workers": ENCODER_WORKERS,
+    "archive_mode": ARCHIVE_MODE,
+    "render_backend": RENDER_BACKEND,
+    "rasterizers": {},        # 本机校准结果（文档类型 -> 后端名称），由 cli.py calibrate 写入，render_backend 为 "auto" 时使用
+    "max_workers": MAX_WORKERS,
+    "memory_limit_mb": MEMORY_LIMIT_MB,
+    "render_cache": False,    # 磁盘渲染缓存（每页保存一份副本，占用最多 render_cache_mb），需要时开启
+    "render_cache_mb": RENDER_CACHE_MAX_MB,
+    "pdf_index": True,
+    "dedup": True,            # 内容相同的 PDF 只渲染一次，其余文件链接其输出
+    "dedup_pages": False,     # 是否按图片内容检测重复页面（每页多计算一次哈希）
+    "dedup_link": DEDUP_LINK_MODE,
+    "preview_cache_mb": PREVIEW_CACHE_MB,
+    "adaptive_render": False,
+    "adaptive_text_dpi": ADAPTIVE_TEXT_DPI,
+    "adaptive_text_quality": ADAPTIVE_TEXT_QUALITY,
+    "metrics_dir": "",        # 非空时每个批次结束后把统计数据导出到该目录（JSON 和 Prometheus 文本）
+    "profile_mode": False,    # 是否用 cProfile 剖析转换过程（有额外开销，仅排查性能问题时开启）
+    "log_file": "",           # 日志文件路径，空字符串表示程序数据目录下的 logs/pdf_organizer.log
+    "log_level": "INFO",      # DEBUG 时记录每一页的生成信息
+    "log_json": False,        # 日志文件是否使用 JSON lines 格式（批次统计等结构化字段可直接解析）
+    "log_max_mb": LOG_MAX_MB,
+    "log_backups": LOG_BACKUP_COUNT,
+}
+
+
+def load_settings(path=SETTINGS_FILE):
+    """
+    读取设置文件，并用默认值补齐缺失的键
+    参数:
+        path: 设置文件路径
+    返回:
+        设置字典
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(path, "r") as f:
+            settings.update(json.load(f))
+    except FileNotFoundError:
+        logging.info(f"未找到设置文件 {path}，使用默认设置")
+    return settings
+
+
+def save_settings(settings, path=SETTINGS_FILE):
+    """
+    保存设置，与文件中已有的键合并，避免覆盖本次未修改的设置
+    参数:
+        settings: 要保存的设置（可以只包含部分键）
+        path: 设置文件路径
+    返回:
+        合并后的完整设置字典
+    """
+    merged = load_settings(path)
+    merged.update(settings)
+    with open(path, "w") as f:
+        json.dump(merged, f)
+    return merged
+
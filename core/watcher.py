@@ -0,0 +1,121 @@
+import os
+import time
+import logging
+
+
+def is_pdf(path):
+    return path.lower().endswith(".pdf")
+
+
+def collect_pdfs(paths, recursive=False):
+    """
+    从文件和目录参数中收集PDF文件
+    参数:
+        paths: 文件或目录路径列表
+        recursive: 是否递归子目录
+    返回:
+        PDF路径列表（目录中的文件按名称排序，保持参数顺序）
+    """
+    pdf_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            if recursive:
+                found = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names if is_pdf(name)]
+            else:
+                found = [entry.path for entry in os.scandir(path) if entry.is_file() and is_pdf(entry.name)]
+            pdf_files.extend(sorted(found))
+        elif os.path.isfile(path) and is_pdf(path):
+            pdf_files.append(path)
+        else:
+            logging.warning(f"跳过非 PDF 路径: {path}")
+    return pdf_files
+
+
+def next_folder_index(directory):
+    """
+    根据目录中已有的 index.filename 文件夹和未完成的临时文件夹 .index.filename.part 计算下一个序号
+    （失败的文档留下的临时文件夹也占用序号，否则新文档可能复用该序号并继续写入旧的临时文件夹）
+    参数:
+        directory: 输出目录
+    返回:
+        下一个可用序号
+    """
+    highest = 0
+    for entry in os.scandir(directory):
+        if entry.is_dir():
+            name = entry.name
+            if name.startswith(".") and name.endswith(".part"):
+                name = name[1:]
+            prefix = name.split(".", 1)[0]
+            if prefix.isdigit():
+                highest = max(highest, int(prefix))
+    return highest + 1
+
+
+def _is_readable(path):
+    # Windows 上仍在写入的文件通常无法打开；其他平台依赖大小和修改时间的稳定判断
+    try:
+        with open(path, "rb"):
+            return True
+    except OSError:
+        return False
+
+
+class FolderWatcher:
+    def __init__(self, directory, settle_seconds=5.0):
+        """
+        轮询监视目录中新出现的PDF，文件大小和修改时间在 settle_seconds 内保持不变才视为写入完成
+        参数:
+            directory: 监视的目录（不含子目录，避免把输出文件夹中的PDF当作新文件）
+            settle_seconds: 判定写入完成所需的稳定时长（秒）
+        """
+        self.directory = directory
+        self.settle_seconds = settle_seconds
+        self.pending = {}      # 路径 -> (大小, 修改时间, 首次观察到该状态的时间)
+        self.handled = set()   # 已交给处理的 (路径, 大小, 修改时间)
+
+    def prime(self):
+        """
+        把目录中当前已有的PDF标记为已处理，只处理之后新出现的文件
+        """
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and is_pdf(entry.name):
+                stat = entry.stat()
+                self.handled.add((entry.path, stat.st_size, stat.st_mtime))
+
+    def poll(self):
+        """
+        扫描一次目录
+        返回:
+            本次判定为写入完成的PDF路径列表（按名称排序）
+        """
+        now = time.monotonic()
+        ready = []
+        seen = set()
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or not is_pdf(entry.name):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            seen.add(entry.path)
+            state = (stat.st_size, stat.st_mtime)
+            if (entry.path,) + state in self.handled:
+                continue
+
+            previous = self.pending.get(entry.path)
+            if previous is None or previous[:2] != state:
+                self.pending[entry.path] = state + (now,)
+                continue
+            if stat.st_size > 0 and now - previous[2] >= self.settle_seconds and _is_readable(entry.path):
+                ready.append(entry.path)
+                self.handled.add((entry.path,) + state)
+                del self.pending[entry.path]
+
+        # 已被移走或删除的文件不再跟踪
+        for path in list(self.pending):
+            if path not in seen:
+                del self.pending[path]
+        self.handled = {item for item in self.handled if item[0] in seen}
+        return sorted(ready)
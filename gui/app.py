@@ -1,18 +1,18 @@
 import os
-import shutil
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 import ttkbootstrap as ttkb
 from ttkbootstrap.style import Style
-from pdf2image import convert_from_path
-import threading
-import queue
-import json
 import logging
-from config import WINDOW_SIZES, DEFAULT_FONT, BASE_FONT_SIZE, DPI_BASE, A4_SIZE, PDF_DPI, JPEG_QUALITY
+from config import (WINDOW_SIZES, DEFAULT_FONT, BASE_FONT_SIZE, DPI_BASE, RENDER_BACKEND, MAX_WORKERS, PDF_DPI,
+                    JPEG_QUALITY, ENCODER_WORKERS, LOG_MAX_LINES, UI_TICK_MS, ERROR_DIALOG_MAX_LINES)
 from utils import center_window, get_poppler_path, log_error
-from gui.settings_dialog import SettingsDialog
-from gui.sort_rename_dialog import SortRenameDialog
+from core.events import (EventBus, ProgressTracker, BATCH_STARTED, PAGE_DONE, ERROR, LOG, BATCH_DONE,
+                         JOB_FINISHED)
+from core.scheduler import JobScheduler, PRIORITY_NORMAL, PRIORITY_URGENT
+from core.settings import load_settings
+from core.render_cache import create_render_cache
+from core.metrics import create_metrics
 
 class PDFOrganizerApp:
     def __init__(self, root):
@@ -37,6 +37,7 @@ class PDFOrganizerApp:
             style.configure("Custom.TButton", font=(DEFAULT_FONT, self.scaled_font_size, "normal"))
             style.configure("Custom.TLabel", font=(DEFAULT_FONT, self.scaled_font_size, "normal"))
             style.configure("Custom.TCheckbutton", font=(DEFAULT_FONT, self.scaled_font_size, "normal"))
+            style.configure("Custom.TRadiobutton", font=(DEFAULT_FONT, self.scaled_font_size, "normal"))
             style.configure("Custom.TEntry", font=(DEFAULT_FONT, self.scaled_font_size, "normal"))
 
             # 尝试设置窗口图标
@@ -45,12 +46,19 @@ class PDFOrganizerApp:
             except tk.TclError:
                 logging.warning("未能加载 pdf.ico，可能文件不存在或路径错误")
 
-            self.progress_queue = queue.Queue()
+            # 后台线程只向事件总线发事件，所有控件更新都在主线程的 check_queue 中完成
+            self.events = EventBus()
+            self.progress_tracker = ProgressTracker()
+            self.batch_errors = []   # 当前批次中转换失败的 (文件, 错误)，批次结束时一并显示
+            self.pdf_index = None
             self.logger = logging.getLogger()
-            self.poppler_path = get_poppler_path()
-            if self.poppler_path is None:
-                self.progress_queue.put("警告: 未找到 Poppler 的 bin 目录，将尝试使用系统 PATH。")
+            # Poppler 目录在第一次转换或预览时才查找，不拖慢窗口显示
+            self._poppler_path = None
+            self._poppler_resolved = False
             self.load_settings()
+            self.render_cache = create_render_cache(self.settings)
+            self.metrics = create_metrics(self.settings)
+            self.scheduler = JobScheduler(self.create_engine, events=self.events)
 
             # 创建主框架
             main_frame = ttkb.Frame(self.root, padding=10)
@@ -74,6 +82,19 @@ class PDFOrganizerApp:
             self.settings_button.pack(side=tk.LEFT, padx=5)
             logging.info("创建并添加 '命名和排序设置' 按钮")
 
+            # 创建“取消”和“暂停/继续”按钮，作用于正在运行的任务
+            self.cancel_button = ttkb.Button(button_frame, text="取消", command=self.cancel_job,
+                                             bootstyle="danger", width=8, style="Custom.TButton", state="disabled")
+            self.cancel_button.pack(side=tk.RIGHT, padx=5)
+            self.pause_button = ttkb.Button(button_frame, text="暂停", command=self.toggle_pause,
+                                            bootstyle="warning", width=8, style="Custom.TButton", state="disabled")
+            self.pause_button.pack(side=tk.RIGHT, padx=5)
+            # 任务列表：查看排队中的任务并单独取消
+            self.jobs_button = ttkb.Button(button_frame, text="任务列表", command=self.open_jobs,
+                                           bootstyle="info", width=10, style="Custom.TButton")
+            self.jobs_button.pack(side=tk.RIGHT, padx=5)
+            logging.info("创建并添加 '暂停' 和 '取消' 按钮")
+
             # 创建输出文本框
             self.output_text = scrolledtext.ScrolledText(main_frame, height=15, width=60, 
                                                          font=(DEFAULT_FONT, self.scaled_font_size, "normal"))
@@ -89,6 +110,8 @@ class PDFOrganizerApp:
             center_window(self.root)
             logging.info("居中主窗口")
 
+            self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
             # 启动队列检查
             self.check_queue()
             logging.info("启动队列检查")
@@ -96,143 +119,234 @@ class PDFOrganizerApp:
         except Exception as e:
             log_error(f"PDFOrganizerApp 初始化失败: {str(e)}")
 
+    @property
+    def poppler_path(self):
+        if not self._poppler_resolved:
+            self._poppler_path = get_poppler_path()
+            self._poppler_resolved = True
+            if self._poppler_path is None:
+                self.events.emit(LOG, message="警告: 未找到 Poppler 的 bin 目录，将尝试使用系统 PATH。")
+        return self._poppler_path
+
     def load_settings(self):
         try:
-            with open("settings.json", "r") as f:
-                self.settings = json.load(f)
-        except FileNotFoundError:
-            self.settings = {
-                "use_original_name": True,
-                "skip_sorting": False,
-                "keep_source_pdf": False
-            }
+            self.settings = load_settings()
         except Exception as e:
             log_error(f"load_settings 失败: {str(e)}")
 
     def open_settings(self):
         try:
             self.logger.info("打开设置窗口")
+            from gui.settings_dialog import SettingsDialog
             SettingsDialog(self, self.scaled_font_size)
         except Exception as e:
             log_error(f"open_settings 失败: {str(e)}")
 
+    def open_jobs(self):
+        try:
+            from gui.jobs_dialog import JobsDialog
+            JobsDialog(self, self.scaled_font_size)
+        except Exception as e:
+            log_error(f"open_jobs 失败: {str(e)}")
+
     def check_queue(self):
+        # 每个周期一次性取出积压的事件并合并处理，避免逐条刷新界面
         try:
-            while True:
-                message = self.progress_queue.get_nowait()
-                self.output_text.insert(tk.END, message + "\n")
-                self.output_text.see(tk.END)
-        except queue.Empty:
-            self.root.after(100, self.check_queue)
+            self.process_events(self.events.drain())
         except Exception as e:
             log_error(f"check_queue 失败: {str(e)}")
+        self.root.after(UI_TICK_MS, self.check_queue)
+
+    def process_events(self, events):
+        lines = []
+        finished = None
+        for event in events:
+            self.progress_tracker.update(event.kind, event.file, **event.data)
+            if event.kind == BATCH_STARTED:
+                self.output_text.delete(1.0, tk.END)
+                self.batch_errors = []
+                lines = []
+            elif event.kind == PAGE_DONE:
+                # 逐页事件只计数，不写入日志
+                continue
+            elif event.kind == ERROR:
+                # 不逐个弹出对话框，批次结束时汇总显示
+                self.batch_errors.append((event.file, event.data.get("error")))
+            elif event.kind == BATCH_DONE:
+                finished = event
+                lines.append("")
+            elif event.kind == JOB_FINISHED:
+                self.export_metrics()
+            if event.message:
+                lines.append(event.message)
+
+        if lines:
+            self.append_log(lines)
+        self.update_job_buttons()
+        if events:
+            self.update_progress(100 if finished else None)
+        if finished:
+            summary = (f"成功整理 {finished.data.get('success', 0)}/{finished.data.get('total', 0)} 个 PDF 文件，"
+                       f"生成 {finished.data.get('images', 0)} 张图片！")
+            errors, self.batch_errors = self.batch_errors, []
+            if finished.data.get("cancelled"):
+                messagebox.showinfo("已取消", f"任务已取消。{summary}")
+            elif errors:
+                self.show_conversion_errors(summary, errors)
+            else:
+                messagebox.showinfo("完成", summary)
 
-    def pdf_to_jpg(self, pdf_path, output_dir, use_original_name=False, original_name=None):
-        self.progress_queue.put(f"正在转换: {os.path.basename(pdf_path)}")
-        self.logger.info(f"正在转换: {os.path.basename(pdf_path)}")
+    def export_metrics(self):
         try:
-            images = convert_from_path(pdf_path, size=A4_SIZE, dpi=PDF_DPI, poppler_path=self.poppler_path)
-            
-            for i, image in enumerate(images, 1):
-                width, height = image.size
-                self.progress_queue.put(f"图片 {i} 尺寸: {width}x{height} 像素")
-
-                if use_original_name and original_name:
-                    image_name = os.path.splitext(original_name)[0]
-                    image_path = os.path.join(output_dir, f"{image_name}_{i}.jpg")
-                else:
-                    image_path = os.path.join(output_dir, f"{i}.jpg")
-                image.save(image_path, "JPEG", quality=JPEG_QUALITY)
-                self.progress_queue.put(f"已生成: {os.path.basename(image_path)}")
-                self.logger.info(f"已生成: {os.path.basename(image_path)}")
-            
-            return len(images)
-        except MemoryError:
-            self.progress_queue.put("内存不足，请尝试处理更小的文件")
-            self.logger.error("内存不足")
-            self.root.after(0, lambda: messagebox.showerror("内存错误", "内存不足，请尝试处理更小的文件"))
-            return 0
-        except FileNotFoundError:
-            self.progress_queue.put(f"文件 {os.path.basename(pdf_path)} 不存在")
-            self.logger.error(f"文件 {os.path.basename(pdf_path)} 不存在")
-            self.root.after(0, lambda: messagebox.showerror("文件错误", f"文件 {os.path.basename(pdf_path)} 不存在"))
-            return 0
+            if self.settings.get("metrics_dir"):
+                self.metrics.export(self.settings["metrics_dir"])
+        except Exception as e:
+            log_error(f"export_metrics 失败: {str(e)}")
+
+    def append_log(self, lines):
+        try:
+            self.output_text.insert(tk.END, "\n".join(lines) + "\n")
+            # 日志只保留最近 LOG_MAX_LINES 行，长批次下文本框不会无限增长
+            line_count = int(self.output_text.index("end-1c").split(".")[0])
+            if line_count > LOG_MAX_LINES:
+                self.output_text.delete(1.0, f"{line_count - LOG_MAX_LINES + 1}.0")
+            self.output_text.see(tk.END)
         except Exception as e:
-            self.progress_queue.put(f"转换 {os.path.basename(pdf_path)} 失败: {str(e)}")
-            self.logger.error(f"转换 {os.path.basename(pdf_path)} 失败: {str(e)}")
-            self.root.after(0, lambda: messagebox.showerror("错误", f"转换 {os.path.basename(pdf_path)} 失败: {str(e)}"))
-            return 0
+            log_error(f"append_log 失败: {str(e)}")
 
-    def organize_pdfs(self, pdf_files, use_original_name=False):
+    def update_progress(self, percentage=None):
+        try:
+            job = self.scheduler.current
+            paused = "（已暂停）" if job and job.paused else ""
+            if percentage is None:
+                text = self.progress_tracker.format()
+            else:
+                tracker = self.progress_tracker
+                text = f"{percentage}%（{tracker.files_done}/{tracker.total_files} 个文件，已生成 {tracker.rendered} 页）"
+            self.progress["text"] = f"进度: {text}{paused}"
+        except Exception as e:
+            log_error(f"update_progress 失败: {str(e)}")
+
+    @staticmethod
+    def describe_conversion_error(pdf_file, error):
+        if isinstance(error, MemoryError):
+            return f"{pdf_file}: 内存不足，请尝试处理更小的文件"
+        if isinstance(error, FileNotFoundError):
+            return f"{pdf_file}: 文件不存在"
+        return f"{pdf_file}: {str(error)}"
+
+    def show_conversion_errors(self, summary, errors):
+        """
+        批次结束时用一个对话框汇总所有转换失败的文件（最多列出 ERROR_DIALOG_MAX_LINES 个，完整信息见日志）
+        """
+        try:
+            lines = [self.describe_conversion_error(pdf_file, error)
+                     for pdf_file, error in errors[:ERROR_DIALOG_MAX_LINES]]
+            if len(errors) > ERROR_DIALOG_MAX_LINES:
+                lines.append(f"……另有 {len(errors) - ERROR_DIALOG_MAX_LINES} 个文件失败，详见日志")
+            messagebox.showerror("部分文件转换失败", f"{summary}\n\n{len(errors)} 个文件转换失败:\n" + "\n".join(lines))
+        except Exception as e:
+            log_error(f"show_conversion_errors 失败: {str(e)}")
+
+    def create_engine(self, control):
+        # 每个任务按当时的设置创建引擎，多个 PDF 并行处理，文件夹编号仍按用户排序顺序分配
+        # 转换相关模块（pdf2image、渲染和编码）在第一个任务开始时才导入，缩短启动时间
+        from core.batch import BatchEngine
+        from core.adaptive import create_adaptive_policy
+        from core.encoder import create_encode_options
+        from core.archive import resolve_archive_mode
+        from core.pdf_index import create_pdf_index
+        from core.memory import create_memory_budget
+        from core.dedup import create_deduplicator
+        if self.pdf_index is None:
+            self.pdf_index = create_pdf_index(self.settings)
+        return BatchEngine(poppler_path=self.poppler_path,
+                           max_workers=self.settings.get("max_workers", MAX_WORKERS),
+                           backend=self.settings.get("render_backend", RENDER_BACKEND),
+                           dpi=self.settings.get("pdf_dpi", PDF_DPI),
+                           quality=self.settings.get("jpeg_quality", JPEG_QUALITY),
+                           render_cache=self.render_cache,
+                           pdf_index=self.pdf_index,
+                           rasterizers=self.settings.get("rasterizers"),
+                           memory=create_memory_budget(self.settings),
+                           dedup=create_deduplicator(self.settings),
+                           events=self.events,
+                           control=control,
+                           metrics=self.metrics,
+                           adaptive=create_adaptive_policy(self.settings),
+                           encode=create_encode_options(self.settings),
+                           encoder_workers=self.settings.get("encoder_workers") or ENCODER_WORKERS,
+                           archive_mode=resolve_archive_mode(self.settings))
+
+    def submit_job(self, pdf_files, use_original_name=False, priority=PRIORITY_NORMAL):
         try:
-            self.output_text.delete(1.0, tk.END)
-            
             if not pdf_files:
-                self.progress_queue.put("警告: 未选择任何 PDF 文件！")
+                self.events.emit(LOG, message="警告: 未选择任何 PDF 文件！")
                 self.logger.warning("未选择任何 PDF 文件")
                 return
-            
-            self.progress["text"] = "进度: 0%"
-            self.root.update_idletasks()
-            
             keep_source = self.settings.get("keep_source_pdf", False)
+            self.scheduler.submit(pdf_files, priority=priority,
+                                  use_original_name=use_original_name, keep_source=keep_source)
+            self.update_job_buttons()
+        except Exception as e:
+            log_error(f"submit_job 失败: {str(e)}")
+
+    def toggle_pause(self):
+        try:
+            job = self.scheduler.current
+            if job is None:
+                return
+            if job.paused:
+                self.scheduler.resume(job.id)
+                self.events.emit(LOG, message=f"任务 #{job.id} 已继续")
+            else:
+                self.scheduler.pause(job.id)
+                self.events.emit(LOG, message=f"任务 #{job.id} 已暂停（当前页完成后暂停）")
+            self.update_job_buttons()
+            self.update_progress()
+        except Exception as e:
+            log_error(f"toggle_pause 失败: {str(e)}")
 
-            success_count = 0
-            total_images = 0
+    def cancel_job(self):
+        try:
+            job = self.scheduler.current
+            if job is None or job.control.cancelled:
+                return
+            if messagebox.askyesno("取消任务", f"确定要取消任务 #{job.id} 吗？\n"
+                                   "本次新建的未完成工作文件夹（.序号.文件名.part）将被丢弃，源 PDF 保留在原位置。"):
+                self.scheduler.cancel(job.id)
+                self.events.emit(LOG, message=f"正在取消任务 #{job.id}...")
+                self.update_job_buttons()
+        except Exception as e:
+            log_error(f"cancel_job 失败: {str(e)}")
 
-            for index, pdf_info in enumerate(pdf_files, 1):
-                if isinstance(pdf_info, tuple):
-                    pdf_file, pdf_path = pdf_info
-                else:
-                    pdf_path = pdf_info
-                    pdf_file = os.path.basename(pdf_path)
-                
-                source_dir = os.path.dirname(pdf_path)
-                file_name = os.path.splitext(pdf_file)[0]
-                
-                # 始终创建目标文件夹
-                folder_name = f"{index}.{file_name}"
-                folder_path = os.path.join(source_dir, folder_name)
-                os.makedirs(folder_path, exist_ok=True)
-                
-                dest_path = os.path.join(folder_path, pdf_file)
-                if keep_source:
-                    shutil.copy2(pdf_path, dest_path)
-                    self.progress_queue.put(f"已复制: {pdf_file} -> {folder_name}")
-                    self.logger.info(f"已复制: {pdf_file} -> {folder_name}")
-                else:
-                    shutil.move(pdf_path, dest_path)
-                    self.progress_queue.put(f"已移动: {pdf_file} -> {folder_name}")
-                    self.logger.info(f"已移动: {pdf_file} -> {folder_name}")
-                
-                try:
-                    num_images = self.pdf_to_jpg(dest_path, folder_path, 
-                                               use_original_name=use_original_name, 
-                                               original_name=pdf_file)
-                    total_images += num_images
-                    
-                    if os.path.exists(dest_path):
-                        os.remove(dest_path)
-                        self.progress_queue.put(f"已删除目标文件夹中的 PDF: {os.path.basename(dest_path)}")
-                        self.logger.info(f"已删除目标文件夹中的 PDF: {os.path.basename(dest_path)}")
-                    else:
-                        self.logger.warning(f"目标文件夹中的 PDF 文件不存在: {dest_path}")
-                    
-                    success_count += 1
-                except Exception as e:
-                    self.progress_queue.put(f"处理 {pdf_file} 失败: {str(e)}")
-                    self.logger.error(f"处理 {pdf_file} 失败: {str(e)}")
-                
-                progress_percentage = int((index / len(pdf_files)) * 100)
-                self.progress["text"] = f"进度: {progress_percentage}%"
-                self.root.update_idletasks()
-            
-            self.progress["text"] = "进度: 100%"
-            self.progress_queue.put(f"\n处理完成！成功整理 {success_count}/{len(pdf_files)} 个 PDF 文件，生成 {total_images} 张图片。")
-            self.logger.info(f"处理完成！成功整理 {success_count}/{len(pdf_files)} 个 PDF 文件，生成 {total_images} 张图片")
-            self.root.after(0, lambda: messagebox.showinfo("完成", f"成功整理 {success_count}/{len(pdf_files)} 个 PDF 文件，生成 {total_images} 张图片！"))
+    def cancel_queued_job(self, job):
+        try:
+            self.scheduler.cancel(job.id)
+            self.events.emit(LOG, message=f"已取消排队中的任务 #{job.id}")
+        except Exception as e:
+            log_error(f"cancel_queued_job 失败: {str(e)}")
+
+    def update_job_buttons(self):
+        try:
+            job = self.scheduler.current
+            running = job is not None and not job.control.cancelled
+            self.pause_button.config(state="normal" if running else "disabled",
+                                     text="继续" if running and job.paused else "暂停")
+            self.cancel_button.config(state="normal" if running else "disabled")
+        except Exception as e:
+            log_error(f"update_job_buttons 失败: {str(e)}")
+
+    def on_close(self):
+        try:
+            if self.scheduler.busy():
+                if not messagebox.askyesno("退出", "还有任务正在处理，退出将取消所有任务。确定要退出吗？"):
+                    return
+            # 等待取消清理完成（结束 poppler 进程、删除未完成的文件夹）后再退出
+            self.scheduler.shutdown(wait=True, timeout=10)
         except Exception as e:
-            log_error(f"organize_pdfs 失败: {str(e)}")
+            log_error(f"on_close 失败: {str(e)}")
+        self.root.destroy()
 
     def start_processing(self):
         try:
@@ -241,43 +355,37 @@ class PDFOrganizerApp:
                 filetypes=[("PDF 文件", "*.pdf"), ("所有文件", "*.*")]
             )
             if files:
-                self.output_text.delete(1.0, tk.END)
-                self.progress_queue.put(f"已选择 {len(files)} 个 PDF 文件：")
+                busy = self.scheduler.busy()
+                if not busy:
+                    self.output_text.delete(1.0, tk.END)
+                self.events.emit(LOG, message=f"已选择 {len(files)} 个 PDF 文件：")
                 self.logger.info(f"已选择 {len(files)} 个 PDF 文件")
                 for file in files:
-                    self.progress_queue.put(f"{os.path.basename(file)}")
+                    self.events.emit(LOG, message=os.path.basename(file))
                     self.logger.info(f"选择文件: {os.path.basename(file)}")
                 
                 if self.settings.get("skip_sorting", False):
                     sorted_files = sorted(files)
                 else:
+                    from gui.sort_rename_dialog import SortRenameDialog
                     dialog = SortRenameDialog(self, files, self.scaled_font_size)
                     self.root.wait_window(dialog.dialog)
                     if dialog.result is None:
-                        self.output_text.delete(1.0, tk.END)
-                        self.progress_queue.put("已取消手动排序")
+                        if not busy:
+                            self.output_text.delete(1.0, tk.END)
+                        self.events.emit(LOG, message="已取消手动排序")
                         self.logger.info("已取消手动排序")
                         return
                     sorted_files = dialog.result
                 
                 use_original_name = self.settings.get("use_original_name", True)
-                
-                self.select_button.config(state="disabled")
-                
-                thread = threading.Thread(target=self.organize_pdfs, args=(sorted_files, use_original_name))
-                thread.start()
-                
-                self.root.after(100, lambda: self.check_thread(thread))
-            else:
+
+                # 已有任务在处理时，新任务可以插队到其他排队任务之前
+                priority = PRIORITY_NORMAL
+                if busy and messagebox.askyesno("任务排队", "当前有任务正在处理。是否优先处理本次选择的文件？"):
+                    priority = PRIORITY_URGENT
+                self.submit_job(sorted_files, use_original_name, priority)
+            elif not self.scheduler.busy():
                 self.output_text.delete(1.0, tk.END)
         except Exception as e:
             log_error(f"start_processing 失败: {str(e)}")
-
-    def check_thread(self, thread):
-        try:
-            if thread.is_alive():
-                self.root.after(100, lambda: self.check_thread(thread))
-            else:
-                self.select_button.config(state="normal")
-        except Exception as e:
-            log_error(f"check_thread 失败: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,111 @@
+import tkinter as tk
+import ttkbootstrap as ttkb
+from tkinter import messagebox
+from gui.base_dialog import BaseDialog
+from config import WINDOW_SIZES, DEFAULT_FONT, LISTBOX_SELECT_BG, LISTBOX_SELECT_FG, UI_TICK_MS
+from core.scheduler import PRIORITY_URGENT
+from utils import log_error
+
+# 任务列表的刷新间隔（毫秒）
+REFRESH_MS = UI_TICK_MS * 5
+
+
+class JobsDialog(BaseDialog):
+    def __init__(self, parent, scaled_font_size):
+        """
+        任务列表：显示正在运行和排队中的任务，可以暂停/继续正在运行的任务，取消任意一个任务
+        """
+        super().__init__(parent, "任务列表", WINDOW_SIZES["jobs"], scaled_font_size)
+
+        try:
+            self.jobs = []
+            self.listbox = tk.Listbox(self.dialog, font=(DEFAULT_FONT, self.scaled_font_size, "normal"),
+                                      selectbackground=LISTBOX_SELECT_BG, selectforeground=LISTBOX_SELECT_FG,
+                                      exportselection=False)
+            self.listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            self.listbox.bind("<<ListboxSelect>>", lambda event: self.update_buttons())
+
+            button_frame = ttkb.Frame(self.dialog)
+            button_frame.pack(fill=tk.X, pady=10, side=tk.BOTTOM)
+            self.pause_button = ttkb.Button(button_frame, text="暂停", command=self.toggle_pause,
+                                            bootstyle="warning", style="Custom.TButton", state="disabled")
+            self.pause_button.pack(side=tk.LEFT, padx=20)
+            self.cancel_button = ttkb.Button(button_frame, text="取消任务", command=self.cancel_job,
+                                             bootstyle="danger", style="Custom.TButton", state="disabled")
+            self.cancel_button.pack(side=tk.LEFT, padx=20)
+            ttkb.Button(button_frame, text="关闭", command=self.destroy, bootstyle="secondary",
+                        style="Custom.TButton").pack(side=tk.RIGHT, padx=20)
+
+            self.poll()
+        except Exception as e:
+            log_error(f"JobsDialog 初始化失败: {str(e)}")
+
+    def describe(self, job, running):
+        if job.control.cancelled:
+            state = "正在取消"
+        elif running:
+            state = "已暂停" if job.paused else "运行中"
+        else:
+            state = "排队中（优先）" if job.priority == PRIORITY_URGENT else "排队中"
+        return f"任务 #{job.id}  {state}  {len(job.pdf_files)} 个 PDF 文件"
+
+    def selected_job(self):
+        selection = self.listbox.curselection()
+        if not selection or selection[0] >= len(self.jobs):
+            return None
+        return self.jobs[selection[0]]
+
+    def poll(self):
+        # 对话框关闭后不再刷新
+        if self.dialog.winfo_exists():
+            self.refresh()
+            self.dialog.after(REFRESH_MS, self.poll)
+
+    def refresh(self):
+        try:
+            scheduler = self.parent.scheduler
+            selected = self.selected_job()
+            current = scheduler.current
+            self.jobs = ([current] if current else []) + scheduler.pending()
+            self.listbox.delete(0, tk.END)
+            for job in self.jobs:
+                self.listbox.insert(tk.END, self.describe(job, job is current))
+            if selected in self.jobs:
+                self.listbox.selection_set(self.jobs.index(selected))
+            if not self.jobs:
+                self.listbox.insert(tk.END, "没有正在运行或排队的任务")
+            self.update_buttons()
+        except Exception as e:
+            log_error(f"JobsDialog refresh 失败: {str(e)}")
+
+    def update_buttons(self):
+        job = self.selected_job()
+        active = job is not None and not job.control.cancelled
+        # 只有正在运行的任务可以暂停，暂停的任务不会挡住后面排队的任务
+        running = active and job is self.parent.scheduler.current
+        self.pause_button.config(state="normal" if running else "disabled",
+                                 text="继续" if running and job.paused else "暂停")
+        self.cancel_button.config(state="normal" if active else "disabled")
+
+    def toggle_pause(self):
+        try:
+            job = self.selected_job()
+            if job is None or job is not self.parent.scheduler.current:
+                return
+            self.parent.toggle_pause()
+            self.refresh()
+        except Exception as e:
+            log_error(f"JobsDialog toggle_pause 失败: {str(e)}")
+
+    def cancel_job(self):
+        try:
+            job = self.selected_job()
+            if job is None or job.control.cancelled:
+                return
+            if job is self.parent.scheduler.current:
+                self.parent.cancel_job()
+            elif messagebox.askyesno("取消任务", f"确定要取消排队中的任务 #{job.id} 吗？", parent=self.dialog):
+                self.parent.cancel_queued_job(job)
+            self.refresh()
+        except Exception as e:
+            log_error(f"JobsDialog cancel_job 失败: {str(e)}")
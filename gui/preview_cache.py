@@ -0,0 +1,68 @@
+import logging
+import threading
+from collections import OrderedDict
+from config import PREVIEW_CACHE_MB
+
+
+def image_bytes(image):
+    """
+    估算解码后图像占用的内存
+    参数:
+        image: PIL图像
+    返回:
+        字节数（宽 x 高 x 通道数）
+    """
+    return image.width * image.height * len(image.getbands())
+
+
+class PreviewCache:
+    def __init__(self, budget_mb=PREVIEW_CACHE_MB):
+        """
+        预览基准图缓存：每个文档只保留一张解码后的基准图，画布尺寸变化时由基准图缩放得到视图
+        按字节预算做LRU淘汰，线程安全
+        参数:
+            budget_mb: 内存预算（MB）
+        """
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.entries = OrderedDict()  # 键 -> (图像, 字节数)
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, image):
+        size = image_bytes(image)
+        with self.lock:
+            if key in self.entries:
+                self.used_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (image, size)
+            self.used_bytes += size
+            # 至少保留刚放入的一项，即使它本身超过预算
+            while self.used_bytes > self.budget_bytes and len(self.entries) > 1:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.used_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.used_bytes = 0
+
+    def log_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            hit_rate = self.hits / lookups * 100 if lookups else 0.0
+            logging.info(f"预览缓存: 命中 {self.hits}, 未命中 {self.misses}（命中率 {hit_rate:.1f}%）, "
+                         f"淘汰 {self.evictions}, 占用 {self.used_bytes / 1024 / 1024:.1f}/"
+                         f"{self.budget_bytes / 1024 / 1024:.0f} MB, {len(self.entries)} 项")
@@ -1,9 +1,17 @@
 import tkinter as tk
 import ttkbootstrap as ttkb
-import json
 from gui.base_dialog import BaseDialog
 from config import WINDOW_SIZES
 from utils import log_error
+from core.settings import save_settings
+from core.archive import resolve_archive_mode
+
+# 输出方式选项：(设置值, 显示文字)
+ARCHIVE_MODE_OPTIONS = (
+    ("none", "图片文件"),
+    ("zip", "ZIP（不压缩）"),
+    ("tiff", "多页 TIFF"),
+)
 
 class SettingsDialog(BaseDialog):
     def __init__(self, parent, scaled_font_size):
@@ -21,6 +29,8 @@ class SettingsDialog(BaseDialog):
             self.use_original_name_var = tk.BooleanVar(value=self.parent.settings.get("use_original_name", True))
             self.skip_sorting_var = tk.BooleanVar(value=self.parent.settings.get("skip_sorting", False))
             self.keep_source_pdf_var = tk.BooleanVar(value=self.parent.settings.get("keep_source_pdf", False))
+            self.adaptive_render_var = tk.BooleanVar(value=self.parent.settings.get("adaptive_render", False))
+            self.archive_mode_var = tk.StringVar(value=resolve_archive_mode(self.parent.settings))
 
             ttkb.Checkbutton(container, text="默认使用原文件名（多页 PDF 将添加页码后缀）", 
                              variable=self.use_original_name_var, bootstyle="info",
@@ -31,6 +41,17 @@ class SettingsDialog(BaseDialog):
             ttkb.Checkbutton(container, text="转换后保留 PDF 源文件（原位置不变）", 
                              variable=self.keep_source_pdf_var, bootstyle="info",
                              style="Custom.TCheckbutton").pack(anchor="w", pady=10)
+            ttkb.Checkbutton(container, text="自适应渲染（纯文字页降低分辨率，黑白页面使用灰度）",
+                             variable=self.adaptive_render_var, bootstyle="info",
+                             style="Custom.TCheckbutton").pack(anchor="w", pady=10)
+
+            # 输出方式：每页一个图片文件，或每个 PDF 写入一个归档文件
+            archive_frame = ttkb.Frame(container)
+            archive_frame.pack(anchor="w", pady=10)
+            ttkb.Label(archive_frame, text="输出方式：", style="Custom.TLabel").pack(side=tk.LEFT)
+            for value, text in ARCHIVE_MODE_OPTIONS:
+                ttkb.Radiobutton(archive_frame, text=text, value=value, variable=self.archive_mode_var,
+                                 bootstyle="info", style="Custom.TRadiobutton").pack(side=tk.LEFT, padx=10)
             ttkb.Button(container, text="保存", command=self.save, bootstyle="primary",
                         style="Custom.TButton").pack(anchor="center", pady=10)
 
@@ -42,11 +63,11 @@ class SettingsDialog(BaseDialog):
             settings = {
                 "use_original_name": self.use_original_name_var.get(),
                 "skip_sorting": self.skip_sorting_var.get(),
-                "keep_source_pdf": self.keep_source_pdf_var.get()
+                "keep_source_pdf": self.keep_source_pdf_var.get(),
+                "adaptive_render": self.adaptive_render_var.get(),
+                "archive_mode": self.archive_mode_var.get()
             }
-            with open("settings.json", "w") as f:
-                json.dump(settings, f)
-            self.parent.settings = settings
+            self.parent.settings = save_settings(settings)
             self.destroy()
         except Exception as e:
             log_error(f"SettingsDialog save 失败: {str(e)}")
\ No newline at end of file
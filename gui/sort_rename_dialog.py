@@ -2,17 +2,38 @@ import os
 import tkinter as tk
 import tkinter.ttk as ttk
 from tkinter import Listbox, Canvas, Toplevel, Entry
-from collections import OrderedDict  # 新增导入
+from concurrent.futures import ThreadPoolExecutor
 import ttkbootstrap as ttkb
 from ttkbootstrap.style import Style
-from pdf2image import convert_from_path
+from core.rasterizer import rasterize_image, PREVIEW_CLASS
 from PIL import Image, ImageTk
-from threading import Thread
 from gui.base_dialog import BaseDialog
-from config import WINDOW_SIZES, DEFAULT_FONT, PREVIEW_TEXT, PREVIEW_TEXT_COLOR, PREVIEW_ERROR_COLOR, LISTBOX_WIDTH, LISTBOX_HEIGHT, LISTBOX_SELECT_BG, LISTBOX_SELECT_FG, PREVIEW_DPI
-from utils import log_error
+from gui.preview_cache import PreviewCache
+from gui.thumbnail_grid import ThumbnailGrid
+from config import WINDOW_SIZES, DEFAULT_FONT, PREVIEW_TEXT, PREVIEW_TEXT_COLOR, PREVIEW_ERROR_COLOR, LISTBOX_WIDTH, LISTBOX_HEIGHT, LISTBOX_SELECT_BG, LISTBOX_SELECT_FG, PREVIEW_WORKERS, PREVIEW_PREFETCH_RADIUS, PREVIEW_BASE_SIZE, PREVIEW_CACHE_MB, THUMBNAIL_SIZE
+from utils import log_error, file_sha256
 import logging
 
+def fit_size(image_size, box):
+    """
+    计算等比缩放后能完整放入区域的尺寸
+    参数:
+        image_size: 图像的 (宽, 高)
+        box: 区域的 (最大宽, 最大高)
+    返回:
+        (宽, 高)，至少为 1x1
+    """
+    width, height = image_size
+    max_width, max_height = box
+    image_ratio = width / height
+    if image_ratio > max_width / max_height:
+        new_width = max_width
+        new_height = int(new_width / image_ratio)
+    else:
+        new_height = max_height
+        new_width = int(new_height * image_ratio)
+    return max(1, new_width), max(1, new_height)
+
 class SortRenameDialog(BaseDialog):
     def __init__(self, parent, pdf_files, scaled_font_size):
         super().__init__(parent, "排序和重命名 PDF 文件", WINDOW_SIZES["sort_rename"], scaled_font_size)
@@ -20,9 +41,14 @@ class SortRenameDialog(BaseDialog):
         try:
             self.pdf_files = [(os.path.basename(f), f) for f in pdf_files]
             self.result = None
-            self.preview_thread = None
-            self.max_cache_size = 20  # 设置缓存大小为20个图
-            self.preview_cache = OrderedDict()  # 使用OrderedDict实现LRU缓存
+            # 每个文档缓存一张基准图，画布尺寸变化时直接缩放，不再调用 poppler
+            self.preview_cache = PreviewCache(self.parent.settings.get("preview_cache_mb", PREVIEW_CACHE_MB))
+            # 预览渲染线程池：当前选中项优先，其后预取相邻项；选中项变化时取消尚未开始的旧请求
+            self.preview_executor = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix="pdf-preview")
+            self.preview_futures = []
+            self.preview_generation = 0
+            # 缩略图网格单独使用一个线程池，避免大量缩略图请求挡住当前预览
+            self.thumbnail_executor = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix="pdf-thumbnail")
 
             self.paned_window = ttk.PanedWindow(self.dialog, orient=tk.HORIZONTAL)
             self.paned_window.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -43,6 +69,11 @@ class SortRenameDialog(BaseDialog):
             self.listbox.bind("<Double-1>", self.rename_item)
             self.listbox.bind("<<ListboxSelect>>", self.show_preview)
 
+            # 缩略图网格视图：只绘制可见单元格，适合上千个文件的排序
+            self.grid_view = ThumbnailGrid(listbox_frame, self.pdf_files, self.load_thumbnail, self.scaled_font_size,
+                                           on_select=self.request_preview, on_activate=self.open_rename)
+            self.grid_visible = False
+
             canvas_frame = ttk.Frame(self.paned_window)
             self.paned_window.add(canvas_frame, weight=1)
 
@@ -65,6 +96,9 @@ class SortRenameDialog(BaseDialog):
                         style="Custom.TButton").pack(side=tk.LEFT, padx=20)
             ttkb.Button(button_frame, text="取消", command=self.cancel, bootstyle="danger",
                         style="Custom.TButton").pack(side=tk.RIGHT, padx=20)
+            self.view_button = ttkb.Button(button_frame, text="缩略图视图", command=self.toggle_view,
+                                           bootstyle="secondary", style="Custom.TButton")
+            self.view_button.pack(side=tk.LEFT, padx=20)
 
             self.drag_start_index = None
             self.current_image = None
@@ -81,14 +115,23 @@ class SortRenameDialog(BaseDialog):
             if new_width != self.canvas_width or new_height != self.canvas_height:
                 self.canvas_width = new_width
                 self.canvas_height = new_height
-                selection = self.listbox.curselection()
-                if selection and self.current_image:
-                    index = selection[0]
-                    _, pdf_path = self.pdf_files[index]
-                    self.load_preview(pdf_path)
+                index = self.current_index()
+                if index is not None and self.current_image:
+                    self.request_preview(index)
         except Exception as e:
             log_error(f"on_paned_resize 失败: {str(e)}")
 
+    def current_index(self):
+        """
+        返回:
+            当前视图（列表或缩略图网格）中的选中项位置，没有选中项时返回 None
+        """
+        if self.grid_visible:
+            index = self.grid_view.anchor
+            return index if index is not None and 0 <= index < len(self.pdf_files) else None
+        selection = self.listbox.curselection()
+        return selection[0] if selection else None
+
     def start_drag(self, event):
         try:
             self.drag_start_index = self.listbox.nearest(event.y)
@@ -133,68 +176,119 @@ class SortRenameDialog(BaseDialog):
             selection = self.listbox.curselection()
             if not selection:
                 return
-            index = selection[0]
-            _, pdf_path = self.pdf_files[index]
-
-            if not hasattr(self, 'preview_thread'):
-                self.preview_thread = None
-
-            if self.preview_thread and self.preview_thread.is_alive():
-                return
-
-            self.preview_thread = Thread(target=self.load_preview, args=(pdf_path,))
-            self.preview_thread.start()
+            self.request_preview(selection[0])
         except Exception as e:
             log_error(f"show_preview 失败: {str(e)}")
 
-    def load_preview(self, pdf_path):
+    def request_preview(self, index):
+        """
+        请求预览指定项，并在后台预取附近项的缩略图
+        参数:
+            index: 列表中的位置
+        """
+        self.preview_generation += 1
+        generation = self.preview_generation
+        for future in self.preview_futures:
+            future.cancel()  # 已经开始渲染的请求无法取消，其结果只进缓存不显示
+
+        box = (self.canvas_width - 20, self.canvas_height - 20)
+        _, pdf_path = self.pdf_files[index]
+        self.preview_futures = [self.preview_executor.submit(self.load_preview, pdf_path, box, generation)]
+        for distance in range(1, PREVIEW_PREFETCH_RADIUS + 1):
+            for neighbor in (index + distance, index - distance):
+                if 0 <= neighbor < len(self.pdf_files):
+                    self.preview_futures.append(self.preview_executor.submit(
+                        self.prefetch_preview, self.pdf_files[neighbor][1], box, generation))
+
+    def load_preview(self, pdf_path, box, generation):
         try:
-            if pdf_path in self.preview_cache:
-                self.preview_image = self.preview_cache[pdf_path]
-                self.preview_cache.move_to_end(pdf_path)
-                self.parent.root.after(0, self.update_preview)
+            if generation != self.preview_generation:
                 return
-
-            images = convert_from_path(pdf_path, dpi=PREVIEW_DPI, poppler_path=self.parent.poppler_path)
-            image = images[0]
-            self.current_image = image
-
-            max_width = self.canvas_width - 20
-            max_height = self.canvas_height - 20
-            if image.width <= 0 or image.height <= 0:
-                self.parent.root.after(0, lambda: self.update_preview_error("图像尺寸无效"))
-                logging.error("图像尺寸无效: width=%d, height=%d" % (image.width, image.height))
-                return
-
-            image_ratio = image.width / image.height
-            if max_height <= 0:
+            if box[0] <= 0 or box[1] <= 0:
                 self.parent.root.after(0, lambda: self.update_preview_error("最大高度无效"))
-                logging.error("最大高度无效: max_height=%d" % max_height)
+                logging.error("预览区域无效: %dx%d" % box)
                 return
-
-            if image_ratio > max_width / max_height:
-                new_width = max_width
-                new_height = int(new_width / image_ratio)
-            else:
-                new_height = max_height
-                new_width = int(new_height * image_ratio)
-
-            new_width = max(1, new_width)
-            new_height = max(1, new_height)
-
-            image = image.resize((new_width, new_height), Image.LANCZOS)
-            self.preview_image = ImageTk.PhotoImage(image)
-            self.preview_cache[pdf_path] = self.preview_image
-            self.preview_cache.move_to_end(pdf_path)
-            if len(self.preview_cache) > self.max_cache_size:
-                self.preview_cache.popitem(last=False)
-            self.parent.root.after(0, self.update_preview)
+            image = self.get_preview_image(pdf_path, box)
+            if generation == self.preview_generation:
+                self.parent.root.after(0, lambda: self.update_preview(image, generation))
         except Exception as e:
-            self.parent.root.after(0, lambda: self.update_preview_error(str(e)))
+            if generation == self.preview_generation:
+                self.parent.root.after(0, lambda: self.update_preview_error(str(e)))
             log_error(f"load_preview 失败: {str(e)}")
 
-    def update_preview(self):
+    def prefetch_preview(self, pdf_path, box, generation):
+        try:
+            if generation != self.preview_generation or box[0] <= 0 or box[1] <= 0:
+                return
+            self.get_base_image(pdf_path)
+        except Exception as e:
+            logging.warning(f"预取预览失败: {os.path.basename(pdf_path)}: {str(e)}")
+
+    def get_preview_image(self, pdf_path, box):
+        """
+        获取适配预览区域的第一页视图（基准图缓存 -> 磁盘渲染缓存 -> poppler）
+        参数:
+            pdf_path: PDF文件路径
+            box: 预览区域的 (最大宽, 最大高)
+        返回:
+            缩放后的PIL图像
+        """
+        base = self.get_base_image(pdf_path)
+        view_size = fit_size(base.size, box)
+        if view_size == base.size:
+            return base
+        return base.resize(view_size, Image.LANCZOS)
+
+    def get_base_image(self, pdf_path):
+        """
+        获取文档第一页的基准图（与画布尺寸无关）
+        参数:
+            pdf_path: PDF文件路径
+        返回:
+            PIL图像
+        """
+        base = self.preview_cache.get(pdf_path)
+        if base is None:
+            base = self.render_first_page(pdf_path)
+            if base.width <= 0 or base.height <= 0:
+                raise ValueError("图像尺寸无效: width=%d, height=%d" % (base.width, base.height))
+            self.preview_cache.put(pdf_path, base)
+        return base
+
+    def preview_backend(self):
+        # 校准过时使用本机预览最快的后端，否则使用 pdftoppm
+        return (self.parent.settings.get("rasterizers") or {}).get(PREVIEW_CLASS, "pil")
+
+    def render_first_page(self, pdf_path):
+        """
+        只渲染PDF第一页（长边 PREVIEW_BASE_SIZE 像素），优先从磁盘渲染缓存读取
+        参数:
+            pdf_path: PDF文件路径
+        返回:
+            PIL图像
+        """
+        render_cache = getattr(self.parent, "render_cache", None)
+        cache_key = None
+        if render_cache:
+            cache_key = render_cache.make_key(file_sha256(pdf_path), 1, None, (PREVIEW_BASE_SIZE,), "preview")
+            cached_path = render_cache.get(cache_key, ".png")
+            if cached_path:
+                with Image.open(cached_path) as cached:
+                    return cached.convert("RGB")
+
+        image = rasterize_image(pdf_path, 1, PREVIEW_BASE_SIZE, self.parent.poppler_path, self.preview_backend())
+        if render_cache:
+            render_cache.put_image(cache_key, image, ".png")
+        return image
+
+    def update_preview(self, image, generation):
         try:
+            # 后台渲染完成前对话框可能已关闭
+            if generation != self.preview_generation or not self.dialog.winfo_exists():
+                return
+            # PhotoImage 必须在主线程中创建
+            self.current_image = image
+            self.preview_image = ImageTk.PhotoImage(image)
             self.preview_canvas.delete("all")
             self.preview_canvas.create_image(self.canvas_width // 2, self.canvas_height // 2, image=self.preview_image)
         except Exception as e:
@@ -202,17 +296,96 @@ class SortRenameDialog(BaseDialog):
 
     def update_preview_error(self, error):
         try:
+            if not self.dialog.winfo_exists():
+                return
             self.preview_canvas.delete("all")
             self.preview_canvas.create_text(self.canvas_width // 2, self.canvas_height // 2, text=f"预览失败: {error}", 
                                             fill=PREVIEW_ERROR_COLOR, font=(DEFAULT_FONT, self.scaled_font_size, "normal"))
         except Exception as e:
             log_error(f"update_preview_error 失败: {str(e)}")
 
+    def toggle_view(self):
+        try:
+            if self.grid_visible:
+                # 网格中可能整块移动过条目，切回列表时按当前顺序重建
+                index = self.current_index()
+                self.grid_view.pack_forget()
+                self.listbox.delete(0, tk.END)
+                self.listbox.insert(tk.END, *[name for name, _ in self.pdf_files])
+                if index is not None:
+                    self.listbox.selection_set(index)
+                    self.listbox.see(index)
+                self.listbox.pack(fill=tk.BOTH, expand=True)
+                self.view_button.config(text="缩略图视图")
+            else:
+                selection = self.listbox.curselection()
+                self.listbox.pack_forget()
+                self.grid_view.pack(fill=tk.BOTH, expand=True)
+                if selection:
+                    self.grid_view.select({selection[0]}, selection[0])
+                    self.grid_view.see(selection[0])
+                self.grid_view.refresh()
+                self.view_button.config(text="列表视图")
+            self.grid_visible = not self.grid_visible
+        except Exception as e:
+            log_error(f"toggle_view 失败: {str(e)}")
+
+    def load_thumbnail(self, pdf_path, callback):
+        """
+        提交后台缩略图渲染
+        参数:
+            pdf_path: PDF文件路径
+            callback: 渲染完成后以PIL图像（失败时为None）调用
+        返回:
+            Future
+        """
+        def task():
+            try:
+                callback(self.render_thumbnail(pdf_path))
+            except Exception as e:
+                logging.warning(f"缩略图渲染失败: {os.path.basename(pdf_path)}: {str(e)}")
+                callback(None)
+        return self.thumbnail_executor.submit(task)
+
+    def render_thumbnail(self, pdf_path):
+        """
+        渲染第一页缩略图：优先用已缓存的预览基准图缩小，其次磁盘渲染缓存，最后调用 poppler
+        参数:
+            pdf_path: PDF文件路径
+        返回:
+            长边为 THUMBNAIL_SIZE 的PIL图像
+        """
+        base = self.preview_cache.get(pdf_path)
+        if base is not None:
+            thumbnail = base.copy()
+            thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+            return thumbnail
+
+        render_cache = getattr(self.parent, "render_cache", None)
+        cache_key = None
+        if render_cache:
+            cache_key = render_cache.make_key(file_sha256(pdf_path), 1, None, (THUMBNAIL_SIZE,), "thumbnail")
+            cached_path = render_cache.get(cache_key, ".png")
+            if cached_path:
+                with Image.open(cached_path) as cached:
+                    return cached.convert("RGB")
+
+        image = rasterize_image(pdf_path, 1, THUMBNAIL_SIZE, self.parent.poppler_path, self.preview_backend())
+        if render_cache:
+            render_cache.put_image(cache_key, image, ".png")
+        return image
+
     def rename_item(self, event):
         try:
             index = self.listbox.nearest(event.y)
             if index < 0:
                 return
+            self.open_rename(index)
+        except Exception as e:
+            log_error(f"rename_item 失败: {str(e)}")
+
+    def open_rename(self, index):
+        try:
             current_name, path = self.pdf_files[index]
 
             rename_dialog = ttkb.Toplevel(self.dialog)
@@ -243,6 +416,7 @@ class SortRenameDialog(BaseDialog):
                         self.pdf_files[index] = (new_name, path)
                         self.listbox.delete(index)
                         self.listbox.insert(index, new_name)
+                        self.grid_view.schedule_redraw()
                     rename_dialog.destroy()
                 except Exception as e:
                     log_error(f"save_name 失败: {str(e)}")
@@ -251,7 +425,7 @@ class SortRenameDialog(BaseDialog):
                         style="Custom.TButton").pack(pady=5)
             rename_dialog.protocol("WM_DELETE_WINDOW", rename_dialog.destroy)
         except Exception as e:
-            log_error(f"rename_item 失败: {str(e)}")
+            log_error(f"open_rename 失败: {str(e)}")
 
     def confirm(self):
         try:
@@ -263,9 +437,20 @@ class SortRenameDialog(BaseDialog):
     def cancel(self):
         try:
             self.result = None
-            while not self.parent.progress_queue.empty():
-                self.parent.progress_queue.get()
-            self.parent.output_text.delete(1.0, tk.END)
             self.destroy()
         except Exception as e:
-            log_error(f"cancel 失败: {str(e)}")
\ No newline at end of file
+            log_error(f"cancel 失败: {str(e)}")
+
+    def destroy(self):
+        try:
+            self.preview_generation += 1
+            for future in self.preview_futures:
+                future.cancel()
+            self.preview_executor.shutdown(wait=False)
+            for future in self.grid_view.pending.values():
+                future.cancel()
+            self.thumbnail_executor.shutdown(wait=False)
+            self.preview_cache.log_stats()
+        except Exception as e:
+            log_error(f"关闭预览线程池失败: {str(e)}")
+        super().destroy()
\ No newline at end of file
@@ -0,0 +1,285 @@
+import tkinter as tk
+import tkinter.ttk as ttk
+from PIL import ImageTk
+from config import DEFAULT_FONT, THUMBNAIL_SIZE, GRID_CELL_PADDING, THUMBNAIL_CACHE_MB, LISTBOX_SELECT_BG, PREVIEW_TEXT_COLOR
+from gui.preview_cache import PreviewCache
+from utils import log_error
+
+
+class ThumbnailGrid(ttk.Frame):
+    def __init__(self, master, items, load_thumbnail, font_size, on_select=None, on_change=None, on_activate=None):
+        """
+        虚拟化缩略图网格：只为可见单元格创建画布元素和 PhotoImage，缩略图由后台线程按需加载
+        参数:
+            master: 父容器
+            items: (文件名, 路径) 列表，移动条目时直接原地修改该列表
+            load_thumbnail: load_thumbnail(路径, 回调) 提交后台渲染并返回 Future，渲染完成后在后台线程中以PIL图像调用回调
+            font_size: 文件名字体大小
+            on_select: 主选中项变化时调用 on_select(索引)
+            on_change: 条目顺序变化时调用 on_change()
+            on_activate: 双击条目时调用 on_activate(索引)
+        """
+        super().__init__(master)
+        self.items = items
+        self.load_thumbnail = load_thumbnail
+        self.on_select = on_select
+        self.on_change = on_change
+        self.on_activate = on_activate
+        self.font = (DEFAULT_FONT, font_size, "normal")
+        self.cell_width = THUMBNAIL_SIZE + 2 * GRID_CELL_PADDING
+        self.cell_height = THUMBNAIL_SIZE + 3 * GRID_CELL_PADDING + font_size * 2
+
+        self.thumbnails = PreviewCache(THUMBNAIL_CACHE_MB)  # 路径 -> PIL缩略图
+        self.photos = {}     # 路径 -> PhotoImage，只保留当前可见的单元格
+        self.pending = {}    # 路径 -> 尚未完成的渲染 Future
+        self.selected = set()
+        self.anchor = None
+        self.drag_start = None
+        self.drop_index = None
+        self.redraw_scheduled = False
+
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Configure>", lambda event: self.refresh())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Control-Button-1>", self.on_toggle_click)
+        self.canvas.bind("<Shift-Button-1>", self.on_range_click)
+        self.canvas.bind("<B1-Motion>", self.on_motion)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<Double-1>", self.on_double_click)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.yview("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.yview("scroll", 1, "units"))
+        self.canvas.bind("<Control-Up>", lambda event: self.move_selection(-1))
+        self.canvas.bind("<Control-Down>", lambda event: self.move_selection(1))
+
+    def columns(self):
+        return max(1, self.canvas.winfo_width() // self.cell_width)
+
+    def refresh(self):
+        """
+        条目数量或窗口尺寸变化后更新滚动区域并重绘
+        """
+        try:
+            rows = -(-len(self.items) // self.columns())
+            self.canvas.configure(scrollregion=(0, 0, self.columns() * self.cell_width, rows * self.cell_height),
+                                  yscrollincrement=self.cell_height // 4)
+            self.schedule_redraw()
+        except Exception as e:
+            log_error(f"ThumbnailGrid refresh 失败: {str(e)}")
+
+    def schedule_redraw(self):
+        # 同一轮事件中的多次重绘请求合并为一次
+        if not self.redraw_scheduled:
+            self.redraw_scheduled = True
+            self.after_idle(self.redraw)
+
+    def visible_range(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        columns = self.columns()
+        first = max(0, int(top // self.cell_height) * columns)
+        last = min(len(self.items), (int(bottom // self.cell_height) + 1) * columns)
+        return first, last
+
+    def redraw(self):
+        try:
+            self.redraw_scheduled = False
+            self.canvas.delete("cell")
+            columns = self.columns()
+            first, last = self.visible_range()
+            visible_paths = set()
+
+            for index in range(first, last):
+                name, path = self.items[index]
+                visible_paths.add(path)
+                x0 = (index % columns) * self.cell_width
+                y0 = (index // columns) * self.cell_height
+                if index in self.selected:
+                    self.canvas.create_rectangle(x0 + 2, y0 + 2, x0 + self.cell_width - 2, y0 + self.cell_height - 2,
+                                                 fill=LISTBOX_SELECT_BG, outline="", tags="cell")
+                center_x = x0 + self.cell_width // 2
+                center_y = y0 + GRID_CELL_PADDING + THUMBNAIL_SIZE // 2
+                photo = self.get_photo(path)
+                if photo:
+                    self.canvas.create_image(center_x, center_y, image=photo, tags="cell")
+                else:
+                    self.canvas.create_rectangle(center_x - THUMBNAIL_SIZE // 3, center_y - THUMBNAIL_SIZE // 2,
+                                                 center_x + THUMBNAIL_SIZE // 3, center_y + THUMBNAIL_SIZE // 2,
+                                                 outline=PREVIEW_TEXT_COLOR, tags="cell")
+                self.canvas.create_text(center_x, y0 + THUMBNAIL_SIZE + 2 * GRID_CELL_PADDING,
+                                        text=f"{index + 1}. {name}", width=self.cell_width - 4, anchor="n",
+                                        font=self.font, tags="cell")
+
+            if self.drop_index is not None:
+                x0 = (self.drop_index % columns) * self.cell_width
+                y0 = (self.drop_index // columns) * self.cell_height
+                self.canvas.create_line(x0 + 1, y0, x0 + 1, y0 + self.cell_height, width=3, fill="blue", tags="cell")
+
+            # 释放不可见单元格的 PhotoImage，取消已滚出视野的缩略图请求
+            for path in list(self.photos):
+                if path not in visible_paths:
+                    del self.photos[path]
+            for path, future in list(self.pending.items()):
+                if path not in visible_paths and future.cancel():
+                    del self.pending[path]
+        except Exception as e:
+            log_error(f"ThumbnailGrid redraw 失败: {str(e)}")
+
+    def get_photo(self, path):
+        if path in self.photos:
+            return self.photos[path]
+        image = self.thumbnails.get(path)
+        if image is None:
+            if path not in self.pending:
+                self.pending[path] = self.load_thumbnail(path, lambda thumb, p=path: self.thumbnail_loaded(p, thumb))
+            return None
+        self.photos[path] = ImageTk.PhotoImage(image)
+        return self.photos[path]
+
+    def thumbnail_loaded(self, path, image):
+        # 在后台线程中调用，交给主线程处理；对话框关闭后控件已销毁，丢弃结果
+        try:
+            self.after(0, self.thumbnail_ready, path, image)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def thumbnail_ready(self, path, image):
+        if not self.winfo_exists():
+            return
+        self.pending.pop(path, None)
+        if image is not None:
+            self.thumbnails.put(path, image)
+            self.schedule_redraw()
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.schedule_redraw()
+
+    def on_wheel(self, event):
+        self.yview("scroll", -1 if event.delta > 0 else 1, "units")
+
+    def index_at(self, event):
+        column = event.x // self.cell_width
+        if column >= self.columns():
+            return None
+        index = int(self.canvas.canvasy(event.y) // self.cell_height) * self.columns() + column
+        return index if 0 <= index < len(self.items) else None
+
+    def insertion_index_at(self, event):
+        column = min(self.columns(), max(0, round(event.x / self.cell_width)))
+        row = int(self.canvas.canvasy(event.y) // self.cell_height)
+        return min(len(self.items), max(0, row * self.columns() + column))
+
+    def select(self, indices, primary):
+        self.selected = set(indices)
+        self.anchor = primary
+        self.schedule_redraw()
+        if self.on_select and primary is not None:
+            self.on_select(primary)
+
+    def on_click(self, event):
+        try:
+            self.canvas.focus_set()
+            index = self.index_at(event)
+            if index is None:
+                return
+            # 点击已选中的块时保留整块选择，便于整块拖动
+            if index not in self.selected:
+                self.select({index}, index)
+            elif self.on_select:
+                self.on_select(index)
+            self.drag_start = index
+        except Exception as e:
+            log_error(f"ThumbnailGrid on_click 失败: {str(e)}")
+
+    def on_toggle_click(self, event):
+        index = self.index_at(event)
+        if index is not None:
+            self.drag_start = None
+            self.select(self.selected ^ {index}, index)
+        return "break"
+
+    def on_range_click(self, event):
+        index = self.index_at(event)
+        if index is not None:
+            self.drag_start = None
+            anchor = self.anchor if self.anchor is not None else index
+            self.select(range(min(anchor, index), max(anchor, index) + 1), anchor)
+        return "break"
+
+    def on_motion(self, event):
+        try:
+            if self.drag_start is None:
+                return
+            # 拖动时只绘制插入标记，松开鼠标时才一次性移动条目
+            if event.y < 0:
+                self.canvas.yview("scroll", -1, "units")
+            elif event.y > self.canvas.winfo_height():
+                self.canvas.yview("scroll", 1, "units")
+            self.drop_index = self.insertion_index_at(event)
+            self.schedule_redraw()
+        except Exception as e:
+            log_error(f"ThumbnailGrid on_motion 失败: {str(e)}")
+
+    def on_release(self, event):
+        try:
+            if self.drag_start is not None and self.drop_index is not None:
+                self.move_block(self.drop_index)
+            elif self.drag_start is not None and len(self.selected) > 1:
+                # 单击（未拖动）选中块中的一项时只保留该项
+                self.select({self.drag_start}, self.drag_start)
+            self.drag_start = None
+            self.drop_index = None
+            self.schedule_redraw()
+        except Exception as e:
+            log_error(f"ThumbnailGrid on_release 失败: {str(e)}")
+
+    def on_double_click(self, event):
+        index = self.index_at(event)
+        if index is not None and self.on_activate:
+            self.on_activate(index)
+
+    def move_block(self, target):
+        """
+        把所有选中条目按原有相对顺序移动到 target 位置之前（一次 O(n) 重排）
+        参数:
+            target: 插入位置（以移动前的索引计）
+        """
+        if not self.selected:
+            return
+        block = [self.items[index] for index in sorted(self.selected)]
+        remaining = [item for index, item in enumerate(self.items) if index not in self.selected]
+        target -= sum(1 for index in self.selected if index < target)
+        reordered = remaining[:target] + block + remaining[target:]
+        if reordered == self.items:
+            return
+        self.items[:] = reordered
+        self.select(range(target, target + len(block)), target)
+        if self.on_change:
+            self.on_change()
+
+    def move_selection(self, step):
+        if not self.selected:
+            return "break"
+        if step < 0:
+            target = max(0, min(self.selected) + step)
+        else:
+            target = min(len(self.items), max(self.selected) + 1 + step)
+        self.move_block(target)
+        self.see(min(self.selected))
+        return "break"
+
+    def see(self, index):
+        rows = -(-len(self.items) // self.columns())
+        if rows:
+            row = index // self.columns()
+            top = self.canvas.canvasy(0)
+            y = row * self.cell_height
+            if y < top or y + self.cell_height > top + self.canvas.winfo_height():
+                self.canvas.yview_moveto(row / rows)
+                self.schedule_redraw()
@@ -0,0 +1,263 @@
+"""
+分布式队列测试：在临时目录上运行多个 QueueWorker，覆盖领取、租约过期、重试、失败上限、
+worker 崩溃后重新领取，以及协调节点对缺失输出文件的检查
+
+用法:
+    python -m pytest tests
+    python -m unittest discover tests
+
+worker 的 render 被替换为直接写文件的测试实现，不需要 Poppler。
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.distributed import CoordinatorEngine, QueueWorker
+from core.events import EventBus
+from core.job_queue import DirectoryQueue, DONE, FAILED
+from core.pdf_index import PdfInfo
+
+# 测试用的短租约（秒）和轮询间隔（秒）
+LEASE_SECONDS = 1.0
+POLL_SECONDS = 0.05
+# 等待条件成立的最长时间（秒）
+WAIT_TIMEOUT = 20
+
+
+def wait_for(predicate, timeout=WAIT_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(POLL_SECONDS)
+    return False
+
+
+def page_name(page):
+    return f"{page:04d}.jpg"
+
+
+class FileWorker(QueueWorker):
+    def __init__(self, queue, page_seconds=0.0, fail_attempts=0, output_dir=None, **kwargs):
+        """
+        测试用 worker：每页写一个小文件代替渲染，每页之间检查租约是否仍有效
+        参数:
+            page_seconds: 每页耗时（秒）
+            fail_attempts: 前几次尝试直接抛出异常（模拟渲染失败）
+            output_dir: 写入的目录（None 表示任务中的输出目录，用于模拟各节点 --root 不一致）
+        """
+        super().__init__(queue, poll_seconds=POLL_SECONDS, **kwargs)
+        self.page_seconds = page_seconds
+        self.fail_attempts = fail_attempts
+        self.output_dir = output_dir
+        self.attempt = 0
+
+    def render(self, job, control=None):
+        self.attempt += 1
+        if self.attempt <= self.fail_attempts:
+            raise RuntimeError(f"模拟渲染失败（第 {self.attempt} 次）")
+        output_dir = self.output_dir or job["output_dir"]
+        results = []
+        for page in range(job["first_page"], job["last_page"] + 1):
+            if control:
+                control.checkpoint()
+            time.sleep(self.page_seconds)
+            with open(os.path.join(output_dir, page_name(page)), "w", encoding="utf-8") as f:
+                f.write(f"{page}\n")
+            results.append([page, page_name(page)])
+        return results
+
+
+def run_slow_worker(queue_root, worker_id):
+    # 在子进程中运行的慢速 worker，测试在其持有租约期间强制结束该进程
+    queue = DirectoryQueue(queue_root, lease_seconds=LEASE_SECONDS)
+    FileWorker(queue, page_seconds=1.0, worker_id=worker_id).run(idle_exit=WAIT_TIMEOUT)
+
+
+class DistributedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="pdf_organizer_test_")
+        self.queue_root = os.path.join(self.temp_dir, "queue")
+        self.output_dir = os.path.join(self.temp_dir, "output")
+        os.makedirs(self.output_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_queue(self, lease_seconds=LEASE_SECONDS, max_attempts=3):
+        return DirectoryQueue(self.queue_root, lease_seconds=lease_seconds, max_attempts=max_attempts)
+
+    def submit_pages(self, queue, first_page, last_page):
+        return queue.submit({"pdf_path": os.path.join(self.temp_dir, "sample.pdf"), "output_dir": self.output_dir,
+                             "first_page": first_page, "last_page": last_page})
+
+    def run_workers(self, workers, idle_exit=LEASE_SECONDS * 3):
+        threads = [threading.Thread(target=worker.run, kwargs={"idle_exit": idle_exit}) for worker in workers]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def assert_pages_written(self, first_page, last_page):
+        for page in range(first_page, last_page + 1):
+            with open(os.path.join(self.output_dir, page_name(page)), "r", encoding="utf-8") as f:
+                self.assertEqual(f.read(), f"{page}\n")
+
+
+class DirectoryQueueTest(DistributedTestCase):
+    def test_claim_is_exclusive(self):
+        queue = self.make_queue()
+        job_id = self.submit_pages(queue, 1, 1)
+        leases = []
+        barrier = threading.Barrier(8)
+
+        def claim(index):
+            barrier.wait()
+            leases.append(queue.claim(f"w{index}"))
+
+        threads = [threading.Thread(target=claim, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        claimed = [lease for lease in leases if lease is not None]
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(claimed[0].job_id, job_id)
+        self.assertEqual(claimed[0].attempt, 1)
+
+    def test_expired_lease_is_reclaimed_until_max_attempts(self):
+        queue = self.make_queue(lease_seconds=0.2, max_attempts=2)
+        job_id = self.submit_pages(queue, 1, 1)
+        first = queue.claim("w1")
+        self.assertIsNone(queue.claim("w2"))
+        time.sleep(0.3)
+        second = queue.claim("w2")
+        self.assertEqual(second.attempt, 2)
+        self.assertEqual(queue.attempts(job_id)[0][1].get("worker"), "w1")
+        time.sleep(0.3)
+        self.assertIsNone(queue.claim("w3"))
+        state, error = queue.status(job_id)
+        self.assertEqual(state, FAILED)
+        self.assertIn("租约过期", error)
+        self.assertFalse(queue.renew(first))
+        self.assertFalse(queue.renew(second))
+
+    def test_stale_holder_does_not_touch_new_lease(self):
+        queue = self.make_queue(lease_seconds=0.2)
+        job_id = self.submit_pages(queue, 1, 1)
+        stale = queue.claim("w1")
+        time.sleep(0.3)
+        current = queue.claim("w2")
+        lease_path = queue._path("leases", job_id)
+        # 已被重新领取的租约不会再被判定过期，原持有者也不能续期或释放它
+        self.assertFalse(queue._expire(job_id, lease_path))
+        self.assertFalse(queue.renew(stale))
+        queue.fail(stale, "迟到的失败", "w1")
+        self.assertTrue(queue.renew(current))
+        self.assertEqual(len(queue.attempts(job_id)), 1)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(lease_path))), [os.path.basename(lease_path)])
+
+    def test_failed_job_is_retried_then_fails(self):
+        queue = self.make_queue(max_attempts=2)
+        retried = self.submit_pages(queue, 1, 3)
+        worker = FileWorker(queue, fail_attempts=1, worker_id="w1")
+        self.assertEqual(worker.run(idle_exit=0), 1)
+        state, result = queue.status(retried)
+        self.assertEqual(state, DONE)
+        self.assertEqual([page for page, _ in result["pages"]], [1, 2, 3])
+        self.assertEqual(len(queue.attempts(retried)), 1)
+
+        failed = self.submit_pages(queue, 4, 4)
+        worker = FileWorker(queue, fail_attempts=2, worker_id="w2")
+        self.assertEqual(worker.run(idle_exit=0), 0)
+        state, error = queue.status(failed)
+        self.assertEqual(state, FAILED)
+        self.assertIn("第 2 次", error)
+
+
+class QueueWorkerTest(DistributedTestCase):
+    def test_workers_share_jobs(self):
+        queue = self.make_queue()
+        job_ids = [self.submit_pages(queue, first_page, first_page + 4) for first_page in range(1, 31, 5)]
+        workers = [FileWorker(queue, page_seconds=0.01, worker_id=f"w{index}") for index in range(3)]
+        for thread in self.run_workers(workers):
+            thread.join()
+        for job_id in job_ids:
+            self.assertEqual(queue.status(job_id)[0], DONE)
+        self.assertEqual(sum(worker.attempt for worker in workers), len(job_ids))
+        self.assert_pages_written(1, 30)
+
+    def test_killed_worker_job_is_reclaimed(self):
+        queue = self.make_queue()
+        job_ids = [self.submit_pages(queue, first_page, first_page + 4) for first_page in range(1, 16, 5)]
+        process = multiprocessing.Process(target=run_slow_worker, args=(self.queue_root, "crashed"))
+        process.start()
+        try:
+            # 等慢速 worker 领取任务并写出第一页后强制结束它，租约不再续期
+            self.assertTrue(wait_for(lambda: os.listdir(self.output_dir)))
+        finally:
+            process.kill()
+            process.join()
+        self.assertEqual(len(os.listdir(os.path.join(self.queue_root, "leases"))), 1)
+
+        workers = [FileWorker(queue, page_seconds=0.01, worker_id=f"w{index}") for index in range(2)]
+        for thread in self.run_workers(workers):
+            thread.join()
+        for job_id in job_ids:
+            state, result = queue.status(job_id)
+            self.assertEqual(state, DONE)
+            self.assertNotEqual(result["worker"], "crashed")
+        expired = [record for job_id in job_ids for _, record in queue.attempts(job_id)]
+        self.assertEqual(len(expired), 1)
+        self.assertEqual(expired[0].get("worker"), "crashed")
+        self.assertIn("租约过期", expired[0].get("error"))
+        self.assert_pages_written(1, 15)
+
+
+class CoordinatorTest(DistributedTestCase):
+    def make_coordinator(self, queue, page_count):
+        pdf_path = os.path.join(self.temp_dir, "sample.pdf")
+        coordinator = CoordinatorEngine(queue, pages_per_job=4, poll_seconds=POLL_SECONDS, events=EventBus(),
+                                        size=None)
+        coordinator.pdf_info[pdf_path] = PdfInfo(page_count, None, False)
+        return coordinator, pdf_path
+
+    def test_coordinator_collects_worker_output(self):
+        queue = self.make_queue()
+        coordinator, pdf_path = self.make_coordinator(queue, 10)
+        threads = self.run_workers([FileWorker(queue, worker_id=f"w{index}") for index in range(2)])
+        try:
+            num_images = coordinator.pdf_to_jpg(pdf_path, self.output_dir, original_name="sample.pdf")
+        finally:
+            for thread in threads:
+                thread.join()
+        self.assertEqual(num_images, 10)
+        self.assert_pages_written(1, 10)
+        self.assertEqual(os.listdir(os.path.join(self.queue_root, "jobs")), [])
+
+    def test_coordinator_rejects_missing_output(self):
+        queue = self.make_queue()
+        coordinator, pdf_path = self.make_coordinator(queue, 4)
+        # worker 写到了协调节点看不到的目录（各节点的 --root 不一致）
+        elsewhere = os.path.join(self.temp_dir, "elsewhere")
+        os.makedirs(elsewhere)
+        threads = self.run_workers([FileWorker(queue, output_dir=elsewhere, worker_id="w1")])
+        try:
+            with self.assertRaisesRegex(RuntimeError, "缺少 4 个文件"):
+                coordinator.pdf_to_jpg(pdf_path, self.output_dir, original_name="sample.pdf")
+        finally:
+            for thread in threads:
+                thread.join()
+        self.assertEqual(os.listdir(self.output_dir), [])
+        self.assertEqual(os.listdir(os.path.join(self.queue_root, "jobs")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
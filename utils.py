@@ -1,8 +1,12 @@
 import logging
-import traceback
 import os
 import sys
 import shutil
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from config import HASH_CACHE_ENTRIES
 
 def center_window(window, parent=None):
     """
@@ -31,64 +35,119 @@ def center_window(window, parent=None):
         x, y = max(0, x), max(0, y)
         window.geometry(f"+{x}+{y}")
     except Exception as e:
-        logging.error(f"center_window 失败: {str(e)}")
-        traceback.print_exc()
+        log_error(f"center_window 失败: {str(e)}")
+
+POPPLER_CACHE_FILE = "poppler_path.json"
+_poppler_path_cache = {}
+
+def _poppler_search_paths():
+    # 返回 (项目根目录, 按顺序尝试的 Poppler 目录列表)
+    if getattr(sys, 'frozen', False):
+        # 打包后的路径：与可执行文件同级目录
+        base_path = os.path.dirname(sys.executable)
+        # 尝试不同的可能路径
+        possible_paths = [
+            os.path.join(base_path, "_internal", "assets", "poppler"),  # 打包后的实际路径
+            os.path.join(base_path, "assets", "poppler"),
+            os.path.join(base_path, "poppler"),
+        ]
+    else:
+        # 开发时的路径：从utils.py所在目录获取项目根目录
+        base_path = os.path.dirname(os.path.abspath(__file__))
+        possible_paths = [os.path.join(base_path, "assets", "poppler")]
+    return base_path, [os.path.abspath(path) for path in possible_paths]
+
+def _load_cached_poppler_path(base_path):
+    """
+    读取上次运行时找到的 Poppler 目录
+    返回:
+        (是否命中, 路径)；安装位置变化或缓存的目录已不存在时视为未命中
+    """
+    try:
+        with open(os.path.join(get_app_data_dir(), POPPLER_CACHE_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False, None
+    if data.get("base_path") != base_path:
+        return False, None
+    poppler_path = data.get("poppler_path")
+    if poppler_path is None:
+        return (True, None) if shutil.which("pdftoppm") else (False, None)
+    return (True, poppler_path) if os.path.isdir(poppler_path) else (False, None)
+
+def _save_cached_poppler_path(base_path, poppler_path):
+    try:
+        path = os.path.join(get_app_data_dir(), POPPLER_CACHE_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"base_path": base_path, "poppler_path": poppler_path}, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logging.warning(f"无法保存 Poppler 路径缓存: {str(e)}")
 
 def get_poppler_path():
     """
     获取Poppler的路径
+    结果在进程内缓存，并保存到本地数据目录，下次启动时只需确认缓存的目录仍然存在
     返回:
         Poppler的bin目录路径，或者None（如果未找到则使用系统PATH）
     """
     try:
-        # 确定项目根目录
-        if getattr(sys, 'frozen', False):
-            # 打包后的路径：与可执行文件同级目录
-            base_path = os.path.dirname(sys.executable)
-            # 尝试不同的可能路径
-            possible_paths = [
-                os.path.join(base_path, "_internal", "assets", "poppler"),  # 打包后的实际路径
-                os.path.join(base_path, "assets", "poppler"),
-                os.path.join(base_path, "poppler"),
-            ]
-        else:
-            # 开发时的路径：从utils.py所在目录获取项目根目录
-            base_path = os.path.dirname(os.path.abspath(__file__))
-            possible_paths = [os.path.join(base_path, "assets", "poppler")]
-
-        for poppler_bin in possible_paths:
-            poppler_bin = os.path.abspath(poppler_bin)  # 转换为绝对路径
-            logging.info(f"尝试Poppler路径: {poppler_bin}")
-            # 检查路径是否存在
-            if os.path.exists(poppler_bin):
-                logging.info(f"找到Poppler: {poppler_bin}")
-                return poppler_bin
-
-        # 调试：列出目录内容
+        base_path, possible_paths = _poppler_search_paths()
+        if base_path in _poppler_path_cache:
+            return _poppler_path_cache[base_path]
+        found, poppler_path = _load_cached_poppler_path(base_path)
+        if not found:
+            poppler_path = _find_poppler_path(base_path, possible_paths)
+            _save_cached_poppler_path(base_path, poppler_path)
+        logging.info(f"使用Poppler: {poppler_path or '系统PATH'}")
+        _poppler_path_cache[base_path] = poppler_path
+        return poppler_path
+    except Exception as e:
+        log_error(f"get_poppler_path 失败: {str(e)}")
+        return None
+
+def _find_poppler_path(base_path, possible_paths):
+    # 逐个探测可能的目录；探测过程只在 DEBUG 级别记录
+    for poppler_bin in possible_paths:
+        logging.debug(f"尝试Poppler路径: {poppler_bin}")
+        # 检查路径是否存在
+        if os.path.exists(poppler_bin):
+            logging.info(f"找到Poppler: {poppler_bin}")
+            return poppler_bin
+
+    # 调试：列出目录内容
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
         assets_dir = os.path.join(base_path, "_internal", "assets")
         if os.path.exists(assets_dir):
-            logging.info(f"assets目录存在，内容: {os.listdir(assets_dir)}")
-        else:
-            logging.warning(f"assets目录不存在: {assets_dir}")
-
-        poppler_dir = os.path.join(base_path, "_internal", "assets", "poppler")
+            logging.debug(f"assets目录存在，内容: {os.listdir(assets_dir)}")
+        poppler_dir = os.path.join(assets_dir, "poppler")
         if os.path.exists(poppler_dir):
-            logging.info(f"poppler目录存在，内容: {os.listdir(poppler_dir)}")
-        else:
-            logging.warning(f"poppler目录不存在: {poppler_dir}")
+            logging.debug(f"poppler目录存在，内容: {os.listdir(poppler_dir)}")
 
-        logging.warning(f"未找到Poppler的bin目录，将尝试使用系统PATH")
-        # 最后尝试系统PATH
-        if shutil.which("pdftoppm"):
-            logging.info("找到系统PATH中的Poppler")
-            return None
-        else:
-            logging.warning("系统PATH中也未找到Poppler")
-            return None
-    except Exception as e:
-        logging.error(f"get_poppler_path 失败: {str(e)}")
-        traceback.print_exc()
-        return None
+    logging.warning(f"未找到Poppler的bin目录，将尝试使用系统PATH")
+    # 最后尝试系统PATH
+    if shutil.which("pdftoppm"):
+        logging.info("找到系统PATH中的Poppler")
+    else:
+        logging.warning("系统PATH中也未找到Poppler")
+    return None
+
+def get_app_data_dir(*parts):
+    """
+    获取程序的本地数据目录（缓存等），不存在时自动创建
+    参数:
+        parts: 数据目录下的子路径
+    返回:
+        Windows 上为 %LOCALAPPDATA%\\PDFOrganizer，其他平台为 $XDG_CACHE_HOME/pdf_organizer 或 ~/.cache/pdf_organizer
+    """
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        base_path = os.path.join(os.environ["LOCALAPPDATA"], "PDFOrganizer")
+    else:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        base_path = os.path.join(cache_home, "pdf_organizer")
+    path = os.path.join(base_path, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
 
 def log_error(message):
     """
@@ -96,5 +155,42 @@ def log_error(message):
     参数:
         message: 错误信息
     """
-    logging.error(message)
-    traceback.print_exc()
\ No newline at end of file
+    # 堆栈写入日志（由日志线程写文件），不再同步打印到标准错误
+    logging.error(message, exc_info=sys.exc_info()[0] is not None)
+
+# 按最近使用顺序排列，超过 HASH_CACHE_ENTRIES 条后淘汰最久未使用的条目（监视模式长时间运行时内存不增长）
+_hash_cache = OrderedDict()
+_hash_cache_lock = threading.Lock()
+
+def _sha256(path, chunk_size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_sha256(path, chunk_size=1024 * 1024, cache=True):
+    """
+    计算文件内容的SHA-256（按路径、大小和修改时间缓存，同一进程内不重复读取未变化的文件）
+    参数:
+        path: 文件路径
+        chunk_size: 每次读取的字节数
+        cache: 是否使用和写入缓存（只计算一次的文件，如每页生成的图片，不必占用缓存）
+    返回:
+        十六进制摘要字符串
+    """
+    if not cache:
+        return _sha256(path, chunk_size)
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _hash_cache_lock:
+        if key in _hash_cache:
+            _hash_cache.move_to_end(key)
+            return _hash_cache[key]
+
+    value = _sha256(path, chunk_size)
+    with _hash_cache_lock:
+        _hash_cache[key] = value
+        while len(_hash_cache) > HASH_CACHE_ENTRIES:
+            _hash_cache.popitem(last=False)
+    return value